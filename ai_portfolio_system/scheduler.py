@@ -0,0 +1,344 @@
+import argparse
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Iterable, List, Optional, Protocol, Sequence
+
+from ai_portfolio_system.orchestrator import AgentConfig, AIOrchestrator
+from src.validation.refutation import RateLimiter
+
+# Task scheduler for the orchestrator's agents.
+# Every agent gets its own lane: a priority queue, a worker pool sized by its
+# execution policy, an optional rate limit (per backend call) and an optional
+# batching window that coalesces queued tasks into one backend call. A shared
+# semaphore caps how many backend calls run at once across all agents.
+
+URGENT = 0
+HIGH = 10
+NORMAL = 50
+LOW = 90
+
+AGENT_ATTRIBUTES = ("core", "data_eng", "audit", "macro", "ops")
+
+
+@dataclass(frozen=True)
+class ExecutionPolicy:
+    workers: int = 1
+    rate: Optional[float] = None      # backend calls per second, None = unlimited
+    burst: Optional[int] = None
+    batch_window: float = 0.0         # seconds to wait for more tasks before dispatching
+    max_batch: int = 1
+    urgent_bypass: bool = True        # URGENT tasks never wait for the window
+
+
+POLICIES: Dict[str, ExecutionPolicy] = {
+    # Long reasoning chains: a couple of parallel runs, no batching
+    "Autonomous chain-of-thought": ExecutionPolicy(workers=2),
+    # Bulk loads coalesce briefly; URGENT (streaming) items go straight through
+    "Batch + Streaming": ExecutionPolicy(workers=4, batch_window=0.05, max_batch=64),
+    # Audits are not latency sensitive: collect them and validate in one call
+    "Delayed validation": ExecutionPolicy(workers=2, rate=2.0, batch_window=0.5, max_batch=32, urgent_bypass=False),
+    # Expensive model, invoked explicitly: one call at a time
+    "On demand": ExecutionPolicy(workers=1, rate=1.0),
+    # Event handlers: many small calls, throttled
+    "Reactive": ExecutionPolicy(workers=4, rate=20.0, burst=20),
+}
+
+
+def policy_for(agent: AgentConfig, policies: Optional[Dict[str, ExecutionPolicy]] = None) -> ExecutionPolicy:
+    """The policy for the agent's execution_mode; unknown modes get one unthrottled worker."""
+    return (policies or POLICIES).get(agent.execution_mode, ExecutionPolicy())
+
+
+@dataclass
+class Task:
+    agent: str
+    kind: str
+    payload: Any = None
+    priority: int = NORMAL
+    submitted_at: float = field(default_factory=time.monotonic)
+    future: Future = field(default_factory=Future, repr=False)
+
+
+class AgentBackend(Protocol):
+    def run_batch(self, agent: AgentConfig, tasks: List[Task]) -> List[Any]:
+        """Runs the tasks in one call; returns one result per task, in order."""
+        ...
+
+
+class StubAgentBackend:
+    """
+    Offline backend for load tests: sleeps `latency` per call plus
+    `per_task_latency` per task and echoes the payloads. Task kinds listed in
+    `fail_kinds` raise, failing the whole batch.
+    """
+
+    def __init__(self, latency: float = 0.0, per_task_latency: float = 0.0, fail_kinds: Iterable[str] = ()):
+        self.latency = latency
+        self.per_task_latency = per_task_latency
+        self.fail_kinds = set(fail_kinds)
+        self.batches: List[tuple] = []
+        self._lock = threading.Lock()
+
+    def run_batch(self, agent: AgentConfig, tasks: List[Task]) -> List[Any]:
+        with self._lock:
+            self.batches.append((agent.role, len(tasks)))
+        delay = self.latency + self.per_task_latency * len(tasks)
+        if delay:
+            time.sleep(delay)
+        for task in tasks:
+            if task.kind in self.fail_kinds:
+                raise RuntimeError(f"{agent.role} cannot handle {task.kind}")
+        return [{"agent": agent.role, "kind": task.kind, "payload": task.payload} for task in tasks]
+
+
+class AgentMetrics:
+    """Per-agent counters and a window of recent end-to-end latencies (queue + run)."""
+
+    def __init__(self, window: int = 10000):
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0  # futures cancelled while queued; never run
+        self.batches = 0
+        self.busy_seconds = 0.0
+        self.latencies: Deque[float] = deque(maxlen=window)
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+
+    def record_batch(self, tasks: Sequence[Task], ok: bool, run_seconds: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self.batches += 1
+            self.busy_seconds += run_seconds
+            if ok:
+                self.completed += len(tasks)
+            else:
+                self.failed += len(tasks)
+            self.latencies.extend(now - task.submitted_at for task in tasks)
+
+    def record_cancelled(self, n: int) -> None:
+        with self._lock:
+            self.cancelled += n
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            latencies = sorted(self.latencies)
+            elapsed = max(time.monotonic() - self.started, 1e-9)
+            done = self.completed + self.failed
+            finished = done + self.cancelled
+
+            def pct(q: float) -> float:
+                return latencies[min(len(latencies) - 1, int(q * len(latencies)))] if latencies else 0.0
+
+            return {
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "queued": self.submitted - finished,
+                "batches": self.batches,
+                "mean_batch": done / self.batches if self.batches else 0.0,
+                "throughput_per_s": done / elapsed,
+                "latency_p50_s": pct(0.50),
+                "latency_p95_s": pct(0.95),
+                "latency_max_s": latencies[-1] if latencies else 0.0,
+                "busy_seconds": self.busy_seconds,
+            }
+
+
+class _AgentLane:
+    def __init__(self, agent: AgentConfig, policy: ExecutionPolicy, backend: AgentBackend,
+                 global_slots: Optional[threading.Semaphore]):
+        self.agent = agent
+        self.policy = policy
+        self.backend = backend
+        self.global_slots = global_slots
+        self.limiter = RateLimiter(policy.rate, policy.burst) if policy.rate else None
+        self.metrics = AgentMetrics()
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closing = False
+        self._threads = [threading.Thread(target=self._worker, name=f"{agent.role}-{i}", daemon=True)
+                         for i in range(max(1, policy.workers))]
+        for thread in self._threads:
+            thread.start()
+
+    def put(self, task: Task) -> None:
+        with self._cond:
+            if self._closing:
+                raise RuntimeError(f"Scheduler lane {self.agent.role} is shut down")
+            heapq.heappush(self._queue, (task.priority, next(self._seq), task))
+            self.metrics.submitted += 1
+            self._cond.notify()
+
+    def close(self, wait: bool = True) -> None:
+        with self._cond:
+            self._closing = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _take_batch(self) -> List[Task]:
+        """Blocks for the next batch; [] once the lane is closed and drained."""
+        policy = self.policy
+        with self._cond:
+            while True:
+                while not self._queue:
+                    if self._closing:
+                        return []
+                    self._cond.wait()
+                head = self._queue[0][2]
+                bypass = policy.urgent_bypass and head.priority <= URGENT
+                if policy.batch_window > 0 and not bypass:
+                    # Coalesce until the oldest queued task's window closes or the batch is full
+                    deadline = min(task.submitted_at for _, _, task in self._queue) + policy.batch_window
+                    while 0 < len(self._queue) < policy.max_batch and not self._closing:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    if not self._queue:
+                        continue  # another worker took them
+                size = min(max(1, policy.max_batch), len(self._queue))
+                return [heapq.heappop(self._queue)[2] for _ in range(size)]
+
+    def _worker(self) -> None:
+        while True:
+            tasks = self._take_batch()
+            if not tasks:
+                return
+            running = [task for task in tasks if task.future.set_running_or_notify_cancel()]
+            if len(running) < len(tasks):
+                self.metrics.record_cancelled(len(tasks) - len(running))
+            tasks = running
+            if not tasks:
+                continue
+            if self.limiter:
+                self.limiter.acquire()
+            if self.global_slots:
+                self.global_slots.acquire()
+            start = time.monotonic()
+            try:
+                results = self.backend.run_batch(self.agent, tasks)
+                if len(results) != len(tasks):
+                    raise RuntimeError(f"{self.agent.role} returned {len(results)} results for {len(tasks)} tasks")
+            except Exception as exc:
+                self.metrics.record_batch(tasks, False, time.monotonic() - start)
+                for task in tasks:
+                    task.future.set_exception(exc)
+            else:
+                self.metrics.record_batch(tasks, True, time.monotonic() - start)
+                for task, result in zip(tasks, results):
+                    task.future.set_result(result)
+            finally:
+                if self.global_slots:
+                    self.global_slots.release()
+
+
+class AgentScheduler:
+    """
+    Routes tasks to the orchestrator's agents. Tasks are addressed by agent
+    attribute ("audit"), role ("Audit_Logic_AI") or, when no agent is given,
+    by a responsibility matching the task kind ("Compliance Checks").
+    """
+
+    def __init__(self, orchestrator: Optional[AIOrchestrator] = None, backend: Optional[AgentBackend] = None,
+                 policies: Optional[Dict[str, ExecutionPolicy]] = None, max_total_concurrency: Optional[int] = None):
+        self.orchestrator = orchestrator or AIOrchestrator()
+        self.backend = backend or StubAgentBackend()
+        self.policies = {**POLICIES, **(policies or {})}
+        global_slots = threading.BoundedSemaphore(max_total_concurrency) if max_total_concurrency else None
+
+        self.agents: Dict[str, AgentConfig] = {}
+        self._aliases: Dict[str, str] = {}
+        self._lanes: Dict[str, _AgentLane] = {}
+        for attribute in AGENT_ATTRIBUTES:
+            agent = getattr(self.orchestrator, attribute)
+            self.agents[agent.role] = agent
+            self._aliases[attribute] = agent.role
+            self._aliases[agent.role] = agent.role
+            for responsibility in agent.responsibilities:
+                self._aliases.setdefault(responsibility, agent.role)
+            self._lanes[agent.role] = _AgentLane(agent, policy_for(agent, self.policies), self.backend, global_slots)
+
+    @property
+    def routes(self) -> List[str]:
+        """Every name a task can be addressed by (attributes, roles, responsibilities)."""
+        return list(self._aliases)
+
+    def route(self, agent: Optional[str], kind: str) -> str:
+        role = self._aliases.get(agent or kind)
+        if role is None:
+            raise KeyError(f"No agent handles {agent or kind!r}")
+        return role
+
+    def submit(self, agent: Optional[str], kind: str, payload: Any = None, priority: int = NORMAL) -> Future:
+        role = self.route(agent, kind)
+        task = Task(role, kind, payload, priority)
+        self._lanes[role].put(task)
+        return task.future
+
+    def policy(self, agent: str) -> ExecutionPolicy:
+        return self._lanes[self.route(agent, agent)].policy
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        return {role: lane.metrics.snapshot() for role, lane in self._lanes.items()}
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stops accepting tasks; with wait=True, queued tasks are drained first."""
+        for lane in self._lanes.values():
+            lane.close(wait=False)
+        if wait:
+            for lane in self._lanes.values():
+                lane.close(wait=True)
+
+    def __enter__(self) -> "AgentScheduler":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+
+def load_test(tasks: int = 2000, latency: float = 0.002, per_task_latency: float = 0.0,
+              seed: int = 7) -> Dict[str, Dict[str, float]]:
+    """Fires `tasks` random tasks at every agent through the stub backend; returns the metrics."""
+    rng = random.Random(seed)
+    backend = StubAgentBackend(latency=latency, per_task_latency=per_task_latency)
+    # Lift rate limits so the run measures the scheduler rather than the throttles
+    policies = {mode: ExecutionPolicy(policy.workers, None, None, policy.batch_window, policy.max_batch,
+                                      policy.urgent_bypass) for mode, policy in POLICIES.items()}
+    with AgentScheduler(backend=backend, policies=policies) as scheduler:
+        kinds = scheduler.routes
+        futures = [scheduler.submit(None, rng.choice(kinds), {"n": i}, rng.choice([URGENT, HIGH, NORMAL, LOW]))
+                   for i in range(tasks)]
+        for future in futures:
+            future.result()
+        return scheduler.metrics()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Offline load test of the agent scheduler")
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.002, help="stub backend seconds per call")
+    parser.add_argument("--per-task-latency", type=float, default=0.0)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    metrics = load_test(args.tasks, args.latency, args.per_task_latency)
+    elapsed = time.perf_counter() - start
+    print(f"{args.tasks} tasks in {elapsed:.2f}s ({args.tasks / elapsed:,.0f} tasks/s)")
+    print(f"{'agent':22} {'done':>6} {'batches':>8} {'mean':>6} {'p50 ms':>8} {'p95 ms':>8}")
+    for role, m in metrics.items():
+        print(f"{role:22} {m['completed']:6d} {m['batches']:8d} {m['mean_batch']:6.1f} "
+              f"{m['latency_p50_s'] * 1000:8.1f} {m['latency_p95_s'] * 1000:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+import streamlit.logger
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+# load_data runs outside a streamlit session; its "no runtime" warnings are noise here
+streamlit.logger.set_log_level("error")
+
+from benchmarks.synthetic import generate_ledger, generate_prices, make_universe, write_ledger  # noqa: E402
+from src.analysis.metrics import (build_positions, calculate_portfolio_performance,  # noqa: E402
+                                  calculate_position_metrics, convert_currency)
+from src.ingestion.loader import load_data  # noqa: E402
+from src.prediction.monte_carlo import run_monte_carlo_simulation  # noqa: E402
+
+# Offline benchmarks for the hot paths of a pipeline cycle. Each case is timed
+# (best of `repeats` untraced runs) and then run once under tracemalloc for its
+# peak allocation. Results are compared with a stored JSON baseline per profile;
+# a case regresses when it is slower / larger than the baseline by more than
+# the threshold and by more than an absolute floor (so tiny timings don't flap).
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+DEFAULT_THRESHOLD = 0.25
+MIN_SECONDS_DELTA = 0.005
+MIN_BYTES_DELTA = 1 << 20
+# Timings are only gated against a baseline recorded on the same environment
+ENVIRONMENT_KEYS = ("machine", "python", "pandas", "numpy")
+
+
+@dataclass(frozen=True)
+class Profile:
+    trades: int
+    tickers: int
+    days: int = 252
+    simulations: int = 1000
+    repeats: int = 3
+
+
+PROFILES = {
+    "smoke": Profile(trades=1_000, tickers=50),
+    "small": Profile(trades=100_000, tickers=500),
+    "medium": Profile(trades=1_000_000, tickers=2_000, repeats=2),
+    "large": Profile(trades=10_000_000, tickers=5_000, repeats=1),
+}
+
+
+def measure(func: Callable[[], object], repeats: int = 3, setup: Callable[[], None] | None = None) -> dict[str, float]:
+    timings = []
+    for _ in range(repeats):
+        if setup:
+            setup()
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    if setup:
+        setup()
+    gc.collect()
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    baseline_bytes = tracemalloc.get_traced_memory()[0]
+    func()
+    peak = tracemalloc.get_traced_memory()[1] - baseline_bytes
+    if not tracing:
+        tracemalloc.stop()
+    return {"seconds": min(timings), "mean_seconds": sum(timings) / len(timings), "peak_bytes": max(0, peak)}
+
+
+@contextmanager
+def working_directory(path: Path):
+    previous = os.getcwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(previous)
+
+
+def run_profile(profile: Profile, seed: int = 0) -> dict[str, dict[str, float]]:
+    """Generates the synthetic dataset for `profile` and runs every case on it."""
+    universe = make_universe(profile.tickers, seed)
+    ledger = generate_ledger(profile.trades, universe, seed)
+    history = generate_prices(universe["ticker"].tolist(), profile.days, seed, universe["start_price"].to_numpy())
+    prices = dict(zip(history.columns, history.iloc[-1]))
+    results: dict[str, dict[str, float]] = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_ledger(ledger, Path(tmp))
+        del ledger
+        with working_directory(Path(tmp)):
+            # load_data sits behind st.cache_data; clear it so every run parses the CSVs
+            results["load_data"] = measure(load_data, profile.repeats, setup=load_data.__wrapped__.clear)
+            trades = load_data()
+
+    positions = build_positions(trades)
+    del trades
+    metadata: dict = {}
+    results["calculate_position_metrics"] = measure(
+        lambda: calculate_position_metrics(positions.copy(), prices, metadata), profile.repeats)
+    enriched = calculate_position_metrics(positions.copy(), prices, metadata)
+    results["convert_currency"] = measure(lambda: convert_currency(enriched.copy(), 0.92), profile.repeats)
+    converted = convert_currency(enriched.copy(), 0.92)
+    results["calculate_portfolio_performance"] = measure(
+        lambda: calculate_portfolio_performance(converted, history), profile.repeats)
+
+    performance = calculate_portfolio_performance(converted, history)
+    daily_returns = performance.get("daily_returns", pd.Series(dtype=float)) if performance else pd.Series(dtype=float)
+    np.random.seed(seed)
+    results["run_monte_carlo_simulation"] = measure(
+        lambda: run_monte_carlo_simulation(daily_returns, profile.simulations, profile.days), profile.repeats)
+    return results
+
+
+# ---------- baselines ----------
+
+def baseline_path(profile_name: str, directory: Path = BASELINE_DIR) -> Path:
+    return Path(directory) / f"{profile_name}.json"
+
+
+def make_report(profile_name: str, profile: Profile, results: dict[str, dict[str, float]]) -> dict[str, object]:
+    return {
+        "profile": profile_name,
+        "params": profile.__dict__,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+
+def environment_mismatch(baseline: dict[str, object], report: dict[str, object]) -> list[str]:
+    """'key: baseline -> current' for each environment field that differs."""
+    return [f"{key}: {baseline.get(key)} -> {report.get(key)}"
+            for key in ENVIRONMENT_KEYS if baseline.get(key) != report.get(key)]
+
+
+def compare(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]],
+            threshold: float = DEFAULT_THRESHOLD) -> list[dict[str, object]]:
+    """Cases (and metrics) that regressed past `threshold` relative to the baseline."""
+    regressions = []
+    floors = {"seconds": MIN_SECONDS_DELTA, "peak_bytes": MIN_BYTES_DELTA}
+    for case, current in results.items():
+        reference = baseline.get(case)
+        if not reference:
+            continue
+        for metric, floor in floors.items():
+            before, after = reference.get(metric), current.get(metric)
+            if before is None or after is None:
+                continue
+            if after > before * (1 + threshold) and after - before > floor:
+                regressions.append({"case": case, "metric": metric, "baseline": before, "current": after,
+                                    "ratio": after / before if before else float("inf")})
+    return regressions
+
+
+def format_results(results: dict[str, dict[str, float]], baseline: dict[str, dict[str, float]] | None = None) -> str:
+    lines = [f"{'case':34} {'seconds':>10} {'peak MB':>10} {'vs baseline':>12}"]
+    for case, result in results.items():
+        delta = ""
+        if baseline and baseline.get(case, {}).get("seconds"):
+            delta = f"{result['seconds'] / baseline[case]['seconds']:.2f}x"
+        lines.append(f"{case:34} {result['seconds']:10.4f} {result['peak_bytes'] / 2**20:10.1f} {delta:>12}")
+    return "\n".join(lines)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the synthetic-data benchmark suite")
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="smoke")
+    parser.add_argument("--trades", type=int, help="override the profile's trade count")
+    parser.add_argument("--tickers", type=int, help="override the profile's ticker count")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown / memory growth flagged as a regression")
+    parser.add_argument("--baseline-dir", type=Path, default=BASELINE_DIR)
+    parser.add_argument("--update-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--output", type=Path, help="also write this run's report to a JSON file")
+    args = parser.parse_args(argv)
+
+    profile = PROFILES[args.profile]
+    if args.trades or args.tickers:
+        profile = Profile(args.trades or profile.trades, args.tickers or profile.tickers,
+                          profile.days, profile.simulations, profile.repeats)
+    print(f"Profile {args.profile}: {profile.trades:,} trades, {profile.tickers:,} tickers, {profile.days} days")
+    report = make_report(args.profile, profile, run_profile(profile))
+
+    path = baseline_path(args.profile, args.baseline_dir)
+    baseline = json.loads(path.read_text(encoding="utf-8")) if path.exists() else None
+    comparable = baseline is not None and baseline.get("params") == report["params"]
+    print(format_results(report["results"], baseline["results"] if comparable else None))
+
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+    if args.update_baseline:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+        print(f"Baseline written to {path}")
+        return 0
+    if not comparable:
+        print("No comparable baseline; run with --update-baseline to record one.")
+        return 0
+
+    mismatch = environment_mismatch(baseline, report)
+    regressions = compare(report["results"], baseline["results"], args.threshold)
+    for regression in regressions:
+        print(f"{'SLOWER' if mismatch else 'REGRESSION'} {regression['case']} {regression['metric']}: "
+              f"{regression['baseline']:.4g} -> {regression['current']:.4g} ({regression['ratio']:.2f}x)")
+    if mismatch:
+        print(f"Baseline recorded on another environment ({'; '.join(mismatch)}); reporting only. "
+              "Run with --update-baseline to record one for this host.")
+        return 0
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Deterministic synthetic portfolio data for the benchmark suite: a trade ledger
+# in the broker's 'Mi cartera' CSV layout (what load_data normalizes) and a
+# daily close matrix for the same tickers. Everything is vectorized so the 10M
+# trade ledger is generated in seconds.
+
+# Exchange prefix -> trade currency, as load_data maps them
+EXCHANGES = {"NASDAQ": "USD", "NYSE": "USD", "BME": "EUR", "MIL": "EUR"}
+YF_SUFFIXES = {"NASDAQ": "", "NYSE": "", "BME": ".MC", "MIL": ".MI"}
+ROWS_PER_FILE = 1_000_000
+
+
+def make_universe(n_tickers: int, seed: int = 0) -> pd.DataFrame:
+    """Tickers spread over the exchanges: symbol (broker form), ticker (as load_data emits it), currency."""
+    rng = np.random.default_rng(seed)
+    exchanges = np.array(list(EXCHANGES))
+    chosen = rng.choice(exchanges, size=n_tickers, p=[0.45, 0.35, 0.12, 0.08])
+    bases = [f"S{i:04d}" for i in range(n_tickers)]
+    return pd.DataFrame({
+        "symbol": [f"{exchange}:{base}" for exchange, base in zip(chosen, bases)],
+        "ticker": [base + YF_SUFFIXES[exchange] for exchange, base in zip(chosen, bases)],
+        "currency": [EXCHANGES[exchange] for exchange in chosen],
+        "start_price": rng.uniform(5, 500, n_tickers).round(2),
+    })
+
+
+def generate_ledger(n_trades: int, universe: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    """
+    'Mi cartera' rows: mostly buys, ~30% sells, a few dividends. Sells never
+    exceed what was bought overall, so most positions stay open.
+    """
+    rng = np.random.default_rng(seed + 1)
+    n_tickers = len(universe)
+    # Zipf-like popularity: a few names get most of the trades
+    weights = 1.0 / np.arange(1, n_tickers + 1) ** 0.8
+    ticker_ids = rng.choice(n_tickers, size=n_trades, p=weights / weights.sum())
+    sides = rng.choice(np.array(["Buy", "Sell", "Dividend"]), size=n_trades, p=[0.67, 0.3, 0.03])
+    qty = rng.integers(1, 200, n_trades)
+    qty = np.where(sides == "Sell", np.maximum(1, qty // 3), qty)
+    prices = universe["start_price"].to_numpy()[ticker_ids] * rng.lognormal(0.0, 0.15, n_trades)
+    dates = pd.Timestamp("2020-01-01") + pd.to_timedelta(np.sort(rng.integers(0, 5 * 365 * 24 * 3600, n_trades)), unit="s")
+    return pd.DataFrame({
+        "Symbol": universe["symbol"].to_numpy()[ticker_ids],
+        "Side": sides,
+        "Qty": qty,
+        "Fill Price": prices.round(4),
+        "Closing Time": dates.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+
+
+def generate_prices(tickers: list[str], days: int = 252, seed: int = 0,
+                    start_prices: np.ndarray | None = None) -> pd.DataFrame:
+    """Geometric random-walk closes, business days as index and one column per ticker."""
+    rng = np.random.default_rng(seed + 2)
+    n = len(tickers)
+    drift = rng.normal(0.0003, 0.0004, n)
+    vol = rng.uniform(0.01, 0.03, n)
+    log_returns = drift + vol * rng.standard_normal((days, n))
+    start = start_prices if start_prices is not None else np.full(n, 100.0)
+    closes = start * np.exp(np.cumsum(log_returns, axis=0))
+    index = pd.bdate_range(end="2025-12-31", periods=days)
+    return pd.DataFrame(closes, index=index, columns=list(tickers))
+
+
+def write_ledger(ledger: pd.DataFrame, directory: Path, rows_per_file: int = ROWS_PER_FILE) -> list[Path]:
+    """Writes the ledger as one or more 'Mi cartera_<n>.csv' files (load_data concatenates them)."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for part, start in enumerate(range(0, max(len(ledger), 1), rows_per_file)):
+        path = directory / f"Mi cartera_{part:03d}.csv"
+        ledger.iloc[start:start + rows_per_file].to_csv(path, index=False)
+        paths.append(path)
+    return paths
@@ -2,18 +2,28 @@
 
 from __future__ import annotations
 
+import argparse
 import csv
+import hashlib
 import html
 import json
+import os
 import re
+import sys
 import urllib.request
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass, field
-from datetime import date
+from datetime import date, datetime, timezone
 from pathlib import Path
+from typing import Callable
 
 
 ROOT = Path(__file__).resolve().parents[1]
 OUTPUT_PATH = ROOT / "src" / "data" / "market-search-index.json"
+SNAPSHOT_DIR = ROOT / ".cache" / "market-search-snapshots"
+
+sys.path.insert(0, str(ROOT))
+from src.ingestion.market_search import COMPACT_INDEX_PATH, build_compact_index, write_compact_index  # noqa: E402
 
 NASDAQ_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/nasdaqlisted.txt"
 OTHER_LISTED_URL = "https://www.nasdaqtrader.com/dynamic/SymDir/otherlisted.txt"
@@ -117,8 +127,34 @@ def build_ticker(market: str, symbol: str) -> str:
     return f"{market}:{symbol}"
 
 
-def load_sp500_constituents() -> dict[tuple[str, str], str]:
-    html_text = fetch_text(SP500_URL)
+# Parsers turn one source's raw text into [market, symbol, name, tag] rows.
+
+
+def parse_nasdaq_listed(raw_text: str) -> list[list[str]]:
+    rows = []
+    for row in parse_pipe_text(raw_text):
+        symbol = normalize_symbol(row.get("Symbol", ""))
+        name = clean_name(row.get("Security Name", ""))
+        if not symbol or symbol.startswith("FILE CREATION TIME"):
+            continue
+        rows.append(["NASDAQ", symbol, name, "NASDAQ"])
+    return rows
+
+
+def parse_other_listed(raw_text: str) -> list[list[str]]:
+    rows = []
+    for row in parse_pipe_text(raw_text):
+        if row.get("Exchange", "").upper() != "N":
+            continue
+        symbol = normalize_symbol(row.get("ACT Symbol", ""))
+        name = clean_name(row.get("Security Name", ""))
+        if not symbol:
+            continue
+        rows.append(["NYSE", symbol, name, "NYSE"])
+    return rows
+
+
+def parse_sp500(html_text: str) -> list[list[str]]:
     match = re.search(r'<table[^>]*id="constituents"[^>]*>(.*?)</table>', html_text, flags=re.S | re.I)
     if not match:
         raise RuntimeError("S&P 500 constituents table not found")
@@ -137,23 +173,38 @@ def load_sp500_constituents() -> dict[tuple[str, str], str]:
         if "XNAS:" in first_cell or "NASDAQ" in first_cell:
             market = "NASDAQ"
         members[(market, symbol)] = name
-    return members
+    return [[market, symbol, name, "SP500"] for (market, symbol), name in members.items()]
 
 
-def load_ibex35_constituents() -> list[tuple[str, str]]:
-    html_text = fetch_text(IBEX35_URL)
+def parse_ibex35(html_text: str) -> list[list[str]]:
     table_html = find_table_after(html_text, '<h2 id="Components">')
-    members: list[tuple[str, str]] = []
+    members: list[list[str]] = []
     for row in iter_table_rows(table_html):
         if len(row) < 2:
             continue
         symbol = normalize_symbol(row[0])
         if not symbol.endswith(".MC"):
             continue
-        members.append((symbol[:-3], clean_name(row[1])))
+        members.append(["BME", symbol[:-3], clean_name(row[1]), "IBEX35"])
     return members
 
 
+@dataclass(frozen=True)
+class Source:
+    name: str
+    url: str
+    parser: Callable[[str], list[list[str]]]
+
+
+# Order matters: register_entry keeps the first market/name it sees.
+SOURCES = [
+    Source("nasdaq-listed", NASDAQ_LISTED_URL, parse_nasdaq_listed),
+    Source("other-listed", OTHER_LISTED_URL, parse_other_listed),
+    Source("sp500", SP500_URL, parse_sp500),
+    Source("ibex35", IBEX35_URL, parse_ibex35),
+]
+
+
 def register_entry(
     entries: dict[tuple[str, str], SearchEntry],
     *,
@@ -182,57 +233,228 @@ def register_entry(
     return entry
 
 
-def build_index() -> dict[str, object]:
+# ==========================
+# SNAPSHOTS
+# ==========================
+# Every source's raw text is stored under the snapshot dir with its sha256, and
+# its parsed rows are cached per (content hash, parser version). A source whose
+# content and parsers are unchanged is not re-parsed; with --offline nothing is
+# fetched at all. Parsed files no longer referenced are pruned after each build.
+
+
+def sha256_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# Any edit to this script (clean_name, parse_sp500, ...) invalidates the parsed rows
+PARSER_VERSION = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()[:12]
+
+
+class SnapshotStore:
+    def __init__(self, root: Path, parser_version: str = PARSER_VERSION):
+        self.root = Path(root)
+        self.parser_version = parser_version
+        self.manifest_path = self.root / "manifest.json"
+        self.manifest: dict[str, dict[str, str]] = {}
+        if self.manifest_path.exists():
+            self.manifest = json.loads(self.manifest_path.read_text(encoding="utf-8"))
+
+    def raw_path(self, source: Source) -> Path:
+        return self.root / f"{source.name}.txt"
+
+    def parsed_path(self, source: Source, digest: str) -> Path:
+        return self.root / "parsed" / f"{source.name}-{digest[:16]}-{self.parser_version}.json"
+
+    def digest(self, source: Source) -> str | None:
+        return self.manifest.get(source.name, {}).get("sha256")
+
+    def read_raw(self, source: Source) -> str:
+        return self.raw_path(source).read_text(encoding="utf-8")
+
+    def store_raw(self, source: Source, text: str) -> str:
+        digest = sha256_text(text)
+        if digest != self.digest(source):
+            self.raw_path(source).parent.mkdir(parents=True, exist_ok=True)
+            self.raw_path(source).write_text(text, encoding="utf-8")
+            self.manifest[source.name] = {
+                "url": source.url,
+                "sha256": digest,
+                "fetchedAt": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+        return digest
+
+    def load_parsed(self, source: Source, digest: str) -> list[list[str]] | None:
+        path = self.parsed_path(source, digest)
+        if not path.exists():
+            return None
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def store_parsed(self, source: Source, digest: str, rows: list[list[str]]) -> None:
+        path = self.parsed_path(source, digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(rows, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+
+    def prune_parsed(self, keep: set[Path]) -> None:
+        """Deletes parsed rows of older snapshots or parser versions."""
+        for path in (self.root / "parsed").glob("*.json"):
+            if path not in keep:
+                path.unlink()
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.manifest, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        os.replace(tmp_path, self.manifest_path)
+
+
+def load_sources(store: SnapshotStore, *, offline: bool = False, workers: int = 4) -> dict[str, list[list[str]]]:
+    """Parsed rows per source: fetched (unless offline) and parsed concurrently, cached by content hash and parser version."""
+    if offline:
+        missing = [source.name for source in SOURCES if store.digest(source) is None]
+        if missing:
+            raise RuntimeError(f"No stored snapshot for: {', '.join(missing)}")
+        digests = {source.name: store.digest(source) for source in SOURCES}
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            texts = list(pool.map(lambda source: fetch_text(source.url), SOURCES))
+        digests = {source.name: store.store_raw(source, text) for source, text in zip(SOURCES, texts)}
+
+    parsed: dict[str, list[list[str]]] = {}
+    to_parse = []
+    for source in SOURCES:
+        rows = store.load_parsed(source, digests[source.name])
+        if rows is None:
+            to_parse.append(source)
+        else:
+            parsed[source.name] = rows
+    if to_parse:
+        print(f"Parsing changed sources: {', '.join(source.name for source in to_parse)}")
+        raw_texts = [store.read_raw(source) for source in to_parse]
+        with ProcessPoolExecutor(max_workers=min(workers, len(to_parse))) as pool:
+            results = list(pool.map(_parse_source, [source.name for source in to_parse], raw_texts))
+        for source, rows in zip(to_parse, results):
+            store.store_parsed(source, digests[source.name], rows)
+            parsed[source.name] = rows
+    store.prune_parsed({store.parsed_path(source, digests[source.name]) for source in SOURCES})
+    store.save()
+    return parsed
+
+
+def _parse_source(source_name: str, raw_text: str) -> list[list[str]]:
+    source = next(source for source in SOURCES if source.name == source_name)
+    return source.parser(raw_text)
+
+
+# ==========================
+# BUILD & DIFF
+# ==========================
+
+
+def build_entries(parsed: dict[str, list[list[str]]]) -> list[dict[str, object]]:
     entries: dict[tuple[str, str], SearchEntry] = {}
+    for source in SOURCES:
+        for market, symbol, name, tag in parsed[source.name]:
+            register_entry(entries, market=market, symbol=symbol, name=name, tag=tag)
+    return [
+        entry.to_json()
+        for entry in sorted(entries.values(), key=lambda item: (item.market, item.symbol))
+    ]
 
-    for row in parse_pipe_text(fetch_text(NASDAQ_LISTED_URL)):
-        symbol = normalize_symbol(row.get("Symbol", ""))
-        name = clean_name(row.get("Security Name", ""))
-        if not symbol or symbol.startswith("FILE CREATION TIME"):
-            continue
-        register_entry(entries, market="NASDAQ", symbol=symbol, name=name, tag="NASDAQ")
 
-    for row in parse_pipe_text(fetch_text(OTHER_LISTED_URL)):
-        if row.get("Exchange", "").upper() != "N":
-            continue
-        symbol = normalize_symbol(row.get("ACT Symbol", ""))
-        name = clean_name(row.get("Security Name", ""))
-        if not symbol:
-            continue
-        register_entry(entries, market="NYSE", symbol=symbol, name=name, tag="NYSE")
+def diff_entries(previous: list[dict[str, object]], current: list[dict[str, object]]) -> dict[str, list]:
+    """Entries added / removed / renamed / otherwise changed (tags), keyed by ticker."""
+    before = {entry["ticker"]: entry for entry in previous}
+    after = {entry["ticker"]: entry for entry in current}
+    renamed, changed = [], []
+    for ticker in sorted(before.keys() & after.keys()):
+        if before[ticker]["name"] != after[ticker]["name"]:
+            renamed.append({"ticker": ticker, "from": before[ticker]["name"], "to": after[ticker]["name"]})
+        if before[ticker] != after[ticker]:
+            changed.append(after[ticker])
+    return {
+        "added": [after[ticker] for ticker in sorted(after.keys() - before.keys())],
+        "removed": sorted(before.keys() - after.keys()),
+        "renamed": renamed,
+        "changed": changed,
+    }
 
-    for (market, symbol), sp_name in load_sp500_constituents().items():
-        register_entry(entries, market=market, symbol=symbol, name=sp_name, tag="SP500")
 
-    for symbol, name in load_ibex35_constituents():
-        register_entry(entries, market="BME", symbol=symbol, name=name, tag="IBEX35")
+def apply_diff(previous: list[dict[str, object]], diff: dict[str, list]) -> list[dict[str, object]]:
+    by_ticker = {entry["ticker"]: entry for entry in previous}
+    for ticker in diff["removed"]:
+        del by_ticker[ticker]
+    for entry in diff["added"] + diff["changed"]:
+        by_ticker[entry["ticker"]] = entry
+    return sorted(by_ticker.values(), key=lambda item: (item["market"], item["symbol"]))
 
-    serialized_entries = [
-        entry.to_json()
-        for entry in sorted(entries.values(), key=lambda item: (item.market, item.symbol))
-    ]
 
+def build_index(
+    store: SnapshotStore,
+    previous: dict[str, object] | None = None,
+    *,
+    offline: bool = False,
+) -> tuple[dict[str, object], dict[str, list]]:
+    """Returns the updated index payload and the diff against `previous`."""
+    current = build_entries(load_sources(store, offline=offline))
+    previous_entries = list((previous or {}).get("entries", []))
+    diff = diff_entries(previous_entries, current)
+    if previous and not any(diff.values()):
+        return previous, diff
+
+    entries = apply_diff(previous_entries, diff)
     return {
         "generatedAt": date.today().isoformat(),
-        "sources": [
-            NASDAQ_LISTED_URL,
-            OTHER_LISTED_URL,
-            SP500_URL,
-            IBEX35_URL,
-        ],
-        "entryCount": len(serialized_entries),
-        "entries": serialized_entries,
-    }
+        "sources": [source.url for source in SOURCES],
+        "entryCount": len(entries),
+        "entries": entries,
+    }, diff
+
+
+def write_compact(index_payload: dict[str, object], compact_path: Path = COMPACT_INDEX_PATH) -> None:
+    compact_payload = build_compact_index(index_payload["entries"], index_payload["generatedAt"])
+    write_compact_index(compact_payload, compact_path)
+    print(f"Wrote compact index ({compact_path.stat().st_size:,} bytes) to {compact_path}")
 
 
-def main() -> None:
-    index_payload = build_index()
-    OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    OUTPUT_PATH.write_text(
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Build the market search index")
+    parser.add_argument(
+        "--compact-only",
+        action="store_true",
+        help="rebuild only the compact index from the existing full index (no network)",
+    )
+    parser.add_argument("--offline", action="store_true", help="rebuild from stored source snapshots only")
+    parser.add_argument("--snapshot-dir", type=Path, default=SNAPSHOT_DIR)
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH)
+    parser.add_argument("--compact-output", type=Path, default=COMPACT_INDEX_PATH)
+    args = parser.parse_args(argv)
+
+    previous = None
+    if args.output.exists():
+        previous = json.loads(args.output.read_text(encoding="utf-8"))
+
+    if args.compact_only:
+        if previous is None:
+            raise SystemExit(f"{args.output} does not exist")
+        write_compact(previous, args.compact_output)
+        return
+
+    index_payload, diff = build_index(SnapshotStore(args.snapshot_dir), previous, offline=args.offline)
+    print(
+        f"Diff: +{len(diff['added'])} added, -{len(diff['removed'])} removed, "
+        f"{len(diff['renamed'])} renamed, {len(diff['changed'])} changed"
+    )
+    if index_payload is previous:
+        print(f"No changes; {args.output} left untouched")
+        return
+
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(
         json.dumps(index_payload, ensure_ascii=False, indent=2) + "\n",
         encoding="utf-8",
     )
-    print(f"Wrote {index_payload['entryCount']} entries to {OUTPUT_PATH}")
+    print(f"Wrote {index_payload['entryCount']} entries to {args.output}")
+    write_compact(index_payload, args.compact_output)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,203 @@
+import argparse
+import csv
+import random
+import time
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+# Streaming breakout detection.
+# Each symbol keeps O(window) state: monotonic deques for the rolling high/low
+# and ring buffers (array('d')) with running sums for the moving averages and
+# average volume, so every bar is processed in O(1) amortized time.
+
+
+@dataclass(frozen=True)
+class Alert:
+    symbol: str
+    kind: str  # breakout_high | breakout_low | volume_spike | golden_cross | death_cross
+    timestamp: object
+    price: float
+    reference: float  # level that was crossed (prior high/low, average volume, slow MA)
+
+
+class _SymbolState:
+    __slots__ = ("n", "last_ts", "highs", "lows", "closes", "fast_sum", "slow_sum",
+                 "volumes", "vol_sum", "ma_sign", "last_alert")
+
+    def __init__(self, slow: int, volume_window: int):
+        self.n = 0
+        self.last_ts = None
+        self.highs = deque()  # (bar index, high), decreasing highs
+        self.lows = deque()   # (bar index, low), increasing lows
+        self.closes = array('d', bytes(8 * slow))
+        self.fast_sum = 0.0
+        self.slow_sum = 0.0
+        self.volumes = array('d', bytes(8 * volume_window))
+        self.vol_sum = 0.0
+        self.ma_sign = 0
+        self.last_alert: Dict[str, int] = {}
+
+
+class BreakoutEngine:
+    """
+    Maintains rolling N-bar highs/lows, volume spikes and fast/slow moving-average
+    crosses for any number of symbols.
+
+    Alerts are deduplicated: a bar whose timestamp is not newer than the symbol's
+    previous bar is ignored, and the same alert kind is not repeated for a symbol
+    within `cooldown` bars.
+    """
+
+    def __init__(self, window: int = 20, volume_window: int = 20, volume_multiple: float = 2.0,
+                 fast_ma: int = 10, slow_ma: int = 50, cooldown: int = 5):
+        if fast_ma >= slow_ma:
+            raise ValueError("fast_ma must be shorter than slow_ma")
+        self.window = window
+        self.volume_window = volume_window
+        self.volume_multiple = volume_multiple
+        self.fast_ma = fast_ma
+        self.slow_ma = slow_ma
+        self.cooldown = cooldown
+        self.states: Dict[str, _SymbolState] = {}
+
+    def update(self, symbol: str, timestamp, high: float, low: float, close: float,
+               volume: float = 0.0) -> List[Alert]:
+        state = self.states.get(symbol)
+        if state is None:
+            state = self.states[symbol] = _SymbolState(self.slow_ma, self.volume_window)
+        elif timestamp <= state.last_ts:
+            return []
+        state.last_ts = timestamp
+        n = state.n
+        alerts: List[Alert] = []
+
+        # Rolling high/low over the previous `window` bars
+        highs, lows = state.highs, state.lows
+        oldest = n - self.window
+        while highs and highs[0][0] < oldest:
+            highs.popleft()
+        while lows and lows[0][0] < oldest:
+            lows.popleft()
+        if n >= self.window:
+            if close > highs[0][1]:
+                self._emit(state, alerts, Alert(symbol, "breakout_high", timestamp, close, highs[0][1]))
+            elif close < lows[0][1]:
+                self._emit(state, alerts, Alert(symbol, "breakout_low", timestamp, close, lows[0][1]))
+        while highs and highs[-1][1] <= high:
+            highs.pop()
+        highs.append((n, high))
+        while lows and lows[-1][1] >= low:
+            lows.pop()
+        lows.append((n, low))
+
+        # Volume spike against the average of the previous `volume_window` bars
+        slot = n % self.volume_window
+        if n >= self.volume_window:
+            avg_volume = state.vol_sum / self.volume_window
+            if avg_volume > 0 and volume > self.volume_multiple * avg_volume:
+                self._emit(state, alerts, Alert(symbol, "volume_spike", timestamp, close, avg_volume))
+        state.vol_sum += volume - state.volumes[slot]
+        state.volumes[slot] = volume
+
+        # Moving-average cross; the ring holds the last `slow_ma` closes
+        closes = state.closes
+        slot = n % self.slow_ma
+        leaving_fast = closes[(n - self.fast_ma) % self.slow_ma] if n >= self.fast_ma else 0.0
+        state.slow_sum += close - closes[slot]
+        state.fast_sum += close - leaving_fast
+        closes[slot] = close
+        if n + 1 >= self.slow_ma:
+            fast = state.fast_sum / self.fast_ma
+            slow = state.slow_sum / self.slow_ma
+            sign = (fast > slow) - (fast < slow)
+            if sign and state.ma_sign and sign != state.ma_sign:
+                kind = "golden_cross" if sign > 0 else "death_cross"
+                self._emit(state, alerts, Alert(symbol, kind, timestamp, close, slow))
+            if sign:
+                state.ma_sign = sign
+
+        state.n = n + 1
+        return alerts
+
+    def _emit(self, state: _SymbolState, alerts: List[Alert], alert: Alert) -> None:
+        last = state.last_alert.get(alert.kind)
+        if last is not None and state.n - last <= self.cooldown:
+            return
+        state.last_alert[alert.kind] = state.n
+        alerts.append(alert)
+
+    def process(self, bars: Iterable[dict]) -> List[Alert]:
+        """Feeds an iterable of bar dicts (symbol, timestamp, high, low, close, volume)."""
+        alerts: List[Alert] = []
+        update = self.update
+        for bar in bars:
+            alerts.extend(update(bar["symbol"], bar["timestamp"], bar["high"], bar["low"],
+                                 bar["close"], bar.get("volume", 0.0)))
+        return alerts
+
+
+@dataclass
+class ReplayStats:
+    bars: int
+    alerts: int
+    seconds: float
+
+    @property
+    def bars_per_second(self) -> float:
+        return self.bars / self.seconds if self.seconds else float("inf")
+
+
+def read_bar_file(path: str) -> List[tuple]:
+    """Loads a CSV bar file (symbol,timestamp,high,low,close,volume) into memory."""
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        return [(row["symbol"], row["timestamp"], float(row["high"]), float(row["low"]),
+                 float(row["close"]), float(row.get("volume") or 0.0)) for row in reader]
+
+
+def replay(path: str, engine: Optional[BreakoutEngine] = None) -> ReplayStats:
+    """Replays a recorded bar file through the engine; parsing is excluded from the timing."""
+    engine = engine or BreakoutEngine()
+    bars = read_bar_file(path)
+    update = engine.update
+    alert_count = 0
+    start = time.perf_counter()
+    for bar in bars:
+        alert_count += len(update(*bar))
+    return ReplayStats(len(bars), alert_count, time.perf_counter() - start)
+
+
+def write_synthetic_bars(path: str, symbols: int, bars: int, seed: int = 7) -> None:
+    """Random-walk bars, interleaved by timestamp as a live feed would deliver them."""
+    rng = random.Random(seed)
+    prices = [rng.uniform(10, 500) for _ in range(symbols)]
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["symbol", "timestamp", "high", "low", "close", "volume"])
+        for t in range(bars):
+            timestamp = f"T{t:08d}"
+            for i in range(symbols):
+                close = prices[i] = max(0.01, prices[i] * (1 + rng.gauss(0, 0.02)))
+                spread = close * abs(rng.gauss(0, 0.01))
+                volume = rng.lognormvariate(10, 0.5)
+                writer.writerow([f"SYM{i}", timestamp, f"{close + spread:.4f}", f"{close - spread:.4f}",
+                                 f"{close:.4f}", f"{volume:.0f}"])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a bar file through the breakout engine")
+    parser.add_argument("path", help="CSV with symbol,timestamp,high,low,close,volume")
+    parser.add_argument("--synthetic", nargs=2, type=int, metavar=("SYMBOLS", "BARS"),
+                        help="write a synthetic bar file to PATH before replaying it")
+    args = parser.parse_args()
+    if args.synthetic:
+        write_synthetic_bars(args.path, *args.synthetic)
+    stats = replay(args.path)
+    print(f"{stats.bars} bars, {stats.alerts} alerts in {stats.seconds:.3f}s "
+          f"({stats.bars_per_second:,.0f} bars/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+import hashlib
+import html
+import re
+import sqlite3
+import unicodedata
+from dataclasses import dataclass
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from src.ingestion.symbol_resolver import SymbolResolver, get_resolver
+
+# Insider (PDMR) transactions from the daily CNMV report (insiders_latest.md / .html).
+# Rows are stored in SQLite keyed by a content hash, so re-running on the same or
+# an overlapping report only processes rows that were never seen before. Alerts
+# are computed for those new rows only, via an issuer -> held symbols index.
+
+KIND_MAP = {"COMPRA": "BUY", "VENTA": "SELL"}
+
+# CNMV issuer names (normalized) -> BME symbol, for issuers whose legal name
+# doesn't match the short name used in the market search index.
+ISSUER_ALIASES = {
+    "BANCO BILBAO VIZCAYA ARGENTARIA": "BBVA",
+    "BANCO SANTANDER": "SAN",
+    "BANCO DE SABADELL": "SAB",
+    "BANKINTER": "BKT",
+    "CAIXABANK": "CABK",
+    "UNICAJA BANCO": "UNI",
+    "IBERDROLA": "IBE",
+    "ENDESA": "ELE",
+    "NATURGY ENERGY GROUP": "NTGY",
+    "REDEIA CORPORACION": "RED",
+    "ENAGAS": "ENG",
+    "REPSOL": "REP",
+    "TELEFONICA": "TEF",
+    "INDUSTRIA DE DISENO TEXTIL": "ITX",
+    "ACCIONA": "ANA",
+    "ACCIONA ENERGIAS RENOVABLES": "ANE",
+    "ACS ACTIVIDADES DE CONSTRUCCION Y SERVICIOS": "ACS",
+    "FERROVIAL": "FER",
+    "SACYR": "SCYR",
+    "AENA": "AENA",
+    "AMADEUS IT GROUP": "AMS",
+    "INTERNATIONAL CONSOLIDATED AIRLINES GROUP": "IAG",
+    "GRIFOLS": "GRF",
+    "LABORATORIOS FARMACEUTICOS ROVI": "ROVI",
+    "CIE AUTOMOTIVE": "CIE",
+    "ACERINOX": "ACX",
+    "ARCELORMITTAL": "MTS",
+    "CELLNEX TELECOM": "CLNX",
+    "INDRA SISTEMAS": "IDR",
+    "MAPFRE": "MAP",
+    "MERLIN PROPERTIES SOCIMI": "MRL",
+    "SOLARIA ENERGIA Y MEDIO AMBIENTE": "SLR",
+    "FLUIDRA": "FDR",
+    "PUIG BRANDS": "PUIG",
+    "COMPANIA DE DISTRIBUCION INTEGRAL LOGISTA HOLDINGS": "LOG",
+    "NICOLAS CORREA": "NEA",
+    "LINGOTES ESPECIALES": "LGT",
+}
+
+_LEGAL_FORMS = re.compile(r"\b(S ?A ?DE ?C ?V|S ?A ?U|S ?A|S ?L ?U|S ?L|SOCIEDAD ANONIMA|SOCIMI S ?A)\s*$")
+
+
+@dataclass(frozen=True)
+class InsiderTransaction:
+    date: date
+    kind: str  # BUY | SELL | OTHER
+    issuer: str
+    insider: str
+    amount: float
+    currency: str
+    shares: Optional[float] = None
+    price: Optional[float] = None
+
+    @property
+    def issuer_key(self) -> str:
+        return normalize_issuer(self.issuer)
+
+    @property
+    def content_hash(self) -> str:
+        canonical = "|".join([self.date.isoformat(), self.kind, self.issuer_key,
+                              " ".join(self.insider.upper().split()), f"{self.amount:.2f}", self.currency])
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class InsiderAlert:
+    symbol: str
+    transaction: InsiderTransaction
+    buys_90d: int
+
+
+@dataclass(frozen=True)
+class InsiderReport:
+    run_id: Optional[int]
+    started_at: Optional[str]
+    stats: Dict[str, int]
+    transactions: List[InsiderTransaction]
+
+
+def normalize_issuer(name: str) -> str:
+    """Upper-case, accent-free issuer name without punctuation or trailing legal form."""
+    text = unicodedata.normalize("NFKD", name or "").encode("ascii", "ignore").decode().upper()
+    text = " ".join(re.sub(r"[^A-Z0-9 ]", " ", text).split())
+    previous = None
+    while previous != text:
+        previous = text
+        text = _LEGAL_FORMS.sub("", text).strip()
+    return text
+
+
+def parse_spanish_number(value: str) -> Tuple[Optional[float], str]:
+    """'187.500,00 EUR' -> (187500.0, 'EUR'); '10.000' -> (10000.0, '')."""
+    parts = (value or "").strip().split()
+    if not parts:
+        return None, ""
+    currency = parts[1].upper() if len(parts) > 1 else ""
+    try:
+        return float(parts[0].replace(".", "").replace(",", ".")), currency
+    except ValueError:
+        return None, currency
+
+
+# ==========================
+# REPORT PARSING
+# ==========================
+
+def _markdown_tables(text: str) -> Dict[str, List[Dict[str, str]]]:
+    tables: Dict[str, List[Dict[str, str]]] = {}
+    section, header = None, None
+    for line in text.splitlines():
+        line = line.strip()
+        if line.startswith("## "):
+            section, header = line[3:].strip(), None
+        elif line.startswith("|") and section:
+            cells = [cell.strip() for cell in line.strip("|").split("|")]
+            if header is None:
+                header = cells
+            elif all(set(cell) <= set("-: ") for cell in cells):
+                continue
+            else:
+                tables.setdefault(section, []).append(dict(zip(header, cells)))
+        else:
+            header = None
+    return tables
+
+
+def _html_tables(text: str) -> Dict[str, List[Dict[str, str]]]:
+    def cell_text(cell: str) -> str:
+        return " ".join(html.unescape(re.sub(r"<[^>]+>", "", cell)).split())
+
+    tables: Dict[str, List[Dict[str, str]]] = {}
+    for title, table in re.findall(r"<h2>(.*?)</h2>\s*<table>(.*?)</table>", text, flags=re.S | re.I):
+        header = [cell_text(c) for c in re.findall(r"<th[^>]*>(.*?)</th>", table, flags=re.S | re.I)]
+        rows = []
+        for row in re.findall(r"<tbody>.*?</tbody>", table, flags=re.S | re.I):
+            for tr in re.findall(r"<tr[^>]*>(.*?)</tr>", row, flags=re.S | re.I):
+                cells = [cell_text(c) for c in re.findall(r"<td[^>]*>(.*?)</td>", tr, flags=re.S | re.I)]
+                rows.append(dict(zip(header, cells)))
+        tables[cell_text(title)] = rows
+    return tables
+
+
+def parse_report(text: str) -> InsiderReport:
+    """Parses the CNMV insiders report in its Markdown or HTML rendering."""
+    is_html = text.lstrip().lower().startswith(("<!doctype", "<html"))
+    tables = _html_tables(text) if is_html else _markdown_tables(text)
+
+    meta = re.search(r"run_id=(\d+)\s*\|\s*started_at=(\S+)(.*)", html.unescape(re.sub(r"<[^>]+>", "", text)))
+    run_id, started_at, stats = None, None, {}
+    if meta:
+        run_id, started_at = int(meta.group(1)), meta.group(2)
+        stats = {k: int(v) for k, v in re.findall(r"(\w+)=(\d+)", meta.group(3))}
+
+    # Shares and price only appear in the top buys/sells tables
+    details: Dict[Tuple[str, str, str, str], Tuple[Optional[float], Optional[float]]] = {}
+    for section in ("Top Compras", "Top Ventas"):
+        for row in tables.get(section, []):
+            key = (row.get("Fecha", ""), normalize_issuer(row.get("Empresa", "")),
+                   row.get("Directivo", "").upper(), row.get("Importe", ""))
+            details[key] = (parse_spanish_number(row.get("Títulos", ""))[0],
+                            parse_spanish_number(row.get("Precio", ""))[0])
+
+    transactions = []
+    for row in tables.get("Últimos Movimientos", []):
+        amount, currency = parse_spanish_number(row.get("Importe", ""))
+        try:
+            tx_date = date.fromisoformat(row.get("Fecha", ""))
+        except ValueError:
+            continue
+        shares, price = details.get((row.get("Fecha", ""), normalize_issuer(row.get("Empresa", "")),
+                                     row.get("Directivo", "").upper(), row.get("Importe", "")), (None, None))
+        transactions.append(InsiderTransaction(
+            date=tx_date,
+            kind=KIND_MAP.get(row.get("Tipo", "").upper(), "OTHER"),
+            issuer=row.get("Empresa", ""),
+            insider=row.get("Directivo", ""),
+            amount=amount or 0.0,
+            currency=currency,
+            shares=shares,
+            price=price,
+        ))
+    return InsiderReport(run_id, started_at, stats, transactions)
+
+
+# ==========================
+# STORE
+# ==========================
+
+class InsiderStore:
+    """SQLite store of insider transactions, deduplicated by content hash."""
+
+    def __init__(self, path: str = ":memory:"):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS transactions (
+                hash TEXT PRIMARY KEY,
+                date TEXT NOT NULL,
+                kind TEXT NOT NULL,
+                issuer TEXT NOT NULL,
+                issuer_key TEXT NOT NULL,
+                insider TEXT NOT NULL,
+                shares REAL,
+                price REAL,
+                amount REAL NOT NULL,
+                currency TEXT NOT NULL,
+                run_id INTEGER
+            );
+            CREATE INDEX IF NOT EXISTS idx_transactions_issuer ON transactions (issuer_key, kind, date);
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id INTEGER PRIMARY KEY,
+                started_at TEXT,
+                rows_seen INTEGER,
+                rows_inserted INTEGER
+            );
+        """)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def has_run(self, run_id: Optional[int]) -> bool:
+        if run_id is None:
+            return False
+        return self.conn.execute("SELECT 1 FROM runs WHERE run_id = ?", (run_id,)).fetchone() is not None
+
+    def ingest(self, report: InsiderReport) -> List[InsiderTransaction]:
+        """Stores the report's rows and returns only the transactions not seen before."""
+        if self.has_run(report.run_id):
+            return []
+        new = []
+        with self.conn:
+            for tx in report.transactions:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (tx.content_hash, tx.date.isoformat(), tx.kind, tx.issuer, tx.issuer_key, tx.insider,
+                     tx.shares, tx.price, tx.amount, tx.currency, report.run_id),
+                )
+                if cursor.rowcount:
+                    new.append(tx)
+            if report.run_id is not None:
+                self.conn.execute("INSERT INTO runs VALUES (?, ?, ?, ?)",
+                                  (report.run_id, report.started_at, len(report.transactions), len(new)))
+        return new
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+
+    def buys_since(self, issuer_key: str, since: date) -> int:
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM transactions WHERE issuer_key = ? AND kind = 'BUY' AND date >= ?",
+            (issuer_key, since.isoformat()),
+        ).fetchone()[0]
+
+
+# ==========================
+# ALERTS
+# ==========================
+
+def base_symbol(symbol: str) -> str:
+    """'BME:SAN' / 'SAN.MC' -> 'SAN'."""
+    return str(symbol).split(":")[-1].split(".")[0].upper()
+
+
+def build_issuer_index(positions: pd.DataFrame, aliases: Optional[Dict[str, str]] = None,
+                       resolver: Optional[SymbolResolver] = None) -> Dict[str, List[str]]:
+    """
+    Maps normalized issuer name -> open position symbols, via aliases and the position names.
+    Broker codes (OZTA for Grifols) are matched through the offline symbol resolver.
+    """
+    aliases = ISSUER_ALIASES if aliases is None else aliases
+    if positions is None or positions.empty:
+        return {}
+    resolver = resolver or get_resolver()
+    held = positions[positions["is_open"]] if "is_open" in positions.columns else positions
+    currencies = held["Currency"] if "Currency" in held.columns else [None] * len(held)
+    by_base: Dict[str, List[str]] = {}
+    for symbol, currency in zip(held["symbol"].astype(str), currencies):
+        bases = {base_symbol(symbol)}
+        ticker = resolver.lookup(symbol, currency if isinstance(currency, str) else None)
+        if ticker:
+            bases.add(base_symbol(ticker))
+        for base in bases:
+            by_base.setdefault(base, []).append(symbol)
+
+    index: Dict[str, List[str]] = {}
+    for issuer, alias_symbol in aliases.items():
+        if alias_symbol in by_base:
+            index.setdefault(normalize_issuer(issuer), []).extend(by_base[alias_symbol])
+    if "name" in held.columns:
+        for symbol, name in zip(held["symbol"].astype(str), held["name"].astype(str)):
+            key = normalize_issuer(name)
+            if key and symbol not in index.get(key, []):
+                index.setdefault(key, []).append(symbol)
+    return index
+
+
+def insider_buying_alerts(new_transactions: Iterable[InsiderTransaction], issuer_index: Dict[str, List[str]],
+                          store: InsiderStore, lookback_days: int = 90) -> List[InsiderAlert]:
+    """'Insider buying in a held name' alerts for newly ingested transactions."""
+    alerts = []
+    for tx in new_transactions:
+        if tx.kind != "BUY":
+            continue
+        symbols = issuer_index.get(tx.issuer_key)
+        if not symbols:
+            continue
+        buys = store.buys_since(tx.issuer_key, tx.date - timedelta(days=lookback_days))
+        alerts.extend(InsiderAlert(symbol, tx, buys) for symbol in symbols)
+    return alerts
+
+
+def process_report(path: str, store: InsiderStore, positions: pd.DataFrame,
+                   aliases: Optional[Dict[str, str]] = None,
+                   resolver: Optional[SymbolResolver] = None) -> List[InsiderAlert]:
+    """Parses a report file, ingests its new rows and returns the alerts for held names."""
+    report = parse_report(Path(path).read_text(encoding="utf-8"))
+    new = store.ingest(report)
+    if not new:
+        return []
+    return insider_buying_alerts(new, build_issuer_index(positions, aliases, resolver), store)
@@ -0,0 +1,263 @@
+import argparse
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.metrics import calculate_advanced_metrics
+from src.instrumentation.profiler import timed
+
+# Vectorized backtests over the date x ticker close matrix.
+# A rule maps the whole matrix plus one parameter set to a target exposure
+# matrix in [-1, 1], computed for every ticker at once. The engine holds the
+# exposure decided at close t over (t, t+1], charges costs + slippage on every
+# change of exposure and equal-weights the tickers that have a price. Parameter
+# sets are evaluated in chunks stacked along a third axis. Rolling statistics
+# are cached per window inside a chunk, and chunks are spread over a process
+# pool. Chunks are sized so their P x T x N arrays stay within a memory budget.
+
+CHUNK_MEMORY_BYTES = 512 << 20
+# Float arrays of T x N per parameter set alive at once in _simulate
+ARRAYS_PER_SET = 5
+
+
+@dataclass(frozen=True)
+class BacktestConfig:
+    cost_bps: float = 5.0        # commission per unit of turnover
+    slippage_bps: float = 5.0    # spread / impact per unit of turnover
+    rebalance_every: int = 1     # only change exposure every N bars
+    allow_short: bool = False
+
+
+class _RollingCache:
+    """Rolling means/max/min of one price matrix, computed once per window."""
+
+    def __init__(self, prices: np.ndarray):
+        self.prices = prices
+        self.frame = pd.DataFrame(prices)
+        self._cache: Dict[Tuple[str, int], np.ndarray] = {}
+
+    def get(self, kind: str, window: int) -> np.ndarray:
+        key = (kind, window)
+        if key not in self._cache:
+            rolling = self.frame.rolling(window, min_periods=window)
+            self._cache[key] = getattr(rolling, kind)().to_numpy()
+        return self._cache[key]
+
+
+# ==========================
+# RULES
+# ==========================
+# Each rule returns the target exposure (T x N); NaN = no opinion yet (flat).
+
+def sma_crossover(cache: _RollingCache, fast: int, slow: int) -> np.ndarray:
+    """Long while the fast moving average is above the slow one (short below, if allowed)."""
+    fast_ma, slow_ma = cache.get("mean", fast), cache.get("mean", slow)
+    with np.errstate(invalid="ignore"):
+        return np.where(np.isnan(slow_ma), np.nan, np.sign(fast_ma - slow_ma))
+
+
+def momentum(cache: _RollingCache, lookback: int, threshold: float = 0.0) -> np.ndarray:
+    """Long when the trailing `lookback`-bar return exceeds `threshold`, short below -threshold."""
+    prices = cache.prices
+    past = np.full_like(prices, np.nan)
+    past[lookback:] = prices[:-lookback]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        trailing = prices / past - 1.0
+        return np.where(np.isnan(trailing), np.nan,
+                        np.where(trailing > threshold, 1.0, np.where(trailing < -threshold, -1.0, 0.0)))
+
+
+def breakout(cache: _RollingCache, window: int) -> np.ndarray:
+    """Enters long above the prior `window`-bar high, short below the prior low; holds until the opposite break."""
+    prices = cache.prices
+    prior_high = np.vstack([np.full((1, prices.shape[1]), np.nan), cache.get("max", window)[:-1]])
+    prior_low = np.vstack([np.full((1, prices.shape[1]), np.nan), cache.get("min", window)[:-1]])
+    with np.errstate(invalid="ignore"):
+        events = np.where(prices > prior_high, 1.0, np.where(prices < prior_low, -1.0, np.nan))
+    # Hold the last break until the next one
+    return pd.DataFrame(events).ffill().to_numpy()
+
+
+# name -> (rule, constraint on the parameter set); windows and lookbacks are at least one bar
+RULES: Dict[str, Tuple[Callable[..., np.ndarray], Callable[[Dict[str, Any]], bool]]] = {
+    "sma_crossover": (sma_crossover, lambda p: 1 <= p["fast"] < p["slow"]),
+    "momentum": (momentum, lambda p: p["lookback"] >= 1),
+    "breakout": (breakout, lambda p: p["window"] >= 1),
+}
+
+
+def expand_grid(rule: str, grid: Any) -> List[Dict[str, Any]]:
+    """A dict of value lists becomes their product; a list of dicts is kept. Invalid sets are dropped."""
+    if isinstance(grid, dict):
+        keys = list(grid)
+        param_sets = [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+    else:
+        param_sets = [dict(p) for p in grid]
+    constraint = RULES[rule][1]
+    return [p for p in param_sets if constraint(p)]
+
+
+# ==========================
+# ENGINE
+# ==========================
+
+def _exposures(cache: _RollingCache, rule: str, params: Dict[str, Any], config: BacktestConfig) -> np.ndarray:
+    exposure = np.nan_to_num(RULES[rule][0](cache, **params), nan=0.0)
+    if not config.allow_short:
+        exposure = np.clip(exposure, 0.0, None)
+    if config.rebalance_every > 1:
+        # Keep the exposure decided on rebalance bars until the next one
+        held = exposure[::config.rebalance_every]
+        exposure = np.repeat(held, config.rebalance_every, axis=0)[:len(exposure)]
+    exposure[np.isnan(cache.prices)] = 0.0
+    return exposure
+
+
+def _simulate(prices: np.ndarray, exposures: np.ndarray, config: BacktestConfig) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    exposures: (P x T x N). Returns per-set portfolio daily returns (P x T) and
+    mean daily turnover per set (P).
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        asset_returns = np.zeros_like(prices)
+        asset_returns[1:] = prices[1:] / prices[:-1] - 1.0
+    asset_returns = np.nan_to_num(asset_returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+    held = np.zeros_like(exposures)
+    held[:, 1:] = exposures[:, :-1]              # decided at close t-1, earned over t
+    turnover = np.abs(np.diff(exposures, axis=1, prepend=0.0))
+    friction = (config.cost_bps + config.slippage_bps) / 1e4
+    per_asset = held * asset_returns - turnover * friction
+
+    # Equal weight over the tickers priced on each bar
+    priced = (~np.isnan(prices)).sum(axis=1)
+    portfolio = per_asset.sum(axis=2) / np.maximum(priced, 1)
+    return portfolio, turnover.sum(axis=2).mean(axis=1) / max(prices.shape[1], 1)
+
+
+def _summarize(params: Dict[str, Any], returns: pd.Series, turnover: float) -> Dict[str, Any]:
+    returns = returns.iloc[1:]
+    metrics = calculate_advanced_metrics(returns)
+    return {
+        **params,
+        **{k: float(v) for k, v in metrics.items()},
+        "total_return": float((1 + returns).prod() - 1) if len(returns) else 0.0,
+        "daily_turnover": float(turnover),
+    }
+
+
+def _run_chunk(prices: np.ndarray, index: pd.Index, rule: str, param_sets: List[Dict[str, Any]],
+               config: BacktestConfig) -> List[Dict[str, Any]]:
+    cache = _RollingCache(prices)
+    exposures = np.stack([_exposures(cache, rule, params, config) for params in param_sets])
+    portfolio, turnover = _simulate(prices, exposures, config)
+    return [_summarize(params, pd.Series(portfolio[i], index=index), turnover[i])
+            for i, params in enumerate(param_sets)]
+
+
+@dataclass
+class BacktestResult:
+    returns: pd.Series        # portfolio daily returns
+    exposures: pd.DataFrame   # target exposure per date x ticker
+    metrics: Dict[str, Any]
+
+
+@timed("analysis.backtest")
+def backtest(prices: pd.DataFrame, rule: str, params: Dict[str, Any],
+             config: Optional[BacktestConfig] = None) -> BacktestResult:
+    """Single run with the full return series and exposure matrix."""
+    config = config or BacktestConfig()
+    if not RULES[rule][1](params):
+        raise ValueError(f"Invalid parameters for {rule}: {params}")
+    values = prices.to_numpy(dtype=float)
+    exposure = _exposures(_RollingCache(values), rule, params, config)
+    portfolio, turnover = _simulate(values, exposure[None], config)
+    returns = pd.Series(portfolio[0], index=prices.index)
+    return BacktestResult(returns.iloc[1:], pd.DataFrame(exposure, index=prices.index, columns=prices.columns),
+                          _summarize(dict(params), returns, turnover[0]))
+
+
+_WORKER_PRICES: Optional[Tuple[np.ndarray, pd.Index]] = None
+
+
+def _init_worker(values: np.ndarray, index: pd.Index) -> None:
+    global _WORKER_PRICES
+    _WORKER_PRICES = (values, index)
+
+
+def _worker_chunk(rule: str, param_sets: List[Dict[str, Any]], config: BacktestConfig) -> List[Dict[str, Any]]:
+    values, index = _WORKER_PRICES
+    return _run_chunk(values, index, rule, param_sets, config)
+
+
+@timed("analysis.sweep")
+def sweep(prices: pd.DataFrame, rule: str, grid: Any, config: Optional[BacktestConfig] = None,
+          workers: Optional[int] = None, chunk_size: int = 8) -> pd.DataFrame:
+    """
+    Backtests every parameter set in `grid` over all tickers. Returns one row per
+    set with its parameters and metrics, sorted by Sharpe ratio. workers=1 runs
+    in-process; otherwise chunks go to a process pool (prices are shipped once per worker).
+    `chunk_size` is an upper bound; large matrices get smaller chunks.
+    """
+    config = config or BacktestConfig()
+    param_sets = expand_grid(rule, grid)
+    if not param_sets:
+        return pd.DataFrame()
+    values = prices.to_numpy(dtype=float)
+    workers = workers or os.cpu_count() or 1
+    # Keep a chunk's stacked P x T x N arrays within the memory budget
+    per_set_bytes = ARRAYS_PER_SET * values.size * values.itemsize
+    chunk_size = min(chunk_size, CHUNK_MEMORY_BYTES // max(per_set_bytes, 1))
+    # Small sweeps are split finer so every worker gets a chunk
+    chunk_size = max(1, min(chunk_size, -(-len(param_sets) // workers)))
+    chunks = [param_sets[i:i + chunk_size] for i in range(0, len(param_sets), chunk_size)]
+    workers = min(workers, len(chunks))
+
+    if workers <= 1:
+        rows = [row for chunk in chunks for row in _run_chunk(values, prices.index, rule, chunk, config)]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(values, prices.index)) as pool:
+            results = pool.map(_worker_chunk, itertools.repeat(rule), chunks, itertools.repeat(config))
+            rows = [row for chunk_rows in results for row in chunk_rows]
+    frame = pd.DataFrame(rows)
+    if "sharpe_ratio" in frame:
+        frame = frame.sort_values("sharpe_ratio", ascending=False, kind="stable")
+    return frame.reset_index(drop=True)
+
+
+def parse_grid(items: Iterable[str]) -> Dict[str, List[Any]]:
+    """['fast=5,10', 'slow=50'] -> {'fast': [5, 10], 'slow': [50]}"""
+    grid = {}
+    for item in items:
+        key, _, values = item.partition("=")
+        grid[key] = [float(v) if "." in v else int(v) for v in values.split(",")]
+    return grid
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Parameter sweep of a trading rule over a close matrix")
+    parser.add_argument("prices", help="CSV with a date index column and one close column per ticker")
+    parser.add_argument("--rule", choices=sorted(RULES), default="sma_crossover")
+    parser.add_argument("--grid", nargs="+", default=["fast=5,10,20", "slow=50,100,200"], metavar="NAME=V1,V2")
+    parser.add_argument("--cost-bps", type=float, default=5.0)
+    parser.add_argument("--slippage-bps", type=float, default=5.0)
+    parser.add_argument("--rebalance-every", type=int, default=1)
+    parser.add_argument("--allow-short", action="store_true")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    prices = pd.read_csv(args.prices, index_col=0, parse_dates=True).sort_index()
+    config = BacktestConfig(args.cost_bps, args.slippage_bps, args.rebalance_every, args.allow_short)
+    results = sweep(prices, args.rule, parse_grid(args.grid), config, workers=args.workers)
+    print(results.head(args.top).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
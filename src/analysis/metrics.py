@@ -1,6 +1,35 @@
 import numpy as np
 import pandas as pd
 
+from src.instrumentation.profiler import timed
+
+@timed("analysis.build_positions")
+def build_positions(trades):
+    """
+    Aggregates the normalized trade ledger (Ticker, Type, Quantity, Total Amount, Currency)
+    into one row per symbol with qty_total, cost_net and is_open.
+    """
+    columns = ["symbol", "qty_total", "cost_net", "is_open", "Currency"]
+    if trades is None or trades.empty:
+        return pd.DataFrame(columns=columns)
+
+    df = trades.dropna(subset=["Ticker"])
+    side = df["Type"].astype(str).str.upper()
+    # BUY adds to the position, SELL removes; dividends and cash moves don't change it
+    sign = np.where(side.str.startswith("BUY"), 1.0, np.where(side.str.startswith("SELL"), -1.0, 0.0))
+    qty = pd.to_numeric(df["Quantity"], errors="coerce").fillna(0.0).abs() * sign
+    amount = pd.to_numeric(df["Total Amount"], errors="coerce").fillna(0.0).abs() * sign
+
+    grouped = pd.DataFrame({"symbol": df["Ticker"], "qty": qty, "amount": amount, "Currency": df["Currency"]}).groupby("symbol", sort=True)
+    positions = pd.DataFrame({
+        "qty_total": grouped["qty"].sum(),
+        "cost_net": grouped["amount"].sum(),
+        "Currency": grouped["Currency"].first(),
+    }).reset_index()
+    positions["is_open"] = positions["qty_total"] > 1e-9
+    return positions[columns]
+
+@timed("analysis.calculate_position_metrics")
 def calculate_position_metrics(positions, prices, metadata):
     """
     Enriches positions dataframe with market value, pnl, etc.
@@ -17,6 +46,7 @@ def calculate_position_metrics(positions, prices, metadata):
     
     return positions
 
+@timed("analysis.convert_currency")
 def convert_currency(df, fx_rate, base_currency="EUR"):
     """
     Converts PnL and Value to base currency.
@@ -29,6 +59,7 @@ def convert_currency(df, fx_rate, base_currency="EUR"):
     df["value_base"] = df.apply(lambda x: convert(x["market_value"], x["Currency"]), axis=1)
     return df
 
+@timed("analysis.calculate_portfolio_performance")
 def calculate_portfolio_performance(positions, historical_prices, benchmark_ticker="^GSPC"):
     """
     Calculates portfolio-wide metrics based on weights and historical returns.
@@ -102,6 +133,7 @@ def calculate_portfolio_performance(positions, historical_prices, benchmark_tick
         "cumulative_returns": cumulative_ret
     }
 
+@timed("analysis.calculate_advanced_metrics")
 def calculate_advanced_metrics(returns_series, risk_free_rate=0.03):
     """
     Calculates Sharpe Ratio, Volatility, Max Drawdown.
@@ -3,16 +3,21 @@ import glob
 import yfinance as yf
 import streamlit as st
 
+from src.instrumentation.profiler import timed, count, track_cache, cache_miss
+from src.ingestion.symbol_resolver import SEED_OVERRIDES, get_resolver
+
 # ==========================
 # DATA LOADING & PARSING
 # ==========================
 
+@track_cache("loader.load_data")
 @st.cache_data
 def load_data():
     """
     Loads trade data from CSV files.
     Supports 'Revolut' format and 'Mi cartera' format.
     """
+    cache_miss("loader.load_data")
     # 1. Try loading Revolut files first
     files_revolut = glob.glob("revolut*.csv")
     if files_revolut:
@@ -73,22 +78,18 @@ def parse_money(x):
     return x
 
 def get_ticker_mapping():
-    return {
-        "CAD": "CIE.MC",    # Cie Automotive (Madrid)
-        "ENL": "ENEL.MI",   # Enel (Milan)
-        "41L": "ROVI.MC",   # Rovi (Madrid)
-        "AJ3": "ANA.MC",    # Acciona (Madrid)
-        "OZTA": "GRF.MC",   # Grifols (Madrid)
-        "VHM": "SCYR.MC",   # Sacyr (Madrid)
-    }
+    """Broker codes that differ from the exchange ticker (seed of the resolver's override table)."""
+    return dict(SEED_OVERRIDES)
 
 # ==========================
 # EXTERNAL DATA (YFINANCE)
 # ==========================
 
+@track_cache("loader.get_ticker_metadata")
 @st.cache_data(ttl=3600*24) # Cache 24h for metadata
 def get_ticker_metadata(symbols):
-    mapping = get_ticker_mapping()
+    cache_miss("loader.get_ticker_metadata")
+    resolved = get_resolver().resolve_many(symbols)
     metadata = {}
 
     progress_bar = st.progress(0)
@@ -102,21 +103,15 @@ def get_ticker_metadata(symbols):
              
         status_text.text(f"🎨 Obteniendo datos de {sym}...")
 
-        # Resolver símbolo real
-        search_sym = mapping.get(sym, sym)
-
-        # Intentar sufijos si no tiene
-        if "." not in search_sym:
-            # Estrategia rápida: probar sin sufijo primero (US), luego .DE
-            candidates = [search_sym, search_sym + ".DE", search_sym + ".MC"]
-        else:
-            candidates = [search_sym]
+        # Símbolo real ya resuelto (índice local / overrides)
+        candidates = [resolved.get(sym, sym)]
 
         name = sym
         logo = None
 
         for cand in candidates:
             try:
+                count("yfinance.calls")
                 ticker = yf.Ticker(cand)
                 info = ticker.info
 
@@ -147,71 +142,39 @@ def get_ticker_metadata(symbols):
     progress_bar.empty()
     return metadata
 
+@track_cache("loader.get_current_prices")
 @st.cache_data(ttl=300) # Cache 5 min for prices
-def get_current_prices(symbols):
-    mapping = get_ticker_mapping()
+def get_current_prices(symbols, currencies=None):
+    cache_miss("loader.get_current_prices")
     prices = {}
 
-    for sym in symbols:
-        if "CASH" in sym or sym.startswith("$"):
-             continue
-             
-        search_sym = mapping.get(sym, sym)
-
-        # Lógica simplificada de sufijos para precios
-        suffixes = ["", ".DE", ".MC", ".MI", ".PA", ".L"]
-        if "." in search_sym: suffixes = [""] + suffixes
-
-        for suffix in suffixes:
-            try:
-                test_symbol = search_sym + suffix if "." not in search_sym else search_sym
-                ticker = yf.Ticker(test_symbol)
-                hist = ticker.history(period="2d") # 2 dias por si es fin de semana
-                if not hist.empty:
-                    prices[sym] = hist['Close'].iloc[-1]
-                    break
-            except:
-                continue
+    # Una sola pasada en memoria; solo los símbolos desconocidos se sondean en red
+    for sym, ticker_symbol in get_resolver().resolve_many(symbols, currencies).items():
+        try:
+            count("yfinance.calls")
+            hist = yf.Ticker(ticker_symbol).history(period="2d") # 2 dias por si es fin de semana
+            if not hist.empty:
+                prices[sym] = hist['Close'].iloc[-1]
+        except:
+            pass
 
         if sym not in prices:
             prices[sym] = 0.0
 
     return prices
 
+@track_cache("loader.get_historical_prices")
 @st.cache_data(ttl=3600*12) # Cache 12h
-def get_historical_prices(symbols, period="1y"):
+def get_historical_prices(symbols, period="1y", currencies=None):
     """
     Fetches historical closing prices for a list of symbols.
     Returns a DataFrame with dates as index and symbols as columns.
+    `currencies` ({symbol: currency}) disambiguates symbols listed on several markets.
     """
-    mapping = get_ticker_mapping()
-    valid_tickers = []
-    
-    # Resolve symbols first
-    resolved_map = {}
-    for sym in symbols:
-        if "CASH" in sym or sym.startswith("$"):
-            continue
-            
-        search_sym = mapping.get(sym, sym)
-        # Simple resolution logic (same as get_current_prices mostly)
-        suffixes = ["", ".DE", ".MC", ".MI", ".PA", ".L"]
-        if "." in search_sym: suffixes = [""] + suffixes
-        
-        found = False
-        for suffix in suffixes:
-            test_symbol = search_sym + suffix if "." not in search_sym else search_sym
-            try:
-                # Quick verification if needed, or just add to list and let yfinance handle
-                # But yfinance download is better with list
-                # For now let's resolve one by one or trust the resolution
-                 resolved_map[sym] = test_symbol
-                 found = True
-                 break
-            except:
-                continue
-        if not found:
-             resolved_map[sym] = search_sym
+    cache_miss("loader.get_historical_prices")
+
+    # Resolve symbols first (local index + overrides, cash lines skipped)
+    resolved_map = get_resolver().resolve_many(symbols, currencies)
 
     # Download in batch
     unique_tickers = list(set(resolved_map.values()))
@@ -219,6 +182,7 @@ def get_historical_prices(symbols, period="1y"):
         return pd.DataFrame()
 
     try:
+        count("yfinance.calls")
         data = yf.download(unique_tickers, period=period, progress=False)['Close']
         # Rename columns back to original symbols if possible, but ambiguous if multiple map to same
         # Let's keep resolved tickers in DF, and map metrics using resolved tickers
@@ -227,8 +191,10 @@ def get_historical_prices(symbols, period="1y"):
         print(f"Error fetching historical data: {e}")
         return pd.DataFrame()
 
+@timed("loader.get_usd_eur_rate")
 def get_usd_eur_rate():
     try:
+        count("yfinance.calls")
         return yf.Ticker("EUR=X").history(period="1d")['Close'].iloc[-1]
     except:
         return 0.95
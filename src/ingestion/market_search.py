@@ -0,0 +1,335 @@
+import argparse
+import base64
+import json
+import re
+import time
+import unicodedata
+from bisect import bisect_left
+from heapq import merge
+from itertools import chain
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set
+
+# Ranked ticker/name lookups over the market search index.
+#
+# scripts/build-market-search-index.py writes, next to the full JSON, a compact
+# minified index: entries as [symbol, name, market id, tag bitmask] rows sorted
+# by ticker, entry ids sorted by normalized symbol and by normalized name (prefix
+# lookups are a bisect), and trigram posting lists over names and symbols
+# (substring lookups read one posting list instead of scanning). Posting lists
+# are delta + varint encoded and base64'd, and only decoded when first queried.
+#
+# Scores mirror app/api/market/search/route.ts so both sides rank alike.
+
+ROOT = Path(__file__).resolve().parents[2]
+INDEX_PATH = ROOT / "src" / "data" / "market-search-index.json"
+COMPACT_INDEX_PATH = ROOT / "src" / "data" / "market-search-index.compact.json"
+COMPACT_VERSION = 1
+MAX_RESULTS = 8
+
+SCORE_EXACT = 2200
+SCORE_TICKER_PREFIX = 1800
+SCORE_SYMBOL_PREFIX = 1700
+SCORE_NAME_PREFIX = 1400
+SCORE_TAG_EXACT = 1200
+SCORE_NAME_CONTAINS = 900
+SCORE_SYMBOL_CONTAINS = 800
+SCORE_TAG_CONTAINS = 500
+
+
+def normalize(value: str) -> str:
+    decomposed = unicodedata.normalize("NFD", value or "")
+    stripped = "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return re.sub(r"\s+", " ", stripped.upper()).strip()
+
+
+def trigrams(value: str) -> Set[str]:
+    return {value[i : i + 3] for i in range(len(value) - 2)}
+
+
+def encode_ids(ids: List[int]) -> str:
+    """Ascending ids -> base64 of varint-encoded gaps."""
+    out = bytearray()
+    previous = 0
+    for value in ids:
+        gap = value - previous
+        previous = value
+        while gap >= 0x80:
+            out.append((gap & 0x7F) | 0x80)
+            gap >>= 7
+        out.append(gap)
+    return base64.b64encode(bytes(out)).decode("ascii")
+
+
+def decode_ids(text: str) -> List[int]:
+    ids = []
+    value = shift = gap = 0
+    for byte in base64.b64decode(text):
+        gap |= (byte & 0x7F) << shift
+        if byte & 0x80:
+            shift += 7
+            continue
+        value += gap
+        ids.append(value)
+        gap = shift = 0
+    return ids
+
+
+class _Postings:
+    """Trigram -> ids, decoding each posting list on first access."""
+
+    def __init__(self, encoded: Dict[str, str]):
+        self._encoded = encoded
+        self._decoded: Dict[str, List[int]] = {}
+
+    def get(self, gram: str) -> Optional[List[int]]:
+        ids = self._decoded.get(gram)
+        if ids is None:
+            text = self._encoded.get(gram)
+            if text is None:
+                return None
+            ids = self._decoded[gram] = decode_ids(text)
+        return ids
+
+
+def build_compact_index(entries: List[dict], generated_at: Optional[str] = None) -> Dict[str, object]:
+    """Builds the compact index from full-index entries (ticker, market, symbol, name, tags)."""
+    rows = sorted(entries, key=lambda entry: entry["ticker"])
+    markets = sorted({entry["market"] for entry in rows})
+    tags = sorted({tag for entry in rows for tag in entry["tags"]})
+    market_ids = {market: i for i, market in enumerate(markets)}
+    tag_bits = {tag: 1 << i for i, tag in enumerate(tags)}
+
+    norm_symbols = [normalize(entry["symbol"]) for entry in rows]
+    norm_names = [normalize(entry["name"]) for entry in rows]
+
+    def postings(values: List[str]) -> Dict[str, List[int]]:
+        index: Dict[str, List[int]] = {}
+        for entry_id, value in enumerate(values):
+            for gram in sorted(trigrams(value)):
+                index.setdefault(gram, []).append(entry_id)
+        return {gram: encode_ids(ids) for gram, ids in sorted(index.items())}
+
+    return {
+        "version": COMPACT_VERSION,
+        "generatedAt": generated_at,
+        "markets": markets,
+        "tags": tags,
+        "entries": [
+            [entry["symbol"], entry["name"], market_ids[entry["market"]],
+             sum(tag_bits[tag] for tag in entry["tags"])]
+            for entry in rows
+        ],
+        "symbolOrder": sorted(range(len(rows)), key=lambda i: (norm_symbols[i], i)),
+        "nameOrder": sorted(range(len(rows)), key=lambda i: (norm_names[i], i)),
+        "nameTrigrams": postings(norm_names),
+        "symbolTrigrams": postings(norm_symbols),
+    }
+
+
+def write_compact_index(payload: Dict[str, object], path: Path = COMPACT_INDEX_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")) + "\n", encoding="utf-8")
+
+
+class MarketSearchIndex:
+    def __init__(self, payload: dict):
+        if payload.get("version") != COMPACT_VERSION:
+            raise ValueError(f"Unsupported compact index version: {payload.get('version')}")
+        self.markets: List[str] = payload["markets"]
+        self.tags: List[str] = payload["tags"]
+        rows = payload["entries"]
+        self.symbols = [row[0] for row in rows]
+        self.names = [row[1] for row in rows]
+        self.market_of = [row[2] for row in rows]
+        self.tag_mask = [row[3] for row in rows]
+        self.norm_symbols = [normalize(symbol) for symbol in self.symbols]
+        self.norm_names = [normalize(name) for name in self.names]
+
+        self.symbol_order: List[int] = payload["symbolOrder"]
+        self.name_order: List[int] = payload["nameOrder"]
+        self.sorted_symbols = [self.norm_symbols[i] for i in self.symbol_order]
+        self.sorted_names = [self.norm_names[i] for i in self.name_order]
+        self.name_trigrams = _Postings(payload["nameTrigrams"])
+        self.symbol_trigrams = _Postings(payload["symbolTrigrams"])
+
+        self.market_ranges: Dict[str, range] = {}
+        for market_id, market in enumerate(self.markets):
+            ids = [i for i, m in enumerate(self.market_of) if m == market_id]
+            self.market_ranges[market] = range(ids[0], ids[-1] + 1) if ids else range(0)
+        self.by_symbol: Dict[str, List[int]] = {}
+        for i, symbol in enumerate(self.norm_symbols):
+            self.by_symbol.setdefault(symbol, []).append(i)
+        self.by_tag: Dict[str, List[int]] = {
+            normalize(tag): [i for i, mask in enumerate(self.tag_mask) if mask & (1 << bit)]
+            for bit, tag in enumerate(self.tags)
+        }
+
+    @classmethod
+    def load(cls, path: Path = COMPACT_INDEX_PATH) -> "MarketSearchIndex":
+        """Loads the compact index, building it from the full JSON if it hasn't been generated."""
+        path = Path(path)
+        if path.exists():
+            return cls(json.loads(path.read_text(encoding="utf-8")))
+        full = json.loads(INDEX_PATH.read_text(encoding="utf-8"))
+        return cls(build_compact_index(full["entries"], full.get("generatedAt")))
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    def entry(self, entry_id: int) -> Dict[str, object]:
+        market = self.markets[self.market_of[entry_id]]
+        symbol = self.symbols[entry_id]
+        return {
+            "ticker": f"{market}:{symbol}",
+            "market": market,
+            "symbol": symbol,
+            "name": self.names[entry_id],
+            "tags": [tag for bit, tag in enumerate(self.tags) if self.tag_mask[entry_id] & (1 << bit)],
+        }
+
+    # ---------- candidate tiers ----------
+    # Every tier yields candidate ids in ascending id (= ticker) order, so the
+    # search can stop reading a tier as soon as it has enough results.
+
+    @staticmethod
+    def _prefix_ids(sorted_keys: List[str], order: List[int], prefix: str) -> Iterator[int]:
+        start = bisect_left(sorted_keys, prefix)
+        end = bisect_left(sorted_keys, prefix + "\uffff", start)
+        return iter(sorted(order[start:end]))
+
+    def _market_ids(self, matches) -> Iterator[int]:
+        return chain.from_iterable(self.market_ranges[m] for m in self.markets if matches(m))
+
+    @staticmethod
+    def _contains_ids(query: str, grams: _Postings, values: List[str]) -> Iterator[int]:
+        if len(query) < 3:
+            return (i for i, value in enumerate(values) if query in value)
+        shortest = None
+        for gram in trigrams(query):
+            ids = grams.get(gram)
+            if ids is None:
+                return iter(())
+            if shortest is None or len(ids) < len(shortest):
+                shortest = ids
+        # The substring check subsumes the other trigrams
+        return (i for i in shortest if query in values[i])
+
+    def _tiers(self, query: str):
+        yield SCORE_EXACT, lambda: iter(self.by_symbol.get(query, []))
+        yield SCORE_TICKER_PREFIX, lambda: self._market_ids(lambda m: m.startswith(query))
+        yield SCORE_SYMBOL_PREFIX, lambda: self._prefix_ids(self.sorted_symbols, self.symbol_order, query)
+        yield SCORE_NAME_PREFIX, lambda: self._prefix_ids(self.sorted_names, self.name_order, query)
+        yield SCORE_TAG_EXACT, lambda: iter(self.by_tag.get(query, []))
+        yield SCORE_NAME_CONTAINS, lambda: self._contains_ids(query, self.name_trigrams, self.norm_names)
+        yield SCORE_SYMBOL_CONTAINS, lambda: merge(
+            self._market_ids(lambda m: query in m),
+            self._contains_ids(query, self.symbol_trigrams, self.norm_symbols))
+        yield SCORE_TAG_CONTAINS, lambda: merge(*(ids for tag, ids in self.by_tag.items() if query in tag))
+
+    def search(self, query: str, market: str = "", limit: int = MAX_RESULTS) -> List[Dict[str, object]]:
+        """
+        Ranked lookup. `query` may be "MARKET:TEXT"; results are ordered by score,
+        then ticker. Tiers are evaluated best-first and reading stops as soon as
+        `limit` results are settled, since a lower tier can never outrank them.
+        """
+        market_filter = normalize(market)
+        query = normalize(query)
+        if ":" in query:
+            query_market, query = query.split(":", 1)
+            market_filter = query_market or market_filter
+        if not query:
+            return []
+        market_id = None
+        if market_filter and market_filter != "NONE":
+            if market_filter not in self.markets:
+                return []
+            market_id = self.markets.index(market_filter)
+
+        seen: Set[int] = set()
+        results: List[Dict[str, object]] = []
+        for score, candidates in self._tiers(query):
+            for entry_id in candidates():
+                if entry_id in seen or (market_id is not None and self.market_of[entry_id] != market_id):
+                    continue
+                seen.add(entry_id)
+                results.append({**self.entry(entry_id), "score": score})
+                if len(results) >= limit:
+                    return results
+        return results
+
+
+def linear_search(entries: List[dict], query: str, market: str = "", limit: int = MAX_RESULTS) -> List[dict]:
+    """Reference implementation: scores every entry, as the API route does."""
+    market_filter = normalize(market)
+    query = normalize(query)
+    if ":" in query:
+        query_market, query = query.split(":", 1)
+        market_filter = query_market or market_filter
+    if not query:
+        return []
+
+    def score(entry: dict) -> int:
+        ticker, symbol, name = normalize(entry["ticker"]), normalize(entry["symbol"]), normalize(entry["name"])
+        tags = [normalize(tag) for tag in entry["tags"]]
+        if ticker == query or symbol == query:
+            return SCORE_EXACT
+        if ticker.startswith(query):
+            return SCORE_TICKER_PREFIX
+        if symbol.startswith(query):
+            return SCORE_SYMBOL_PREFIX
+        if name.startswith(query):
+            return SCORE_NAME_PREFIX
+        if query in tags:
+            return SCORE_TAG_EXACT
+        if query in name:
+            return SCORE_NAME_CONTAINS
+        if query in ticker or query in symbol:
+            return SCORE_SYMBOL_CONTAINS
+        if any(query in tag for tag in tags):
+            return SCORE_TAG_CONTAINS
+        return 0
+
+    scored = [
+        (score(entry), entry) for entry in entries
+        if not (market_filter and market_filter != "NONE") or entry["market"] == market_filter
+    ]
+    ranked = sorted(((s, e) for s, e in scored if s > 0), key=lambda item: (-item[0], item[1]["ticker"]))
+    return [{**{k: e[k] for k in ("ticker", "market", "symbol", "name", "tags")}, "score": s} for s, e in ranked[:limit]]
+
+
+def benchmark(queries: List[str], repeats: int = 20) -> Dict[str, float]:
+    """Mean latency per query (µs) of the compact index vs the linear scan."""
+    index = MarketSearchIndex.load()
+    entries = json.loads(INDEX_PATH.read_text(encoding="utf-8"))["entries"]
+
+    def mean_us(fn) -> float:
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for query in queries:
+                fn(query)
+        return (time.perf_counter() - start) / (repeats * len(queries)) * 1e6
+
+    return {
+        "index_us": mean_us(index.search),
+        "linear_us": mean_us(lambda q: linear_search(entries, q)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Query the compact market search index")
+    parser.add_argument("query", nargs="*", help="search text, e.g. 'apple' or 'BME:SAN'")
+    parser.add_argument("--benchmark", action="store_true", help="compare latency with a linear scan")
+    args = parser.parse_args()
+    if args.benchmark:
+        queries = args.query or ["AAPL", "apple", "BME:SAN", "bank", "micro", "SP500", "tesla", "nv", "ibex", "corp"]
+        stats = benchmark(queries)
+        print(f"index: {stats['index_us']:.1f} µs/query, linear scan: {stats['linear_us']:.1f} µs/query "
+              f"({stats['linear_us'] / stats['index_us']:.0f}x)")
+        return
+    for result in MarketSearchIndex.load().search(" ".join(args.query)):
+        print(f"{result['score']:>5}  {result['ticker']:<14} {result['name']}")
+
+
+if __name__ == "__main__":
+    main()
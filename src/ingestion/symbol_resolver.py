@@ -0,0 +1,164 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+from src.ingestion.market_search import INDEX_PATH, ROOT
+from src.instrumentation.profiler import count
+
+# Maps broker symbols to exchange-qualified yfinance tickers without touching
+# the network: a persisted override table first, then the local market search
+# index (symbol -> markets). Only symbols found in neither are probed against
+# yfinance suffix by suffix, and what the probe finds is written back to the
+# override table so the next run resolves it offline.
+
+OVERRIDES_PATH = ROOT / ".cache" / "symbol_overrides.json"
+
+# Broker codes that differ from the exchange symbol; seeds the override table.
+SEED_OVERRIDES = {
+    "CAD": "CIE.MC",    # Cie Automotive (Madrid)
+    "ENL": "ENEL.MI",   # Enel (Milan)
+    "41L": "ROVI.MC",   # Rovi (Madrid)
+    "AJ3": "ANA.MC",    # Acciona (Madrid)
+    "OZTA": "GRF.MC",   # Grifols (Madrid)
+    "VHM": "SCYR.MC",   # Sacyr (Madrid)
+}
+
+# yfinance suffix per index market / broker exchange prefix ("BME:SAN")
+MARKET_SUFFIXES = {"NASDAQ": "", "NYSE": "", "BME": ".MC", "MIL": ".MI"}
+MARKET_CURRENCIES = {"NASDAQ": "USD", "NYSE": "USD", "BME": "EUR", "MIL": "EUR"}
+# Listing preference when a symbol trades on several markets (mirrors the old probe order)
+MARKET_PREFERENCE = ["NASDAQ", "NYSE", "BME"]
+PROBE_SUFFIXES = ["", ".DE", ".MC", ".MI", ".PA", ".L"]
+
+
+def is_cash(symbol: str) -> bool:
+    return "CASH" in symbol or symbol.startswith("$")
+
+
+def to_yfinance(market: str, symbol: str) -> str:
+    if MARKET_SUFFIXES.get(market) == "":
+        # US share classes: BRK.B -> BRK-B
+        return symbol.replace(".", "-")
+    return symbol + MARKET_SUFFIXES.get(market, "")
+
+
+def yfinance_probe(symbol: str) -> Optional[str]:
+    """Tries each exchange suffix until yfinance returns recent prices (one network call each)."""
+    import yfinance as yf
+    for suffix in PROBE_SUFFIXES:
+        candidate = symbol + suffix
+        try:
+            count("yfinance.calls")
+            if not yf.Ticker(candidate).history(period="5d").empty:
+                return candidate
+        except Exception:
+            continue
+    return None
+
+
+class SymbolResolver:
+    def __init__(self, index_path: Path = INDEX_PATH, overrides_path: Optional[Path] = OVERRIDES_PATH,
+                 probe: Optional[Callable[[str], Optional[str]]] = yfinance_probe):
+        self.index_path = Path(index_path)
+        self.overrides_path = Path(overrides_path) if overrides_path else None
+        self.probe = probe
+        self._markets: Optional[Dict[str, List[str]]] = None
+        self._lock = threading.Lock()
+        self.overrides = self._load_overrides()
+
+    def _load_overrides(self) -> Dict[str, str]:
+        stored = {}
+        if self.overrides_path and self.overrides_path.exists():
+            stored = json.loads(self.overrides_path.read_text(encoding="utf-8"))
+        # Seed codes added after the table was first saved still apply; stored entries win
+        return {**SEED_OVERRIDES, **stored}
+
+    def save(self) -> None:
+        if not self.overrides_path:
+            return
+        self.overrides_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.overrides_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.overrides, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        os.replace(tmp_path, self.overrides_path)
+
+    @property
+    def markets(self) -> Dict[str, List[str]]:
+        """Symbol -> markets it is listed on, loaded from the index on first use."""
+        if self._markets is None:
+            markets: Dict[str, List[str]] = {}
+            if self.index_path.exists():
+                payload = json.loads(self.index_path.read_text(encoding="utf-8"))
+                for entry in payload["entries"]:
+                    markets.setdefault(entry["symbol"].upper(), []).append(entry["market"])
+            rank = {market: i for i, market in enumerate(MARKET_PREFERENCE)}
+            for listed in markets.values():
+                listed.sort(key=lambda market: rank.get(market, len(rank)))
+            self._markets = markets
+        return self._markets
+
+    def lookup(self, symbol: str, currency: Optional[str] = None) -> Optional[str]:
+        """Offline resolution; None when the symbol is neither overridden nor in the index."""
+        symbol = symbol.strip()
+        if symbol in self.overrides:
+            return self.overrides[symbol]
+        if ":" in symbol:
+            market, _, bare = symbol.partition(":")
+            if market.upper() in MARKET_SUFFIXES:
+                return to_yfinance(market.upper(), bare.upper())
+        listed = self.markets.get(symbol.upper())
+        if not listed:
+            # Already exchange-qualified (e.g. SAN.MC from the 'Mi cartera' loader)
+            return symbol if "." in symbol else None
+        if currency:
+            # Prefer a listing quoted in the position's currency (SAN: NYSE ADR vs BME)
+            listed = sorted(listed, key=lambda market: MARKET_CURRENCIES.get(market) != currency)
+        return to_yfinance(listed[0], symbol.upper())
+
+    def resolve_many(self, symbols: Iterable[str], currencies: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+        """
+        Resolves the whole portfolio in one in-memory pass; cash lines are skipped.
+        Unknown symbols are probed over the network and, when found, persisted as
+        overrides. Symbols nobody can resolve map to themselves.
+        """
+        currencies = currencies or {}
+        resolved: Dict[str, str] = {}
+        unknown: List[str] = []
+        for symbol in dict.fromkeys(symbols):
+            if not isinstance(symbol, str) or is_cash(symbol):
+                continue
+            ticker = self.lookup(symbol, currencies.get(symbol))
+            if ticker is None:
+                unknown.append(symbol)
+            else:
+                resolved[symbol] = ticker
+        count("symbols.resolved_offline", len(resolved))
+
+        learned = False
+        for symbol in unknown:
+            ticker = self.probe(symbol) if self.probe else None
+            count("symbols.probed")
+            if ticker:
+                with self._lock:
+                    self.overrides[symbol] = ticker
+                learned = True
+            resolved[symbol] = ticker or symbol
+        if learned:
+            with self._lock:
+                self.save()
+        return resolved
+
+    def resolve(self, symbol: str, currency: Optional[str] = None) -> str:
+        return self.resolve_many([symbol], {symbol: currency} if currency else None).get(symbol, symbol)
+
+
+_RESOLVER: Optional[SymbolResolver] = None
+
+
+def get_resolver() -> SymbolResolver:
+    """Process-wide resolver, so the index is parsed once."""
+    global _RESOLVER
+    if _RESOLVER is None:
+        _RESOLVER = SymbolResolver()
+    return _RESOLVER
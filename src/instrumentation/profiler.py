@@ -0,0 +1,206 @@
+import json
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# Per-run instrumentation: wall time and peak traced memory per phase / hot
+# function, plus named counters (yfinance calls, cache hits/misses).
+# Disabled by default; when disabled every hook is a single attribute check.
+#
+# Peak memory comes from tracemalloc, which keeps a single process-wide peak.
+# A span resets that peak only when no other thread has a span open, so a
+# running span never loses its peak; with stages running in parallel threads a
+# span's peak is an upper bound that may include allocations of its siblings.
+# Spans recorded inside process-pool workers are not collected.
+
+METRIC_PREFIX = "portfolio"
+
+
+class _Span:
+    __slots__ = ("name", "start", "peak")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.start = time.perf_counter()
+        self.peak = 0
+
+
+class Profiler:
+    def __init__(self):
+        self.enabled = False
+        self.trace_memory = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._open_spans = 0  # across all threads
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.timings: Dict[str, Dict[str, float]] = {}
+            self.counters: Dict[str, int] = {}
+
+    def enable(self, trace_memory: bool = True) -> None:
+        self.trace_memory = trace_memory
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.trace_memory = False
+
+    # ---------- spans ----------
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def phase(self, name: str):
+        """Times the enclosed block and records its peak traced memory under `name`."""
+        if not self.enabled:
+            yield
+            return
+        stack = self._stack()
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        with self._lock:
+            # Resetting would erase the peak of spans open in other threads
+            if tracing and self._open_spans == len(stack):
+                # Fold the peak so far into the enclosing span before resetting it
+                if stack:
+                    stack[-1].peak = max(stack[-1].peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.reset_peak()
+            self._open_spans += 1
+        span = _Span(name)
+        stack.append(span)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - span.start
+            stack.pop()
+            with self._lock:
+                self._open_spans -= 1
+            if tracing and tracemalloc.is_tracing():
+                span.peak = max(span.peak, tracemalloc.get_traced_memory()[1])
+                if stack:
+                    stack[-1].peak = max(stack[-1].peak, span.peak)
+            self._record(name, elapsed, span.peak)
+
+    def _record(self, name: str, elapsed: float, peak: int) -> None:
+        with self._lock:
+            entry = self.timings.get(name)
+            if entry is None:
+                entry = self.timings[name] = {"calls": 0, "total_s": 0.0, "max_s": 0.0, "peak_bytes": 0}
+            entry["calls"] += 1
+            entry["total_s"] += elapsed
+            entry["max_s"] = max(entry["max_s"], elapsed)
+            entry["peak_bytes"] = max(entry["peak_bytes"], peak)
+
+    def timed(self, name: Optional[str] = None):
+        """Decorator form of `phase`; defaults to the function's qualified name."""
+        def decorator(func):
+            span_name = name or f"{func.__module__}.{func.__qualname__}"
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self.phase(span_name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # ---------- counters ----------
+
+    def count(self, name: str, n: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def track_cache(self, name: str):
+        """
+        Decorator placed *outside* a caching decorator (e.g. st.cache_data): counts
+        calls and times them. The cached body reports misses with `cache_miss(name)`,
+        so hits = calls - misses.
+        """
+        def decorator(func):
+            timed_func = self.timed(name)(func)
+
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.enabled:
+                    self.count(f"cache.{name}.calls")
+                return timed_func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def cache_miss(self, name: str) -> None:
+        self.count(f"cache.{name}.misses")
+
+    # ---------- reporting ----------
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            timings = {name: dict(entry) for name, entry in self.timings.items()}
+            counters = dict(self.counters)
+        caches = {}
+        for key, value in counters.items():
+            if key.startswith("cache.") and key.endswith(".calls"):
+                cache_name = key[len("cache."):-len(".calls")]
+                misses = counters.get(f"cache.{cache_name}.misses", 0)
+                caches[cache_name] = {"calls": value, "misses": misses, "hits": max(0, value - misses)}
+        return {"timings": timings, "counters": counters, "caches": caches}
+
+    def to_prometheus(self, report: Optional[Dict[str, Any]] = None) -> str:
+        report = report or self.report()
+        lines = []
+
+        def metric(name, kind, samples):
+            full_name = f"{METRIC_PREFIX}_{name}"
+            lines.append(f"# TYPE {full_name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                lines.append(f"{full_name}{{{label_text}}} {value}")
+
+        timings = report["timings"]
+        metric("span_calls_total", "counter", [({"span": n}, e["calls"]) for n, e in timings.items()])
+        metric("span_seconds_total", "counter", [({"span": n}, f"{e['total_s']:.6f}") for n, e in timings.items()])
+        metric("span_seconds_max", "gauge", [({"span": n}, f"{e['max_s']:.6f}") for n, e in timings.items()])
+        metric("span_peak_memory_bytes", "gauge", [({"span": n}, e["peak_bytes"]) for n, e in timings.items()])
+        metric("events_total", "counter", [({"name": n}, v) for n, v in report["counters"].items()])
+        metric("cache_hits_total", "counter", [({"cache": n}, c["hits"]) for n, c in report["caches"].items()])
+        metric("cache_misses_total", "counter", [({"cache": n}, c["misses"]) for n, c in report["caches"].items()])
+        return "\n".join(lines) + "\n"
+
+    def write(self, output_dir: str, run_id: Optional[str] = None) -> Dict[str, Path]:
+        """Writes `<run_id>.json` and `<run_id>.prom` to `output_dir`."""
+        run_id = run_id or time.strftime("%Y%m%dT%H%M%S")
+        directory = Path(output_dir)
+        directory.mkdir(parents=True, exist_ok=True)
+        report = self.report()
+        json_path = directory / f"{run_id}.json"
+        prom_path = directory / f"{run_id}.prom"
+        json_path.write_text(json.dumps({"run_id": run_id, **report}, indent=2), encoding="utf-8")
+        prom_path.write_text(self.to_prometheus(report), encoding="utf-8")
+        return {"json": json_path, "prometheus": prom_path}
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+PROFILER = Profiler()
+phase = PROFILER.phase
+timed = PROFILER.timed
+count = PROFILER.count
+track_cache = PROFILER.track_cache
+cache_miss = PROFILER.cache_miss
@@ -1,12 +1,22 @@
 import yaml
+import pandas as pd
+import glob
 import logging
+import os
 import sys
+import time
+from datetime import date
 from pathlib import Path
 
+from src.pipeline.executor import PipelineExecutor, Stage
+from src.instrumentation.profiler import PROFILER, count
+
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("Orchestrator")
 
+TRADE_FILE_PATTERNS = ["revolut*.csv", "Mi cartera_*.csv"]
+
 def load_config(config_path="config/pipeline_config.yaml"):
     try:
         with open(config_path, 'r') as f:
@@ -15,48 +25,196 @@ def load_config(config_path="config/pipeline_config.yaml"):
         logger.error(f"Failed to load config: {e}")
         sys.exit(1)
 
+# ==========================
+# STAGES
+# ==========================
+# Stage functions live at module level so they can also run in a process pool.
+
+def trade_files_key():
+    files = sorted(f for pattern in TRADE_FILE_PATTERNS for f in glob.glob(pattern))
+    return [(f, os.path.getmtime(f), os.path.getsize(f)) for f in files]
+
+def ingest_trades():
+    from src.ingestion.loader import load_data, parse_money
+    trades = load_data()
+    if trades is None:
+        logger.warning("No trade files found, continuing with an empty ledger.")
+        trades = pd.DataFrame(columns=["Ticker", "Type", "Quantity", "Total Amount", "Currency"])
+    else:
+        trades = trades.copy()
+        trades["Total Amount"] = trades["Total Amount"].map(parse_money)
+    return {"trades": trades}
+
+def build_positions_stage(trades):
+    from src.analysis.metrics import build_positions
+    return {"positions": build_positions(trades)}
+
+def open_symbols(positions):
+    return sorted(positions.loc[positions["is_open"], "symbol"].astype(str))
+
+def symbol_currencies(positions):
+    if "Currency" not in positions:
+        return None
+    return dict(zip(positions["symbol"].astype(str), positions["Currency"].astype(str)))
+
+def fetch_current_prices(positions):
+    from src.ingestion.loader import get_current_prices
+    return {"current_prices": get_current_prices(open_symbols(positions), symbol_currencies(positions))}
+
+def fetch_historical_prices(positions):
+    from src.ingestion.loader import get_historical_prices
+    return {"historical_prices": get_historical_prices(open_symbols(positions), currencies=symbol_currencies(positions))}
+
+def fetch_fx_rate():
+    from src.ingestion.loader import get_usd_eur_rate
+    return {"fx_rate": get_usd_eur_rate()}
+
+def analyze_portfolio(positions, current_prices, historical_prices, fx_rate):
+    from src.analysis.metrics import calculate_position_metrics, convert_currency, calculate_portfolio_performance
+    positions = calculate_position_metrics(positions.copy(), current_prices, {})
+    if not positions.empty:
+        positions = convert_currency(positions, fx_rate)
+    performance = calculate_portfolio_performance(positions, historical_prices)
+    logger.info(f"Metrics calculated: {performance.get('metrics', {})}")
+    return {"position_metrics": positions, "performance": performance}
+
+def forecast_assets(historical_prices, prediction_config):
+    """One Monte Carlo forecast per asset: direction = more likely outcome, confidence = its share of paths."""
+    from src.prediction.monte_carlo import run_monte_carlo_simulation
+    rows = []
+    if isinstance(historical_prices, pd.Series):
+        historical_prices = historical_prices.to_frame()
+    for ticker in getattr(historical_prices, "columns", []):
+        closes = historical_prices[ticker].dropna()
+        returns = closes.pct_change(fill_method=None).dropna()
+        simulation = run_monte_carlo_simulation(returns, prediction_config["num_simulations"], prediction_config["days"])
+        if simulation.empty:
+            continue
+        prob_up = float((simulation.iloc[-1] > 1.0).mean())
+        as_of = closes.index[-1]
+        rows.append({
+            "id": f"PRED-{ticker}-{as_of:%Y%m%d}",
+            "asset": ticker,
+            "forecast": "UP" if prob_up >= 0.5 else "DOWN",
+            "confidence": max(prob_up, 1 - prob_up),
+            "horizon": prediction_config["days"],
+            "as_of": as_of,
+            "inputs_as_of": as_of,
+        })
+    logger.info(f"Generated {len(rows)} probabilistic forecasts.")
+    return {"forecasts": pd.DataFrame(rows)}
+
+def audit_forecasts(forecasts, validation_config):
+    from src.validation.auditor import AuditorAgent
+    from src.validation.refutation_cache import RefutationCache
+    auditor = AuditorAgent(cache=RefutationCache(validation_config["refutation_cache"]))
+    results = auditor.validate_batch(forecasts, validation_config["market_context"])
+    for pred_id, result in zip(forecasts.get("id", []), results):
+        if result.approved:
+            logger.info(f"Prediction {pred_id} APPROVED.")
+        else:
+            logger.warning(f"Prediction {pred_id} BLOCKED by Auditor. Reason: {result.reason}")
+    logger.info(f"Refutation cache: {auditor.cache_hits} hits, {auditor.cache_misses} misses")
+    count("cache.auditor.refutation.calls", auditor.cache_hits + auditor.cache_misses)
+    count("cache.auditor.refutation.misses", auditor.cache_misses)
+    audits = pd.DataFrame({
+        "id": list(forecasts.get("id", [])),
+        "approved": [r.approved for r in results],
+        "reason": [r.reason for r in results],
+    })
+    return {"audits": audits}
+
+def alerts_stage(historical_prices):
+    """Replays the close history through the breakout engine and keeps the alerts of the latest bar."""
+    from src.alerts.breakout import BreakoutEngine
+    logger.info("Monitoring for breakouts...")
+    if isinstance(historical_prices, pd.Series):
+        historical_prices = historical_prices.to_frame()
+    engine = BreakoutEngine()
+    latest = []
+    for ticker in getattr(historical_prices, "columns", []):
+        closes = historical_prices[ticker].dropna()
+        alerts = []
+        for timestamp, close in closes.items():
+            alerts = engine.update(ticker, timestamp, close, close, close)
+        latest.extend(alerts)
+    for alert in latest:
+        logger.warning(f"ALERT {alert.kind} {alert.symbol} @ {alert.price:.2f} (ref {alert.reference:.2f})")
+    return {"alerts": latest}
+
+def insider_alerts_stage(positions, alerts_config):
+    from src.alerts.insiders import InsiderStore, process_report
+    report_path = alerts_config.get("insiders_report", "insiders_latest.md")
+    if not os.path.exists(report_path):
+        logger.info(f"No insider report at {report_path}")
+        return {}
+    store = InsiderStore(alerts_config.get("insiders_db", ".cache/insiders.sqlite"))
+    try:
+        alerts = process_report(report_path, store, positions)
+    finally:
+        store.close()
+    for alert in alerts:
+        tx = alert.transaction
+        logger.warning(f"INSIDER BUY in held {alert.symbol}: {tx.insider} {tx.amount:,.2f} {tx.currency} "
+                       f"on {tx.date} ({alert.buys_90d} buys in 90d)")
+    return {}
+
+def build_stages():
+    return [
+        Stage("ingest_trades", ingest_trades, outputs=("trades",), cache_key=trade_files_key),
+        Stage("build_positions", build_positions_stage, inputs=("trades",), outputs=("positions",)),
+        # Market data sources: invalidated by time bucket (matches the loader's cache TTLs)
+        Stage("fetch_current_prices", fetch_current_prices, inputs=("positions",), outputs=("current_prices",),
+              cache_key=lambda positions: int(time.time() // 300)),
+        Stage("fetch_historical_prices", fetch_historical_prices, inputs=("positions",), outputs=("historical_prices",),
+              cache_key=lambda positions: date.today().isoformat()),
+        Stage("fetch_fx_rate", fetch_fx_rate, outputs=("fx_rate",),
+              cache_key=lambda: int(time.time() // 3600)),
+        Stage("analyze_portfolio", analyze_portfolio,
+              inputs=("positions", "current_prices", "historical_prices", "fx_rate"),
+              outputs=("position_metrics", "performance")),
+        Stage("forecast_assets", forecast_assets, inputs=("historical_prices", "prediction_config"), outputs=("forecasts",)),
+        Stage("audit_forecasts", audit_forecasts, inputs=("forecasts", "validation_config"), outputs=("audits",)),
+        Stage("alerts", alerts_stage, inputs=("historical_prices",), outputs=("alerts",)),
+        # Stateful ingest: the store itself skips rows already processed
+        Stage("insider_alerts", insider_alerts_stage, inputs=("positions", "alerts_config"), cacheable=False),
+    ]
+
 def run_pipeline():
     logger.info("Initializing AI Portfolio System (Autonomous Hedge Fund)...")
     config = load_config()
-    
+
     phases = config.get('architecture', {}).get('phases', [])
     logger.info(f"Loaded pipeline with {len(phases)} phases.")
+    for phase in phases:
+        logger.info(f"Phase {phase['name']} ({phase.get('agent')}): {', '.join(phase.get('stages', []))}")
 
-    # Phase 1: Ingestion
-    logger.info(">>> STARTING PHASE 1: INGESTION (Gemini 3 Pro Low)")
-    # Call src.ingestion.handler (placeholder)
-    logger.info("Databases updated: clean_portfolio.db, market_timeseries.db")
-
-    # Phase 2: Analysis
-    logger.info(">>> STARTING PHASE 2: ANALYSIS (Gemini 3 Pro High)")
-    # Call src.analysis.engine (placeholder)
-    logger.info("Metrics calculated: P&L, Sharpe, Volatility Regimes")
-
-    # Phase 3: Prediction
-    logger.info(">>> STARTING PHASE 3: PREDICTION (Gemini 3 Pro High)")
-    # Call src.prediction.model_runner (placeholder)
-    logger.info("Generated 50+ probabilistic forecasts.")
-    
-    # Phase 4: Validation
-    logger.info(">>> STARTING PHASE 4: VALIDATION (Claude 3.5 Sonnet Thinking)")
-    from src.validation.auditor import AuditorAgent
-    auditor = AuditorAgent()
-    
-    # Mock prediction for demo
-    mock_prediction = {"id": "PRED-001", "asset": "NVDA", "forecast": "UP", "confidence": 0.98}
-    market_context = {"vix": 25.0, "regime": "High Volatility"}
-    
-    result = auditor.validate_prediction(mock_prediction, market_context)
-    if result.approved:
-        logger.info(f"Prediction {mock_prediction['id']} APPROVED.")
-    else:
-        logger.warning(f"Prediction {mock_prediction['id']} BLOCKED by Auditor. Reason: {result.reason}")
+    profiling = config.get('profiling', {})
+    if profiling.get('enabled') or os.environ.get("PORTFOLIO_PROFILE_DIR"):
+        PROFILER.enable(trace_memory=profiling.get('trace_memory', True))
 
-    # Phase 5: Alerts
-    logger.info(">>> STARTING PHASE 5: ALERTS")
-    logger.info("Monitoring for breakouts and insider activity...")
+    executor_config = config.get('executor', {})
+    executor = PipelineExecutor(
+        build_stages(),
+        max_workers=executor_config.get('max_workers', 4),
+        use_processes=executor_config.get('use_processes', False),
+        checkpoint_dir=executor_config.get('checkpoint_dir'),
+    )
+    with PROFILER.phase("pipeline.cycle"):
+        run = executor.run({
+            "prediction_config": config.get('prediction', {"num_simulations": 500, "days": 21}),
+            "validation_config": config.get('validation', {}),
+            "alerts_config": config.get('alerts', {}),
+        })
 
+    logger.info(f"Executed stages: {', '.join(run.executed) or '-'}")
+    logger.info(f"Reused checkpoints: {', '.join(run.skipped) or '-'}")
+    if PROFILER.enabled:
+        output_dir = os.environ.get("PORTFOLIO_PROFILE_DIR") or profiling.get('output_dir', '.cache/profiles')
+        paths = PROFILER.write(output_dir)
+        logger.info(f"Profile written to {paths['json']} and {paths['prometheus']}")
     logger.info("Pipeline cycle complete.")
+    return run
 
 if __name__ == "__main__":
     run_pipeline()
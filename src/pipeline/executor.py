@@ -0,0 +1,249 @@
+import hashlib
+import json
+import logging
+import os
+import pickle
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.instrumentation.profiler import phase, count
+
+# DAG executor for the pipeline phases.
+# Each stage declares the artifacts it reads and writes; stages whose inputs are
+# ready run concurrently. Outputs are content-fingerprinted and checkpointed, so a
+# stage whose input fingerprints did not change since the last cycle is skipped
+# and its outputs are reloaded from disk.
+
+logger = logging.getLogger("PipelineExecutor")
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    A pipeline stage.
+
+    `func` is called with the declared inputs as keyword arguments and must return
+    a dict with exactly the declared outputs. `cache_key`, if given, is called with
+    the same inputs and its result is mixed into the fingerprint; source stages use
+    it to invalidate on external changes (file mtimes, a date bucket, ...).
+    """
+    name: str
+    func: Callable[..., Dict[str, Any]]
+    inputs: Tuple[str, ...] = ()
+    outputs: Tuple[str, ...] = ()
+    version: str = "1"
+    cache_key: Optional[Callable[..., Any]] = None
+    cacheable: bool = True
+
+
+@dataclass
+class PipelineRun:
+    artifacts: Dict[str, Any] = field(default_factory=dict)
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+    executed: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    durations: Dict[str, float] = field(default_factory=dict)
+
+
+def fingerprint(value: Any) -> str:
+    """Content hash of an artifact."""
+    digest = hashlib.sha256()
+    _feed(digest, value)
+    return digest.hexdigest()
+
+
+def _feed(digest, value: Any) -> None:
+    digest.update(type(value).__name__.encode())
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        if isinstance(value, pd.DataFrame):
+            digest.update(repr(list(value.columns)).encode())
+        try:
+            digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        except TypeError:
+            # Unhashable cells (lists, dicts)
+            digest.update(pickle.dumps(value))
+    elif isinstance(value, np.ndarray):
+        digest.update(f"{value.dtype}{value.shape}".encode())
+        digest.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value, key=repr):
+            _feed(digest, key)
+            _feed(digest, value[key])
+    elif isinstance(value, (list, tuple)):
+        digest.update(str(len(value)).encode())
+        for item in value:
+            _feed(digest, item)
+    elif value is None or isinstance(value, (str, int, float, bool)):
+        digest.update(repr(value).encode())
+    else:
+        digest.update(pickle.dumps(value))
+
+
+def _run_stage(name: str, func: Callable[..., Dict[str, Any]], kwargs: Dict[str, Any]) -> Tuple[Dict[str, Any], float]:
+    start = time.perf_counter()
+    with phase(f"stage.{name}"):
+        outputs = func(**kwargs)
+    return outputs, time.perf_counter() - start
+
+
+class CheckpointStore:
+    """Stores one checkpoint (fingerprint + pickled outputs) per stage under `root`."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _paths(self, stage: str) -> Tuple[Path, Path]:
+        base = self.root / stage
+        return base / "manifest.json", base / "outputs.pkl"
+
+    def load(self, stage: str, stage_fingerprint: str) -> Optional[Tuple[Dict[str, Any], Dict[str, str]]]:
+        manifest_path, outputs_path = self._paths(stage)
+        try:
+            manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+            if manifest.get("fingerprint") != stage_fingerprint:
+                return None
+            with open(outputs_path, "rb") as f:
+                outputs = pickle.load(f)
+        except (OSError, ValueError, pickle.UnpicklingError, EOFError):
+            return None
+        return outputs, manifest["outputs"]
+
+    def save(self, stage: str, stage_fingerprint: str, outputs: Dict[str, Any], output_fps: Dict[str, str]) -> None:
+        manifest_path, outputs_path = self._paths(stage)
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_outputs = outputs_path.with_suffix(".tmp")
+        with open(tmp_outputs, "wb") as f:
+            pickle.dump(outputs, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_outputs, outputs_path)
+        # Manifest last: a checkpoint is only valid once its outputs are on disk
+        tmp_manifest = manifest_path.with_suffix(".tmp")
+        tmp_manifest.write_text(json.dumps({"fingerprint": stage_fingerprint, "outputs": output_fps}), encoding="utf-8")
+        os.replace(tmp_manifest, manifest_path)
+
+
+class PipelineExecutor:
+    def __init__(self, stages: List[Stage], max_workers: int = 4, use_processes: bool = False,
+                 checkpoint_dir: Optional[str] = None):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Duplicate stage names in pipeline")
+        self.max_workers = max_workers
+        self.use_processes = use_processes
+        self.store = CheckpointStore(checkpoint_dir) if checkpoint_dir else None
+
+        self.producers: Dict[str, str] = {}
+        for stage in stages:
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"Artifact '{output}' produced by both '{self.producers[output]}' and '{stage.name}'")
+                self.producers[output] = stage.name
+        self.order = self._topological_order()
+
+    def _dependencies(self, stage: Stage) -> set:
+        return {self.producers[name] for name in stage.inputs if name in self.producers}
+
+    def _topological_order(self) -> List[str]:
+        remaining = {name: self._dependencies(stage) for name, stage in self.stages.items()}
+        order = []
+        while remaining:
+            ready = sorted(name for name, deps in remaining.items() if not deps)
+            if not ready:
+                raise ValueError(f"Cycle between pipeline stages: {sorted(remaining)}")
+            for name in ready:
+                del remaining[name]
+                order.append(name)
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return order
+
+    def _stage_fingerprint(self, stage: Stage, kwargs: Dict[str, Any], fingerprints: Dict[str, str]) -> str:
+        parts = [stage.name, stage.version] + [f"{name}={fingerprints[name]}" for name in stage.inputs]
+        if stage.cache_key is not None:
+            parts.append(fingerprint(stage.cache_key(**kwargs)))
+        return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+    def run(self, initial: Optional[Dict[str, Any]] = None) -> PipelineRun:
+        """
+        Runs the pipeline. `initial` provides artifacts not produced by any stage.
+        Independent stages run in parallel; unchanged stages are restored from checkpoints.
+        """
+        result = PipelineRun()
+        for name, value in (initial or {}).items():
+            result.artifacts[name] = value
+            result.fingerprints[name] = fingerprint(value)
+
+        for stage in self.stages.values():
+            missing = [name for name in stage.inputs if name not in self.producers and name not in result.artifacts]
+            if missing:
+                raise ValueError(f"Stage '{stage.name}' needs artifacts nobody provides: {missing}")
+
+        pending_deps = {name: self._dependencies(stage) for name, stage in self.stages.items()}
+        pool_cls = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+        running: Dict[Any, Tuple[Stage, str]] = {}
+
+        with pool_cls(max_workers=self.max_workers) as pool:
+            def schedule_ready():
+                for name in [n for n in self.order if n in pending_deps and not pending_deps[n]]:
+                    del pending_deps[name]
+                    stage = self.stages[name]
+                    kwargs = {key: result.artifacts[key] for key in stage.inputs}
+                    stage_fp = self._stage_fingerprint(stage, kwargs, result.fingerprints)
+                    checkpoint = self.store.load(name, stage_fp) if (self.store and stage.cacheable) else None
+                    if checkpoint is not None:
+                        logger.info(f"Stage {name}: inputs unchanged, reusing checkpoint")
+                        outputs, output_fps = checkpoint
+                        result.skipped.append(name)
+                        count("pipeline.stages_skipped")
+                        self._complete(stage, outputs, output_fps, result, pending_deps)
+                        continue
+                    logger.info(f"Stage {name}: running")
+                    running[pool.submit(_run_stage, stage.name, stage.func, kwargs)] = (stage, stage_fp)
+
+            # Restoring a checkpoint can unblock further stages, hence the loop
+            before = None
+            while before != len(pending_deps):
+                before = len(pending_deps)
+                schedule_ready()
+
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, stage_fp = running.pop(future)
+                    try:
+                        outputs, duration = future.result()
+                    except Exception:
+                        logger.error(f"Stage {stage.name} failed")
+                        for other in running:
+                            other.cancel()
+                        raise
+                    outputs = outputs or {}
+                    missing = set(stage.outputs) - set(outputs)
+                    if missing:
+                        raise ValueError(f"Stage '{stage.name}' did not produce {sorted(missing)}")
+                    output_fps = {name: fingerprint(outputs[name]) for name in stage.outputs}
+                    if self.store and stage.cacheable:
+                        self.store.save(stage.name, stage_fp, {k: outputs[k] for k in stage.outputs}, output_fps)
+                    result.executed.append(stage.name)
+                    count("pipeline.stages_executed")
+                    result.durations[stage.name] = duration
+                    self._complete(stage, outputs, output_fps, result, pending_deps)
+                before = None
+                while before != len(pending_deps):
+                    before = len(pending_deps)
+                    schedule_ready()
+
+        return result
+
+    def _complete(self, stage: Stage, outputs: Dict[str, Any], output_fps: Dict[str, str],
+                  result: PipelineRun, pending_deps: Dict[str, set]) -> None:
+        for name in stage.outputs:
+            result.artifacts[name] = outputs[name]
+            result.fingerprints[name] = output_fps[name]
+        for deps in pending_deps.values():
+            deps.discard(stage.name)
@@ -1,6 +1,9 @@
 import numpy as np
 import pandas as pd
 
+from src.instrumentation.profiler import timed
+
+@timed("prediction.run_monte_carlo_simulation")
 def run_monte_carlo_simulation(daily_returns, num_simulations=1000, days=252):
     """
     Runs Monte Carlo simulation for portfolio projections.
@@ -0,0 +1,374 @@
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import socketserver
+import threading
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.analysis.metrics import (build_positions, calculate_portfolio_performance,
+                                  calculate_position_metrics, convert_currency)
+from src.instrumentation.profiler import count, phase
+
+logger = logging.getLogger("StateService")
+
+# Long-running portfolio state for the dashboard.
+# The service keeps per-symbol position aggregates, the latest close per ticker
+# and the date x ticker close matrix in memory. A write refreshes the last prices
+# and position metrics of the symbols it touches only; bars for new dates are
+# appended to the matrix. The performance pass over the held tickers' history
+# re-runs only when trades change or a bar touches a held ticker, so writers
+# should still post bars in batches. After every write the JSON views are
+# rebuilt once, each with an ETag. Reads only hand out the prebuilt bytes (or a
+# 304), so a dashboard refresh costs a dict lookup instead of a recomputation.
+
+VIEWS = ("snapshot", "positions", "performance")
+OFFLINE_FX_RATE = 0.95  # get_usd_eur_rate's fallback
+
+
+def _finite(value: Any) -> Any:
+    """NaN/inf -> None, recursively: they are not valid JSON and the dashboard's JSON.parse rejects them."""
+    if isinstance(value, dict):
+        return {key: _finite(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite(item) for item in value]
+    if isinstance(value, (np.floating, float)):
+        return float(value) if math.isfinite(value) else None
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (np.integer,)):
+        return int(value)
+    if isinstance(value, (np.bool_,)):
+        return bool(value)
+    if isinstance(value, (pd.Timestamp, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def _records(frame: pd.DataFrame) -> List[Dict[str, Any]]:
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict(orient="records")
+
+
+class View:
+    __slots__ = ("body", "etag")
+
+    def __init__(self, payload: Dict[str, Any]):
+        self.body = json.dumps(_finite(payload), default=_json_default, separators=(",", ":"),
+                               allow_nan=False).encode("utf-8")
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:16] + '"'
+
+
+class PortfolioState:
+    """
+    In-memory portfolio. `apply_trades` takes rows in the normalized ledger schema
+    (Ticker, Type, Quantity, Total Amount, Currency). `apply_bars` takes
+    (date, ticker, close) rows. Both rebuild the published views before returning;
+    bars touching held tickers cost one performance pass per call, so pass them in batches.
+    """
+
+    def __init__(self, fx_rate: float = OFFLINE_FX_RATE, history_points: int = 252):
+        self.fx_rate = fx_rate
+        self.history_points = history_points
+        self.version = 0
+        self._lock = threading.Lock()
+        self._trade_count = 0
+        # symbol -> [qty_total, cost_net, currency]
+        self._aggregates: Dict[str, list] = {}
+        # symbol -> published position row (metrics in local and base currency)
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._prices = pd.DataFrame()  # date x ticker closes
+        # ticker -> (date, close) of its latest bar
+        self._last_bars: Dict[str, tuple] = {}
+        self._performance_view: Dict[str, Any] = {"metrics": {}, "cumulative_returns": []}
+        self._views: Dict[str, View] = {}
+        self._publish()
+
+    # ---------- writes ----------
+
+    def apply_trades(self, trades: pd.DataFrame) -> int:
+        if trades is None or len(trades) == 0:
+            return self.version
+        delta = build_positions(trades)
+        with self._lock:
+            self._trade_count += len(trades)
+            for symbol, qty, cost, currency in delta[["symbol", "qty_total", "cost_net", "Currency"]].itertuples(index=False):
+                aggregate = self._aggregates.get(symbol)
+                if aggregate is None:
+                    self._aggregates[symbol] = [qty, cost, currency]
+                else:
+                    aggregate[0] += qty
+                    aggregate[1] += cost
+            self._publish(delta["symbol"].tolist())
+            return self.version
+
+    def apply_bars(self, bars: Iterable) -> int:
+        """`bars`: DataFrame with date/ticker/close columns or an iterable of such tuples/dicts."""
+        if not isinstance(bars, pd.DataFrame):
+            bars = pd.DataFrame([b if isinstance(b, dict) else dict(zip(("date", "ticker", "close"), b))
+                                 for b in bars], columns=["date", "ticker", "close"])
+        if bars.empty:
+            return self.version
+        batch = bars.assign(date=pd.to_datetime(bars["date"]), close=bars["close"].astype(float))
+        # Later bars for the same (date, ticker) win, within the batch and over the stored matrix
+        batch = batch.pivot_table(index="date", columns="ticker", values="close", aggfunc="last")
+        batch.columns = batch.columns.astype(str)
+        batch.columns.name = None
+        with self._lock:
+            if self._prices.empty:
+                self._prices = batch
+            elif batch.index[0] > self._prices.index[-1]:
+                # Only new dates (the live case): append instead of re-aligning the whole matrix
+                self._prices = pd.concat([self._prices, batch])
+            else:
+                self._prices = batch.combine_first(self._prices)
+            for ticker in batch.columns:
+                closes = batch[ticker].dropna()
+                if closes.empty:
+                    continue
+                last = self._last_bars.get(ticker)
+                # Same date: the new bar wins, as in the matrix
+                if last is None or closes.index[-1] >= last[0]:
+                    self._last_bars[ticker] = (closes.index[-1], float(closes.iloc[-1]))
+            touched = [ticker for ticker in batch.columns if ticker in self._aggregates]
+            held = any(self._aggregates[ticker][0] > 1e-9 for ticker in touched)
+            self._publish(touched, performance=held)
+            return self.version
+
+    def load_prices(self, prices: pd.DataFrame) -> int:
+        """Seeds the close matrix from a date x ticker DataFrame."""
+        stacked = prices.stack().reset_index()
+        stacked.columns = ["date", "ticker", "close"]
+        return self.apply_bars(stacked)
+
+    def set_fx_rate(self, fx_rate: float) -> int:
+        with self._lock:
+            self.fx_rate = fx_rate
+            # Base-currency values only; weights and returns are in local currency
+            self._publish(list(self._aggregates), performance=False)
+            return self.version
+
+    # ---------- derived state ----------
+
+    def positions_frame(self) -> pd.DataFrame:
+        rows = [(symbol, qty, cost, qty > 1e-9, currency)
+                for symbol, (qty, cost, currency) in sorted(self._aggregates.items())]
+        return pd.DataFrame(rows, columns=["symbol", "qty_total", "cost_net", "is_open", "Currency"])
+
+    def _refresh_rows(self, symbols: Iterable[str]) -> None:
+        """Recomputes the position rows of `symbols` from their aggregates and last prices."""
+        rows = [(symbol, *self._aggregates[symbol]) for symbol in sorted(set(symbols)) if symbol in self._aggregates]
+        if not rows:
+            return
+        frame = pd.DataFrame(rows, columns=["symbol", "qty_total", "cost_net", "Currency"])
+        frame.insert(3, "is_open", frame["qty_total"] > 1e-9)
+        last_prices = {symbol: self._last_bars[symbol][1] for symbol in frame["symbol"] if symbol in self._last_bars}
+        frame = calculate_position_metrics(frame, last_prices, {})
+        frame = convert_currency(frame, self.fx_rate).drop(columns=["name", "logo"])
+        for row in frame.to_dict(orient="records"):
+            self._rows[row["symbol"]] = row
+
+    def _performance(self, positions: pd.DataFrame) -> Dict[str, Any]:
+        # Only held, priced tickers: the performance pass drops every date with a
+        # missing close, so a bar for any other ticker would otherwise empty it
+        held = positions.loc[positions["market_value"] > 0, "symbol"].tolist() if not positions.empty else []
+        history = self._prices[held].dropna(how="all").ffill() if held else pd.DataFrame()
+        performance = calculate_portfolio_performance(positions, history) if len(history) > 1 else {}
+        cumulative = performance.get("cumulative_returns", pd.Series(dtype=float)).tail(self.history_points)
+        return {
+            "metrics": performance.get("metrics", {}),
+            "cumulative_returns": [[ts.isoformat(), value] for ts, value in cumulative.items()],
+        }
+
+    def _publish(self, touched: Iterable[str] = (), performance: bool = True) -> None:
+        """
+        Refreshes the rows of the `touched` symbols, re-runs the performance pass if
+        asked and swaps in the new views. Callers hold the lock (or are __init__).
+        """
+        with phase("service.publish"):
+            self.version += 1
+            self._refresh_rows(touched)
+            if self._rows:
+                positions = pd.DataFrame([self._rows[symbol] for symbol in sorted(self._rows)])
+            else:
+                positions = self.positions_frame()
+            if performance:
+                self._performance_view = self._performance(positions)
+            performance_view = self._performance_view
+            open_positions = positions[positions["is_open"]] if not positions.empty else positions
+            summary = {
+                "version": self.version,
+                "trades": self._trade_count,
+                "open_positions": int(len(open_positions)),
+                "value_base": float(positions["value_base"].sum()) if "value_base" in positions else 0.0,
+                "pnl_base": float(positions["pnl_base"].sum()) if "pnl_base" in positions else 0.0,
+                "fx_rate": self.fx_rate,
+                "last_bar": self._prices.index[-1].isoformat() if not self._prices.empty else None,
+            }
+            position_rows = _records(positions)
+            self._views = {
+                "positions": View({"version": self.version, "positions": position_rows}),
+                "performance": View({"version": self.version, **performance_view}),
+                "snapshot": View({**summary, "positions": position_rows, "performance": performance_view}),
+            }
+
+    # ---------- reads ----------
+
+    def view(self, name: str) -> Optional[View]:
+        count("service.reads")
+        return self._views.get(name)
+
+
+# ==========================
+# HTTP API
+# ==========================
+
+
+def _trades_from_json(rows: List[Dict[str, Any]]) -> pd.DataFrame:
+    frame = pd.DataFrame(rows)
+    missing = {"Ticker", "Type", "Quantity", "Total Amount"} - set(frame.columns)
+    if missing:
+        raise ValueError(f"Trade rows missing: {', '.join(sorted(missing))}")
+    if "Currency" not in frame:
+        frame["Currency"] = "USD"
+    return frame
+
+
+class StateRequestHandler(BaseHTTPRequestHandler):
+    """GET /snapshot|/positions|/performance (ETag / If-None-Match), GET /health, POST /trades|/bars."""
+
+    state: PortfolioState = None  # bound by make_handler
+    server_version = "PortfolioState/1"
+
+    def address_string(self) -> str:
+        # Unix sockets have no peer address
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+    def _send(self, status: int, body: bytes = b"", etag: Optional[str] = None) -> None:
+        self.send_response(status)
+        if etag:
+            self.send_header("ETag", etag)
+            self.send_header("Cache-Control", "no-cache")
+        if status != 304:
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status != 304 and body:
+            self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+        self._send(status, json.dumps(payload, default=_json_default).encode("utf-8"))
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0].strip("/") or "snapshot"
+        if path == "health":
+            self._send_json(200, {"status": "ok", "version": self.state.version})
+            return
+        view = self.state.view(path)
+        if view is None:
+            self._send_json(404, {"error": f"unknown view {path!r}", "views": list(VIEWS)})
+            return
+        if view.etag in [tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")]:
+            count("service.not_modified")
+            self._send(304, etag=view.etag)
+            return
+        self._send(200, view.body, view.etag)
+
+    def do_POST(self) -> None:
+        path = self.path.split("?", 1)[0].strip("/")
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            rows = json.loads(self.rfile.read(length) or b"[]")
+            if not isinstance(rows, list):
+                raise ValueError("expected a JSON list")
+            if path == "trades":
+                version = self.state.apply_trades(_trades_from_json(rows))
+            elif path == "bars":
+                version = self.state.apply_bars(rows)
+            else:
+                self._send_json(404, {"error": f"unknown endpoint {path!r}"})
+                return
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {"error": str(e)})
+            return
+        self._send_json(200, {"version": version})
+
+
+def make_handler(state: PortfolioState) -> type:
+    return type("BoundStateRequestHandler", (StateRequestHandler,), {"state": state})
+
+
+class UnixStateServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(state: PortfolioState, host: str = "127.0.0.1", port: int = 8765,
+                unix_socket: Optional[str] = None) -> socketserver.BaseServer:
+    handler = make_handler(state)
+    if unix_socket:
+        if os.path.exists(unix_socket):
+            os.unlink(unix_socket)
+        return UnixStateServer(unix_socket, handler)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def initial_state(prices_csv: Optional[str] = None, fetch_prices: bool = False) -> PortfolioState:
+    """State seeded from the local trade files (same ingest as the pipeline) and optional prices."""
+    from src.main import ingest_trades
+    state = PortfolioState()
+    state.apply_trades(ingest_trades()["trades"])
+    if prices_csv:
+        state.load_prices(pd.read_csv(prices_csv, index_col=0, parse_dates=True))
+    elif fetch_prices:
+        from src.ingestion.loader import get_historical_prices, get_usd_eur_rate
+        from src.ingestion.symbol_resolver import get_resolver
+        held = state.positions_frame().query("is_open")
+        symbols = held["symbol"].tolist()
+        currencies = dict(zip(held["symbol"], held["Currency"].astype(str)))
+        history = get_historical_prices(symbols, currencies=currencies)
+        # Columns come back as yfinance tickers (GRF.MC); positions are keyed by broker symbol (OZTA)
+        resolved = get_resolver().resolve_many(symbols, currencies)
+        if isinstance(history, pd.Series):
+            # A single downloaded ticker may come back as a bare Close series
+            history = history.to_frame(next(iter(resolved.values()), history.name))
+        state.load_prices(pd.DataFrame({symbol: history[ticker] for symbol, ticker in resolved.items()
+                                        if ticker in history.columns}, index=history.index))
+        state.set_fx_rate(get_usd_eur_rate())
+    return state
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve precomputed portfolio snapshots")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix-socket", help="listen on a Unix socket instead of TCP")
+    parser.add_argument("--prices", help="CSV close matrix (date index x ticker columns) to seed prices")
+    parser.add_argument("--fetch-prices", action="store_true", help="seed prices and FX from yfinance")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    state = initial_state(args.prices, args.fetch_prices)
+    server = make_server(state, args.host, args.port, args.unix_socket)
+    logger.info(f"Serving portfolio state v{state.version} on {args.unix_socket or f'http://{args.host}:{args.port}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
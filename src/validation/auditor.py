@@ -1,5 +1,14 @@
 import logging
-from typing import Dict, Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.validation.refutation import RefutationBackend, StubRefutationBackend, RateLimiter
+from src.validation.refutation_cache import RefutationCache, refutation_key
+from src.validation.look_ahead import NAT_NS, DataAvailabilityIndex, explode_inputs
 
 # Conceptually this module interfaces with the "Claude Sonnet 4.5 Thinking" model
 # In a real implementation, this would call the LLM API.
@@ -17,10 +26,31 @@ class AuditorAgent:
     Role: Critical validation of predictions.
     Policy: No prediction to production without approval.
     """
-    
-    def __init__(self):
+
+    # Overfitting rule: confidence above this level is not credible in a high volatility regime
+    MAX_CONFIDENCE_HIGH_VOL = 0.95
+    HIGH_VOL_VIX = 25.0
+
+    def __init__(self, backend: Optional[RefutationBackend] = None, max_workers: int = 8,
+                 rate_limit: float = 10.0, timeout: float = 60.0,
+                 cache: Optional[RefutationCache] = None,
+                 availability_index: Optional[DataAvailabilityIndex] = None):
         self.logger = logging.getLogger("AuditorAgent")
         self.model_name = "claude-3-5-sonnet-thinking"
+        self.backend = backend if backend is not None else StubRefutationBackend()
+        self.max_workers = max_workers
+        self.rate_limiter = RateLimiter(rate_limit)
+        self.timeout = timeout
+        self.cache = cache if cache is not None else RefutationCache()
+        self.availability_index = availability_index
+
+    @property
+    def cache_hits(self) -> int:
+        return self.cache.hits
+
+    @property
+    def cache_misses(self) -> int:
+        return self.cache.misses
 
     def validate_prediction(self, prediction_data: Dict[str, Any], market_context: Dict[str, Any]) -> AuditResult:
         """
@@ -37,30 +67,216 @@ class AuditorAgent:
         
         # 1. Check for Look-Ahead Bias
         # (Does the prediction rely on data that wasn't available at the time?)
-        if self._detect_look_ahead_bias(prediction_data):
-            return AuditResult(False, "CRITICAL: Look-ahead bias detected.", {'look_ahead': 1.0})
+        rejection = self._detect_look_ahead_bias(prediction_data)
+        if rejection is not None:
+            return rejection
 
         # 2. Check for Overfitting
         # (Is the confidence suspiciously high given the volatility?)
         if self._detect_overfitting(prediction_data, market_context):
-            return AuditResult(False, "REJECTED: Confidence score inconsistent with market volatility (Overfitting risk).", {'overfit': 0.9})
+            return self._overfit_result()
+
+        # 3. Logic/Reasoning Check
+        # This is where we send the prompt to Claude to "refute" the thesis.
+        refutation = self._call_llm_refutation(prediction_data, market_context)
+        self.cache.save()
+        return self._refutation_result(refutation)
+
+    def validate_batch(self, predictions: pd.DataFrame, market_context: Dict[str, Any]) -> List[AuditResult]:
+        """
+        Audits a whole DataFrame of predictions (one row per prediction).
+
+        The look-ahead and overfitting rules are evaluated column-wise for all rows;
+        only the survivors are sent to the refutation backend, concurrently
+        (bounded by `max_workers` and the rate limiter). Refutations still pending
+        after `timeout` seconds are rejected, since nothing reaches production
+        without approval.
+
+        Returns:
+            List of AuditResult in the same order as the rows of `predictions`.
+        """
+        n = len(predictions)
+        self.logger.info(f"Auditing batch of {n} predictions with {self.model_name}")
+        if n == 0:
+            return []
+
+        results: List[Optional[AuditResult]] = self._look_ahead_results(predictions)
+        look_ahead = np.array([r is not None for r in results], dtype=bool)
+        overfit = self._overfitting_mask(predictions, market_context) & ~look_ahead
+
+        for pos in np.flatnonzero(overfit):
+            results[pos] = self._overfit_result()
+
+        survivors = np.flatnonzero(~(look_ahead | overfit))
+        if len(survivors):
+            records = predictions.iloc[survivors].to_dict(orient="records")
+            for pos, result in zip(survivors, self._refute_concurrently(records, market_context)):
+                results[pos] = result
+            self.cache.save()
+
+        rejected = sum(1 for r in results if not r.approved)
+        self.logger.info(f"Batch audit complete: {n - rejected} approved, {rejected} blocked")
+        return results
+
+    def _refute_concurrently(self, records: List[Dict[str, Any]], market_context: Dict[str, Any]) -> List[AuditResult]:
+        deadline = time.monotonic() + self.timeout
+        keys = [refutation_key(record, market_context) for record in records]
+
+        # Identical theses within the batch share one lookup and one backend call
+        refutations: Dict[str, Dict[str, Any]] = {}
+        pending: Dict[str, Dict[str, Any]] = {}
+        for key, record in zip(keys, records):
+            if key in refutations or key in pending:
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                refutations[key] = cached
+            else:
+                pending[key] = record
 
-        # 3. Logic/Reasoning Check (LLM Call placeholder)
-        # This is where we would send the prompt to Claude to "refute" the thesis.
-        refutation = self._call_llm_refutation(prediction_data)
+        def task(record):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or not self.rate_limiter.acquire(timeout=remaining):
+                raise TimeoutError("rate limiter wait exceeded audit timeout")
+            return self.backend.refute(record)
+
+        failures: Dict[str, AuditResult] = {}
+        if pending:
+            ttl = self.cache.ttl_for(market_context)
+            pool = ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(pending))))
+            try:
+                futures = {key: pool.submit(task, record) for key, record in pending.items()}
+                wait(futures.values(), timeout=max(0.0, deadline - time.monotonic()))
+                for key, future in futures.items():
+                    pred_id = pending[key].get('id')
+                    if not future.done():
+                        self.logger.warning(f"Refutation of {pred_id} timed out")
+                        failures[key] = AuditResult(False, "REJECTED: Refutation timed out.", {'timeout': 1.0})
+                    elif future.exception() is not None:
+                        self.logger.warning(f"Refutation of {pred_id} failed: {future.exception()}")
+                        failures[key] = AuditResult(False, f"REJECTED: Refutation failed ({future.exception()}).", {'error': 1.0})
+                    else:
+                        refutations[key] = future.result()
+                        self.cache.put(key, refutations[key], ttl)
+            finally:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+        return [failures[key] if key in failures else self._refutation_result(refutations[key]) for key in keys]
+
+    @staticmethod
+    def _look_ahead_result(offenders: Dict[str, float]) -> AuditResult:
+        # Offending inputs are reported as 'look_ahead:<series>' -> seconds published after as-of
+        scores = {'look_ahead': 1.0}
+        scores.update({f"look_ahead:{name}": lead for name, lead in offenders.items()})
+        return AuditResult(False, f"CRITICAL: Look-ahead bias detected ({', '.join(offenders)}).", scores)
+
+    @staticmethod
+    def _missing_time_result() -> AuditResult:
+        # Inputs that cannot be dated cannot be cleared of look-ahead bias
+        return AuditResult(False, "REJECTED: Missing as-of time (inputs cannot be checked for look-ahead bias).",
+                           {'missing_as_of': 1.0})
+
+    @staticmethod
+    def _unindexed_result(series: List[str]) -> AuditResult:
+        # With an availability index configured, inputs it doesn't know cannot be cleared either
+        return AuditResult(False, f"REJECTED: Inputs not in the availability index ({', '.join(series)}).",
+                           {'unindexed_inputs': 1.0})
+
+    @staticmethod
+    def _overfit_result() -> AuditResult:
+        return AuditResult(False, "REJECTED: Confidence score inconsistent with market volatility (Overfitting risk).", {'overfit': 0.9})
+
+    @staticmethod
+    def _refutation_result(refutation: Dict[str, Any]) -> AuditResult:
         if refutation['is_convincing_refutation']:
             return AuditResult(False, f"Refuted by Auditor: {refutation['reason']}", {'logic_flaw': 0.8})
-
         return AuditResult(True, "VALIDATED: Prediction passed all audit checks.", {'bias': 0.0, 'overfit': 0.1})
 
+    def _is_high_vol(self, context: Dict[str, Any]) -> bool:
+        regime = str(context.get('regime') or '').lower()
+        vix = context.get('vix')
+        return 'high vol' in regime or (vix is not None and vix >= self.HIGH_VOL_VIX)
+
+    def _look_ahead_offenders(self, predictions: pd.DataFrame) -> Tuple[List[Dict[str, float]], np.ndarray, List[List[str]]]:
+        """
+        Per row, the inputs that were not yet available at the prediction's as-of time.
+        Checks the declared 'inputs_as_of' column and every (series, observed_at) pair
+        in the 'inputs' column: an observation after the as-of time always offends,
+        and when an availability index is configured its publication time is checked.
+
+        Also returns a mask of the rows whose inputs cannot be dated (inputs declared
+        without an 'as_of', or an input without 'observed_at') and, per row, the input
+        series the availability index does not know.
+        """
+        n = len(predictions)
+        offenders: List[Dict[str, float]] = [{} for _ in range(n)]
+        missing = np.zeros(n, dtype=bool)
+        unindexed: List[List[str]] = [[] for _ in range(n)]
+
+        if 'inputs_as_of' in predictions.columns:
+            inputs_as_of = pd.to_datetime(predictions['inputs_as_of'], utc=True, format='ISO8601')
+            if 'as_of' in predictions.columns:
+                as_of = pd.to_datetime(predictions['as_of'], utc=True, format='ISO8601')
+            else:
+                as_of = pd.Series(pd.NaT, index=predictions.index, dtype=inputs_as_of.dtype)
+            missing |= (as_of.isna() & inputs_as_of.notna()).to_numpy()
+            lead = (inputs_as_of - as_of).dt.total_seconds().to_numpy()
+            for pos in np.flatnonzero(lead > 0):
+                offenders[pos]['inputs_as_of'] = float(lead[pos])
+
+        rows, series, observed_ns, as_of_ns = explode_inputs(predictions)
+        undated = (observed_ns == NAT_NS) | (as_of_ns == NAT_NS)
+        missing[rows[undated]] = True
+        rows, series = rows[~undated], series[~undated]
+        observed_ns, as_of_ns = observed_ns[~undated], as_of_ns[~undated]
+        # Nothing observed after the as-of time can have been published by then
+        lead = (observed_ns - as_of_ns) / 1e9
+        if self.availability_index is not None:
+            published = self.availability_index.check(series, observed_ns, as_of_ns)
+            for pos in np.flatnonzero(np.isnan(published) & (lead <= 0)):
+                if series[pos] not in unindexed[rows[pos]]:
+                    unindexed[rows[pos]].append(series[pos])
+            lead = np.fmax(lead, published)
+        for pos in np.flatnonzero(lead > 0):
+            row_offenders = offenders[rows[pos]]
+            row_offenders[series[pos]] = max(row_offenders.get(series[pos], 0.0), float(lead[pos]))
+
+        return offenders, missing, unindexed
+
+    def _look_ahead_results(self, predictions: pd.DataFrame) -> List[Optional[AuditResult]]:
+        """Per row, the look-ahead rejection or None when every input was available at its as-of time."""
+        offenders, missing, unindexed = self._look_ahead_offenders(predictions)
+        results: List[Optional[AuditResult]] = []
+        for row_offenders, row_missing, row_unindexed in zip(offenders, missing, unindexed):
+            if row_missing:
+                results.append(self._missing_time_result())
+            elif row_offenders:
+                results.append(self._look_ahead_result(row_offenders))
+            elif row_unindexed:
+                results.append(self._unindexed_result(row_unindexed))
+            else:
+                results.append(None)
+        return results
+
+    def _overfitting_mask(self, predictions: pd.DataFrame, context: Dict[str, Any]) -> np.ndarray:
+        if 'confidence' not in predictions.columns or not self._is_high_vol(context):
+            return np.zeros(len(predictions), dtype=bool)
+        confidence = pd.to_numeric(predictions['confidence'], errors='coerce')
+        return (confidence > self.MAX_CONFIDENCE_HIGH_VOL).fillna(False).to_numpy(dtype=bool)
+
     def _detect_look_ahead_bias(self, data):
-        # Implementation placeholder
-        return False
+        # Returns the rejection (None when clean)
+        return self._look_ahead_results(pd.DataFrame([data]))[0]
 
     def _detect_overfitting(self, data, context):
-        # Implementation placeholder: e.g. if confidence > 95% in high vol regime
-        return False
+        # e.g. confidence > 95% in high vol regime
+        return bool(self._overfitting_mask(pd.DataFrame([data]), context)[0])
 
-    def _call_llm_refutation(self, data):
-        # Placeholder for actual LLM call
-        return {'is_convincing_refutation': False, 'reason': None}
+    def _call_llm_refutation(self, data, context=None):
+        key = refutation_key(data, context)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        refutation = self.backend.refute(data)
+        self.cache.put(key, refutation, self.cache.ttl_for(context))
+        return refutation
@@ -0,0 +1,134 @@
+from typing import Dict, Any, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Look-ahead check: a prediction made "as of" time T may only use observations
+# that had been published by T. The index records, per series, when each
+# bar/report (observation) became available; revisions and late filings mean
+# availability is not necessarily in observation order.
+
+
+# to_ns maps missing timestamps (None, NaN, NaT) to this value
+NAT_NS = np.iinfo(np.int64).min
+
+
+def to_ns(values) -> np.ndarray:
+    """Converts timestamps (str, datetime, Timestamp) to int64 UTC nanoseconds; missing ones become NAT_NS."""
+    return pd.DatetimeIndex(pd.to_datetime(list(values), utc=True, format='ISO8601')).as_unit('ns').asi8
+
+
+class DataAvailabilityIndex:
+    """
+    Per-series sorted availability index.
+
+    For each series the records are sorted by observation time, keeping the
+    earliest availability of each observation (first release, not the
+    restatement), so "when did observation T first become available?" is a
+    single binary search for an exact match. Whether a neighbouring observation
+    was published says nothing about T: a late filing is not available early
+    just because a later bar was.
+    """
+
+    def __init__(self):
+        self._raw: Dict[str, List[Tuple[Any, Any]]] = {}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, series_col: str = 'series',
+                   observed_col: str = 'observed_at', available_col: str = 'available_at') -> "DataAvailabilityIndex":
+        index = cls()
+        for series, group in df.groupby(series_col, sort=False):
+            index.add_many(series, group[observed_col], group[available_col])
+        return index
+
+    def add(self, series: str, observed_at, available_at) -> None:
+        self.add_many(series, [observed_at], [available_at])
+
+    def add_many(self, series: str, observed_at: Iterable, available_at: Iterable) -> None:
+        self._raw.setdefault(series, []).extend(zip(observed_at, available_at))
+        self._arrays.pop(series, None)
+
+    def __contains__(self, series: str) -> bool:
+        return series in self._raw
+
+    def _series_arrays(self, series: str) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._arrays.get(series)
+        if arrays is None:
+            observed, available = zip(*self._raw[series])
+            observed_ns, available_ns = to_ns(observed), to_ns(available)
+            order = np.lexsort((available_ns, observed_ns))
+            observed_ns, available_ns = observed_ns[order], available_ns[order]
+            # Earliest availability per observation comes first within its run
+            first = np.ones(len(observed_ns), dtype=bool)
+            first[1:] = observed_ns[1:] != observed_ns[:-1]
+            arrays = self._arrays[series] = (observed_ns[first], available_ns[first])
+        return arrays
+
+    def first_available_ns(self, series: str, observed_ns: np.ndarray) -> np.ndarray:
+        """
+        For each observation time, the time it first became available (int64 ns, as float).
+        Observations not in the index map to +inf.
+        """
+        indexed_ns, available_ns = self._series_arrays(series)
+        pos = np.minimum(np.searchsorted(indexed_ns, observed_ns, side='left'), len(indexed_ns) - 1)
+        result = np.full(len(observed_ns), np.inf)
+        found = indexed_ns[pos] == observed_ns
+        result[found] = available_ns[pos[found]]
+        return result
+
+    def check(self, series: np.ndarray, observed_ns: np.ndarray, as_of_ns: np.ndarray) -> np.ndarray:
+        """
+        Vectorized check of (series, observation, as_of) triples.
+
+        Returns the lead in seconds by which each input was published after the
+        as-of time: > 0 is look-ahead (inf if never published), NaN if the series
+        is not indexed.
+        """
+        lead = np.full(len(series), np.nan)
+        if len(series) == 0:
+            return lead
+        codes, uniques = pd.factorize(series)
+        # One sort groups the pairs by series
+        order = np.argsort(codes, kind='stable')
+        for rows in np.split(order, np.flatnonzero(np.diff(codes[order])) + 1):
+            name = uniques[codes[rows[0]]]
+            if name not in self._raw:
+                continue
+            first = self.first_available_ns(name, observed_ns[rows])
+            lead[rows] = (first - as_of_ns[rows]) / 1e9
+        return lead
+
+
+def explode_inputs(predictions: pd.DataFrame, inputs_col: str = 'inputs',
+                   as_of_col: str = 'as_of') -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Flattens the per-prediction input lists into parallel arrays
+    (row position, series, observed_ns, as_of_ns).
+
+    Each input is a {'series': ..., 'observed_at': ...} dict or a (series, observed_at) pair.
+    A missing observed_at or as_of (including a frame without `as_of_col`) comes out
+    as NAT_NS; callers must not treat it as a time.
+    """
+    rows, series, observed = [], [], []
+    if inputs_col in predictions.columns:
+        for pos, inputs in enumerate(predictions[inputs_col]):
+            if not isinstance(inputs, (list, tuple)):
+                continue
+            for item in inputs:
+                if isinstance(item, dict):
+                    name, observed_at = item.get('series'), item.get('observed_at')
+                else:
+                    name, observed_at = item
+                rows.append(pos)
+                series.append(name)
+                observed.append(observed_at)
+    if not rows:
+        empty = np.array([], dtype=np.int64)
+        return empty, np.array([], dtype=object), empty, empty
+    rows = np.asarray(rows, dtype=np.int64)
+    if as_of_col in predictions.columns:
+        as_of_ns = to_ns(predictions[as_of_col].to_numpy())[rows]
+    else:
+        as_of_ns = np.full(len(rows), NAT_NS, dtype=np.int64)
+    return rows, np.asarray(series, dtype=object), to_ns(observed), as_of_ns
@@ -0,0 +1,74 @@
+import threading
+import time
+from typing import Dict, Any, Optional, Protocol
+
+# Backends used by the AuditorAgent to "refute" a prediction thesis.
+# The real backend talks to the LLM API; the stub is deterministic so the
+# batch auditing path can be exercised offline.
+
+
+class RefutationBackend(Protocol):
+    def refute(self, prediction_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Returns {'is_convincing_refutation': bool, 'reason': Optional[str]}."""
+        ...
+
+
+class StubRefutationBackend:
+    """
+    Local deterministic backend.
+    Refutes the ids listed in `refute_ids` and any prediction without a forecast.
+    """
+
+    def __init__(self, refute_ids=None, latency: float = 0.0):
+        self.refute_ids = set(refute_ids or [])
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def refute(self, prediction_data: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        pred_id = prediction_data.get('id')
+        if pred_id in self.refute_ids:
+            return {'is_convincing_refutation': True, 'reason': f"Stub refutation for {pred_id}"}
+        if not prediction_data.get('forecast'):
+            return {'is_convincing_refutation': True, 'reason': "Missing forecast direction"}
+        return {'is_convincing_refutation': False, 'reason': None}
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket: at most `rate` acquisitions per second,
+    with bursts of up to `burst` tokens.
+    """
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = float(rate)
+        self.capacity = float(burst if burst is not None else max(1, int(rate)))
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: Optional[float] = None) -> bool:
+        """Blocks until a token is available. Returns False if `timeout` expires first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return True
+                wait = (1.0 - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
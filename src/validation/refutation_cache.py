@@ -0,0 +1,123 @@
+import hashlib
+import json
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional, Callable
+
+# Refutations are the expensive step of the audit and the same thesis
+# (asset, forecast, confidence bucket, regime) comes back every cycle.
+# Entries expire faster in volatile regimes, where a refutation goes stale sooner.
+
+DEFAULT_REGIME_TTL = {
+    "high volatility": 15 * 60,
+    "normal": 60 * 60,
+    "low volatility": 6 * 60 * 60,
+}
+DEFAULT_TTL = 60 * 60
+
+
+def refutation_key(prediction_data: Dict[str, Any], market_context: Optional[Dict[str, Any]],
+                   confidence_step: float = 0.05) -> str:
+    """Canonical hash of the fields that determine a refutation."""
+    context = market_context or {}
+    confidence = prediction_data.get('confidence')
+    try:
+        bucket = math.floor(float(confidence) / confidence_step) if confidence is not None else None
+    except (TypeError, ValueError):
+        bucket = None
+    canonical = {
+        'asset': str(prediction_data.get('asset') or '').strip().upper(),
+        'forecast': str(prediction_data.get('forecast') or '').strip().upper(),
+        'horizon': prediction_data.get('horizon'),
+        'thesis': ' '.join(str(prediction_data.get('thesis') or '').lower().split()),
+        'confidence_bucket': bucket,
+        'regime': _normalize_regime(context.get('regime')),
+    }
+    payload = json.dumps(canonical, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def _normalize_regime(regime) -> str:
+    return ' '.join(str(regime or '').lower().split())
+
+
+class RefutationCache:
+    """
+    LRU cache of refutation results with a per-regime TTL.
+    When `path` is given, entries are persisted as JSON across runs (see `save`).
+    """
+
+    def __init__(self, path: Optional[str] = None, max_entries: int = 10_000,
+                 regime_ttl: Optional[Dict[str, float]] = None, default_ttl: float = DEFAULT_TTL,
+                 clock: Callable[[], float] = time.time):
+        self.path = Path(path) if path else None
+        self.max_entries = max_entries
+        self.regime_ttl = {_normalize_regime(k): v for k, v in (regime_ttl or DEFAULT_REGIME_TTL).items()}
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._dirty = False
+        self._lock = threading.Lock()
+        if self.path is not None and self.path.exists():
+            self._load()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ttl_for(self, market_context: Optional[Dict[str, Any]]) -> float:
+        regime = _normalize_regime((market_context or {}).get('regime'))
+        return self.regime_ttl.get(regime, self.default_ttl)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['expires_at'] <= self.clock():
+                del self._entries[key]
+                self._dirty = True
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return dict(entry['refutation'])
+
+    def put(self, key: str, refutation: Dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = {'expires_at': self.clock() + ttl, 'refutation': dict(refutation)}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def save(self) -> None:
+        """Writes the live entries to `path` (atomic replace). No-op when nothing changed."""
+        if self.path is None or not self._dirty:
+            return
+        with self._lock:
+            now = self.clock()
+            live = [[k, v] for k, v in self._entries.items() if v['expires_at'] > now]
+            self._dirty = False
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        tmp_path.write_text(json.dumps({'version': 1, 'entries': live}), encoding='utf-8')
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> None:
+        try:
+            payload = json.loads(self.path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return
+        now = self.clock()
+        # Stored in LRU order (oldest first), so re-inserting preserves recency
+        for key, entry in payload.get('entries', []):
+            if entry.get('expires_at', 0) > now:
+                self._entries[key] = entry
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,136 @@
+import unittest
+import sys
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.validation.auditor import AuditorAgent
+from src.validation.refutation import StubRefutationBackend, RateLimiter
+from src.validation.refutation_cache import RefutationCache, refutation_key
+
+HIGH_VOL = {"vix": 30.0, "regime": "High Volatility"}
+CALM = {"vix": 12.0, "regime": "Low Volatility"}
+
+
+class TestValidateBatch(unittest.TestCase):
+    def setUp(self):
+        self.backend = StubRefutationBackend(refute_ids={"P3"})
+        self.auditor = AuditorAgent(backend=self.backend, rate_limit=1000)
+        self.predictions = pd.DataFrame([
+            {"id": "P1", "asset": "NVDA", "forecast": "UP", "confidence": 0.98,
+             "as_of": "2026-03-10", "inputs_as_of": "2026-03-09"},
+            {"id": "P2", "asset": "MSFT", "forecast": "UP", "confidence": 0.60,
+             "as_of": "2026-03-10", "inputs_as_of": "2026-03-11"},
+            {"id": "P3", "asset": "AAPL", "forecast": "DOWN", "confidence": 0.55,
+             "as_of": "2026-03-10", "inputs_as_of": "2026-03-10"},
+            {"id": "P4", "asset": "SAN", "forecast": "UP", "confidence": 0.70,
+             "as_of": "2026-03-10", "inputs_as_of": "2026-03-08"},
+        ])
+
+    def test_results_in_row_order(self):
+        results = self.auditor.validate_batch(self.predictions, HIGH_VOL)
+        self.assertEqual([r.approved for r in results], [False, False, False, True])
+        self.assertIn("Overfitting", results[0].reason)
+        self.assertIn("Look-ahead", results[1].reason)
+        self.assertIn("Refuted", results[2].reason)
+
+    def test_only_survivors_reach_backend(self):
+        self.auditor.validate_batch(self.predictions, HIGH_VOL)
+        self.assertEqual(self.backend.calls, 2)
+
+    def test_overfitting_only_in_high_vol(self):
+        results = self.auditor.validate_batch(self.predictions, CALM)
+        self.assertTrue(results[0].approved)
+
+    def test_matches_single_prediction_path(self):
+        batch = self.auditor.validate_batch(self.predictions, HIGH_VOL)
+        single = [self.auditor.validate_prediction(row, HIGH_VOL)
+                  for row in self.predictions.to_dict(orient="records")]
+        self.assertEqual([r.reason for r in batch], [r.reason for r in single])
+
+    def test_timeout_blocks_pending_refutations(self):
+        auditor = AuditorAgent(backend=StubRefutationBackend(latency=0.5), timeout=0.05)
+        results = auditor.validate_batch(self.predictions.iloc[[3]], CALM)
+        self.assertFalse(results[0].approved)
+        self.assertIn("timed out", results[0].reason)
+
+    def test_empty_batch(self):
+        self.assertEqual(self.auditor.validate_batch(pd.DataFrame(), HIGH_VOL), [])
+
+
+class TestRateLimiter(unittest.TestCase):
+    def test_acquire_times_out_when_exhausted(self):
+        limiter = RateLimiter(rate=1, burst=1)
+        self.assertTrue(limiter.acquire())
+        start = time.monotonic()
+        self.assertFalse(limiter.acquire(timeout=0.05))
+        self.assertLess(time.monotonic() - start, 0.5)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestRefutationCache(unittest.TestCase):
+    def setUp(self):
+        self.clock = FakeClock()
+        self.prediction = {"id": "P1", "asset": "nvda", "forecast": "UP", "confidence": 0.71}
+
+    def test_key_ignores_id_and_small_confidence_changes(self):
+        other = dict(self.prediction, id="P9", asset="NVDA", confidence=0.74)
+        self.assertEqual(refutation_key(self.prediction, CALM), refutation_key(other, CALM))
+        self.assertNotEqual(refutation_key(self.prediction, CALM), refutation_key(self.prediction, HIGH_VOL))
+
+    def test_repeated_audits_hit_cache(self):
+        backend = StubRefutationBackend()
+        auditor = AuditorAgent(backend=backend, cache=RefutationCache(clock=self.clock))
+        auditor.validate_prediction(self.prediction, CALM)
+        auditor.validate_prediction(dict(self.prediction, id="P2"), CALM)
+        self.assertEqual(backend.calls, 1)
+        self.assertEqual((auditor.cache_hits, auditor.cache_misses), (1, 1))
+
+    def test_batch_deduplicates_identical_theses(self):
+        backend = StubRefutationBackend()
+        auditor = AuditorAgent(backend=backend, rate_limit=1000, cache=RefutationCache(clock=self.clock))
+        batch = pd.DataFrame([dict(self.prediction, id=f"P{i}") for i in range(5)])
+        results = auditor.validate_batch(batch, CALM)
+        self.assertTrue(all(r.approved for r in results))
+        self.assertEqual(backend.calls, 1)
+
+    def test_ttl_depends_on_regime(self):
+        cache = RefutationCache(clock=self.clock, regime_ttl={"High Volatility": 10, "Low Volatility": 1000})
+        key = refutation_key(self.prediction, HIGH_VOL)
+        cache.put(key, {"is_convincing_refutation": False, "reason": None}, cache.ttl_for(HIGH_VOL))
+        self.clock.now += 11
+        self.assertIsNone(cache.get(key))
+
+    def test_lru_eviction(self):
+        cache = RefutationCache(clock=self.clock, max_entries=2)
+        for key in ("a", "b"):
+            cache.put(key, {"is_convincing_refutation": False, "reason": None}, 60)
+        cache.get("a")
+        cache.put("c", {"is_convincing_refutation": False, "reason": None}, 60)
+        self.assertIsNone(cache.get("b"))
+        self.assertIsNotNone(cache.get("a"))
+
+    def test_persists_across_runs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "refutations.json")
+            backend = StubRefutationBackend()
+            AuditorAgent(backend=backend, cache=RefutationCache(path, clock=self.clock)).validate_prediction(self.prediction, CALM)
+            auditor = AuditorAgent(backend=backend, cache=RefutationCache(path, clock=self.clock))
+            auditor.validate_prediction(self.prediction, CALM)
+            self.assertEqual(backend.calls, 1)
+            self.assertEqual(auditor.cache_hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import sys
+import os
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.analysis.backtest import ARRAYS_PER_SET, BacktestConfig, _run_chunk, backtest, expand_grid, sweep
+
+
+def random_prices(days=300, tickers=6, seed=1):
+    rng = np.random.default_rng(seed)
+    closes = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, (days, tickers)), axis=0))
+    prices = pd.DataFrame(closes, index=pd.bdate_range("2024-01-01", periods=days),
+                          columns=[f"T{i}" for i in range(tickers)])
+    prices.iloc[:40, 0] = np.nan  # a ticker listed later
+    return prices
+
+
+class TestBacktestEngine(unittest.TestCase):
+    def test_costs_and_timing_on_a_known_path(self):
+        prices = pd.DataFrame({"A": [100.0, 110.0, 121.0, 133.1]}, index=pd.bdate_range("2025-01-01", periods=4))
+        free = backtest(prices, "momentum", {"lookback": 1}, BacktestConfig(cost_bps=0, slippage_bps=0))
+        # Signal at the close of bar 1, so only bars 2 and 3 earn the 10% moves
+        np.testing.assert_allclose(free.returns.to_numpy(), [0.0, 0.10, 0.10])
+        self.assertEqual(free.exposures["A"].tolist(), [0.0, 1.0, 1.0, 1.0])
+
+        costly = backtest(prices, "momentum", {"lookback": 1}, BacktestConfig(cost_bps=20, slippage_bps=5))
+        np.testing.assert_allclose(costly.returns.to_numpy(), [-0.0025, 0.10, 0.10])
+        self.assertIn("sharpe_ratio", costly.metrics)
+
+    def test_no_look_ahead(self):
+        prices = random_prices()
+        shocked = prices.copy()
+        shocked.iloc[200:] *= 1.5
+        base = backtest(prices, "sma_crossover", {"fast": 5, "slow": 20}).returns
+        moved = backtest(shocked, "sma_crossover", {"fast": 5, "slow": 20}).returns
+        pd.testing.assert_series_equal(base.iloc[:199], moved.iloc[:199])
+
+    def test_rebalance_and_short_settings(self):
+        prices = random_prices()
+        result = backtest(prices, "breakout", {"window": 10}, BacktestConfig(rebalance_every=5, allow_short=True))
+        exposures = result.exposures.to_numpy()
+        self.assertTrue((exposures < 0).any())
+        changes = np.nonzero(np.abs(np.diff(exposures[:, 1:], axis=0)).sum(axis=1))[0] + 1
+        self.assertTrue(all(row % 5 == 0 for row in changes))
+
+
+class TestSweep(unittest.TestCase):
+    def test_grid_constraints(self):
+        sets = expand_grid("sma_crossover", {"fast": [5, 50], "slow": [20, 50]})
+        self.assertEqual(sets, [{"fast": 5, "slow": 20}, {"fast": 5, "slow": 50}])
+        self.assertEqual(expand_grid("momentum", {"lookback": [0, 1, 5]}), [{"lookback": 1}, {"lookback": 5}])
+        self.assertEqual(expand_grid("breakout", {"window": [-1, 0]}), [])
+        with self.assertRaises(ValueError):
+            backtest(random_prices(), "momentum", {"lookback": 0})
+
+    def test_chunks_sized_from_matrix(self):
+        prices = random_prices(days=50, tickers=4)
+        grid = {"lookback": [1, 2, 3, 4, 5]}
+        with mock.patch("src.analysis.backtest.CHUNK_MEMORY_BYTES", 2 * ARRAYS_PER_SET * 50 * 4 * 8), \
+                mock.patch("src.analysis.backtest._run_chunk", wraps=_run_chunk) as run_chunk:
+            result = sweep(prices, "momentum", grid, workers=1, chunk_size=8)
+        self.assertEqual(len(result), 5)
+        self.assertEqual([len(call.args[3]) for call in run_chunk.call_args_list], [2, 2, 1])
+
+    def test_sweep_matches_single_runs_and_process_pool(self):
+        prices = random_prices()
+        grid = {"fast": [5, 10, 20], "slow": [30, 60]}
+        serial = sweep(prices, "sma_crossover", grid, workers=1, chunk_size=4)
+        self.assertEqual(len(serial), 6)
+        self.assertTrue(serial["sharpe_ratio"].is_monotonic_decreasing)
+        single = backtest(prices, "sma_crossover", {"fast": 10, "slow": 60}).metrics
+        row = serial[(serial["fast"] == 10) & (serial["slow"] == 60)].iloc[0]
+        self.assertAlmostEqual(row["sharpe_ratio"], single["sharpe_ratio"])
+        self.assertAlmostEqual(row["total_return"], single["total_return"])
+
+        parallel = sweep(prices, "sma_crossover", grid, workers=2, chunk_size=2)
+        pd.testing.assert_frame_equal(serial, parallel)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.run import Profile, compare, environment_mismatch, run_profile
+from benchmarks.synthetic import generate_ledger, generate_prices, make_universe
+
+
+class TestSyntheticData(unittest.TestCase):
+    def test_generator_is_deterministic_and_multi_currency(self):
+        universe = make_universe(40, seed=3)
+        first = generate_ledger(500, universe, seed=3)
+        self.assertTrue(first.equals(generate_ledger(500, universe, seed=3)))
+        self.assertEqual(set(universe["currency"]), {"USD", "EUR"})
+        self.assertEqual(list(first.columns), ["Symbol", "Side", "Qty", "Fill Price", "Closing Time"])
+        prices = generate_prices(universe["ticker"].tolist(), days=30, seed=3)
+        self.assertEqual(prices.shape, (30, 40))
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_tiny_profile_runs_every_case(self):
+        results = run_profile(Profile(trades=300, tickers=20, days=40, simulations=50, repeats=1))
+        self.assertEqual(set(results), {"load_data", "calculate_position_metrics", "convert_currency",
+                                        "calculate_portfolio_performance", "run_monte_carlo_simulation"})
+        for result in results.values():
+            self.assertGreater(result["seconds"], 0)
+            self.assertGreaterEqual(result["peak_bytes"], 0)
+
+    def test_compare_flags_only_real_regressions(self):
+        baseline = {"a": {"seconds": 1.0, "peak_bytes": 100 << 20}, "b": {"seconds": 0.001, "peak_bytes": 0}}
+        current = {"a": {"seconds": 1.5, "peak_bytes": 101 << 20}, "b": {"seconds": 0.003, "peak_bytes": 0}}
+        regressions = compare(current, baseline, threshold=0.25)
+        self.assertEqual([(r["case"], r["metric"]) for r in regressions], [("a", "seconds")])
+
+    def test_environment_mismatch(self):
+        env = {"machine": "x86_64", "python": "3.11.7", "pandas": "3.0.6", "numpy": "2.4.6"}
+        self.assertEqual(environment_mismatch(env, dict(env)), [])
+        self.assertEqual(environment_mismatch(env, {**env, "numpy": "2.5.0"}), ["numpy: 2.4.6 -> 2.5.0"])
+
+
+if __name__ == '__main__':
+    unittest.main()
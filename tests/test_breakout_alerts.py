@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.alerts.breakout import BreakoutEngine, replay, write_synthetic_bars
+
+
+def feed(engine, symbol, closes, volumes=None, start=0):
+    alerts = []
+    for i, close in enumerate(closes):
+        volume = volumes[i] if volumes else 100.0
+        alerts += engine.update(symbol, start + i, close, close, close, volume)
+    return alerts
+
+
+class TestBreakoutEngine(unittest.TestCase):
+    def setUp(self):
+        self.engine = BreakoutEngine(window=5, volume_window=5, volume_multiple=2.0,
+                                     fast_ma=2, slow_ma=4, cooldown=3)
+
+    def test_breakout_above_prior_high(self):
+        alerts = feed(self.engine, "AAA", [10, 11, 12, 11, 10, 13])
+        highs = [a for a in alerts if a.kind == "breakout_high"]
+        self.assertEqual(len(highs), 1)
+        self.assertEqual((highs[0].price, highs[0].reference), (13, 12))
+
+    def test_rolling_window_forgets_old_extremes(self):
+        alerts = feed(self.engine, "AAA", [20, 10, 10, 10, 10, 10, 11])
+        self.assertEqual([a.price for a in alerts if a.kind == "breakout_high"], [11])
+
+    def test_volume_spike(self):
+        alerts = feed(self.engine, "AAA", [10] * 6, volumes=[100, 100, 100, 100, 100, 250])
+        self.assertEqual([a.kind for a in alerts], ["volume_spike"])
+
+    def test_moving_average_crosses(self):
+        alerts = feed(self.engine, "AAA", [10, 9, 8, 7, 6, 9, 12, 13, 8, 5, 4])
+        kinds = [a.kind for a in alerts if a.kind.endswith("cross")]
+        self.assertEqual(kinds, ["golden_cross", "death_cross"])
+
+    def test_duplicate_bars_and_cooldown_are_deduplicated(self):
+        feed(self.engine, "AAA", [10, 10, 10, 10, 10])
+        first = self.engine.update("AAA", 5, 11, 11, 11)
+        replayed = self.engine.update("AAA", 5, 11, 11, 11)
+        again = self.engine.update("AAA", 6, 12, 12, 12)
+        self.assertEqual([a.kind for a in first], ["breakout_high"])
+        self.assertEqual(replayed, [])
+        self.assertNotIn("breakout_high", [a.kind for a in again])
+
+    def test_symbols_are_independent(self):
+        feed(self.engine, "AAA", [10] * 5)
+        self.assertEqual(feed(self.engine, "BBB", [50, 60]), [])
+
+
+class TestReplay(unittest.TestCase):
+    def test_replay_synthetic_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bars.csv")
+            write_synthetic_bars(path, symbols=20, bars=100)
+            stats = replay(path)
+        self.assertEqual(stats.bars, 2000)
+        self.assertGreater(stats.alerts, 0)
+        self.assertGreater(stats.bars_per_second, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+import sys
+import os
+import json
+import importlib.util
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "build-market-search-index.py"
+spec = importlib.util.spec_from_file_location("build_market_search_index", SCRIPT)
+builder = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = builder  # parsers run in a process pool and are pickled by module name
+spec.loader.exec_module(builder)
+
+NASDAQ_LISTED = """Symbol|Security Name|Market Category
+AAPL|Apple Inc. - Common Stock|Q
+SANM|Sanmina Corporation - Common Stock|Q
+File Creation Time: 0101202600:00|||
+"""
+OTHER_LISTED = """ACT Symbol|Security Name|Exchange
+SAN|Banco Santander, S.A.|N
+XYZ|Some Amex Listing|A
+"""
+SP500 = """<table class="wikitable" id="constituents"><tr><th>Symbol</th><th>Security</th></tr>
+<tr><td><a href="https://www.nasdaq.com/market-activity/stocks/aapl">AAPL</a></td><td>Apple Inc.</td></tr>
+</table>"""
+IBEX35 = """<h2 id="Components">Components</h2><table><tr><th>Ticker</th><th>Company</th></tr>
+<tr><td>SAN.MC</td><td>Banco Santander</td></tr><tr><td>TEF.MC</td><td>Telef&oacute;nica</td></tr></table>"""
+
+
+class TestIncrementalRebuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name)
+        self.store = builder.SnapshotStore(self.root / "snapshots")
+        for source, text in zip(builder.SOURCES, [NASDAQ_LISTED, OTHER_LISTED, SP500, IBEX35]):
+            self.store.store_raw(source, text)
+        self.store.save()
+        self.output = self.root / "index.json"
+        self.args = ["--offline", "--snapshot-dir", str(self.root / "snapshots"),
+                     "--output", str(self.output), "--compact-output", str(self.root / "compact.json")]
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _rebuild(self):
+        builder.main(self.args)
+        return json.loads(self.output.read_text(encoding="utf-8"))
+
+    def test_offline_build_matches_sources(self):
+        payload = self._rebuild()
+        tickers = [entry["ticker"] for entry in payload["entries"]]
+        self.assertEqual(tickers, ["BME:SAN", "BME:TEF", "NASDAQ:AAPL", "NASDAQ:SANM", "NYSE:SAN"])
+        aapl = payload["entries"][2]
+        self.assertEqual(aapl["tags"], ["NASDAQ", "SP500"])
+        self.assertEqual(payload["entries"][1]["name"], "Telefónica")
+        self.assertTrue((self.root / "compact.json").exists())
+
+    def test_unchanged_sources_leave_output_untouched(self):
+        self._rebuild()
+        parsed_files = sorted((self.root / "snapshots" / "parsed").iterdir())
+        self.output.write_text(self.output.read_text(encoding="utf-8").replace('"generatedAt": "', '"generatedAt": "x'),
+                               encoding="utf-8")
+        before = self.output.read_text(encoding="utf-8")
+        self._rebuild()
+        self.assertEqual(self.output.read_text(encoding="utf-8"), before)
+        self.assertEqual(sorted((self.root / "snapshots" / "parsed").iterdir()), parsed_files)
+
+    def test_parser_change_reparses_and_prunes(self):
+        self._rebuild()
+        # Rows cached by the current parsers (pretend they were parsed badly)
+        stale = self.store.parsed_path(builder.SOURCES[0], self.store.digest(builder.SOURCES[0]))
+        stale.write_text('[["NASDAQ", "OLD", "Stale Row", ""]]', encoding="utf-8")
+
+        payload, _ = builder.build_index(builder.SnapshotStore(self.root / "snapshots", parser_version="next"),
+                                         offline=True)
+        self.assertNotIn("NASDAQ:OLD", {entry["ticker"] for entry in payload["entries"]})
+        files = sorted(path.name for path in (self.root / "snapshots" / "parsed").iterdir())
+        self.assertEqual(len(files), len(builder.SOURCES))
+        self.assertTrue(all(name.endswith("-next.json") for name in files))
+
+    def test_diff_reports_added_removed_and_renamed(self):
+        previous = self._rebuild()
+        nasdaq = builder.SOURCES[0]
+        self.store.store_raw(nasdaq, NASDAQ_LISTED.replace("SANM|Sanmina", "MSFT|Microsoft")
+                             .replace("AAPL|Apple Inc. - Common Stock", "AAPL|Apple"))
+        self.store.save()
+
+        payload, diff = builder.build_index(builder.SnapshotStore(self.root / "snapshots"), previous, offline=True)
+        self.assertEqual([entry["ticker"] for entry in diff["added"]], ["NASDAQ:MSFT"])
+        self.assertEqual(diff["removed"], ["NASDAQ:SANM"])
+        self.assertEqual(diff["renamed"], [{"ticker": "NASDAQ:AAPL", "from": "Apple Inc.", "to": "Apple"}])
+        self.assertEqual(payload["entryCount"], 5)
+        self.assertIn("NASDAQ:MSFT", {entry["ticker"] for entry in payload["entries"]})
+
+    def test_offline_requires_snapshots(self):
+        with self.assertRaises(RuntimeError):
+            builder.build_index(builder.SnapshotStore(self.root / "empty"), offline=True)
+
+
+if __name__ == '__main__':
+    unittest.main()
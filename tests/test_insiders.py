@@ -0,0 +1,86 @@
+import unittest
+import sys
+import os
+from datetime import date
+
+import pandas as pd
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT)
+
+from src.alerts.insiders import (InsiderStore, parse_report, process_report, build_issuer_index,
+                                 normalize_issuer, parse_spanish_number)
+from src.ingestion.symbol_resolver import SymbolResolver
+
+REPORT_MD = os.path.join(ROOT, "insiders_latest.md")
+REPORT_HTML = os.path.join(ROOT, "insiders_latest.html")
+
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+class TestParseReport(unittest.TestCase):
+    def test_markdown_and_html_agree(self):
+        md = parse_report(read(REPORT_MD))
+        html = parse_report(read(REPORT_HTML))
+        self.assertEqual(md.run_id, 40)
+        self.assertEqual(md.stats, {"scraped": 182, "generated": 496, "inserted": 10})
+        self.assertEqual(len(md.transactions), 10)
+        self.assertEqual(md.transactions, html.transactions)
+
+    def test_rows_are_typed(self):
+        tx = [t for t in parse_report(read(REPORT_MD)).transactions if t.kind == "SELL"][0]
+        self.assertEqual(tx.date, date(2026, 3, 13))
+        self.assertEqual((tx.amount, tx.currency), (137291.10, "USD"))
+        self.assertEqual((tx.shares, tx.price), (12538.0, 10.95))
+
+    def test_normalization(self):
+        self.assertEqual(normalize_issuer("BANCO BILBAO VIZCAYA ARGENTARIA, S.A."), "BANCO BILBAO VIZCAYA ARGENTARIA")
+        self.assertEqual(normalize_issuer("Servicios Maravilla del Norte, S.A. de C.V."), "SERVICIOS MARAVILLA DEL NORTE")
+        self.assertEqual(parse_spanish_number("187.500,00 EUR"), (187500.0, "EUR"))
+
+
+class TestInsiderStore(unittest.TestCase):
+    def setUp(self):
+        self.store = InsiderStore()
+        self.positions = pd.DataFrame({"symbol": ["BBVA.MC", "SAN.MC", "AAPL"], "is_open": [True, True, True]})
+
+    def tearDown(self):
+        self.store.close()
+
+    def test_duplicates_collapse_by_content_hash(self):
+        new = self.store.ingest(parse_report(read(REPORT_MD)))
+        self.assertEqual(len(new), 5)
+        self.assertEqual(self.store.count(), 5)
+
+    def test_only_new_rows_processed(self):
+        report = parse_report(read(REPORT_MD))
+        self.store.ingest(report)
+        self.assertEqual(self.store.ingest(report), [])
+        rerun = report.__class__(41, None, {}, report.transactions)
+        self.assertEqual(self.store.ingest(rerun), [])
+
+    def test_buying_in_held_name_alerts(self):
+        alerts = process_report(REPORT_MD, self.store, self.positions)
+        self.assertEqual([(a.symbol, a.transaction.kind) for a in alerts], [("BBVA.MC", "BUY")])
+        self.assertEqual(alerts[0].buys_90d, 1)
+        self.assertEqual(process_report(REPORT_HTML, self.store, self.positions), [])
+
+    def test_issuer_index_uses_position_names(self):
+        positions = pd.DataFrame({"symbol": ["LGT.MC"], "name": ["Lingotes Especiales S.A."], "is_open": [True]})
+        index = build_issuer_index(positions, aliases={})
+        self.assertEqual(index, {"LINGOTES ESPECIALES": ["LGT.MC"]})
+
+    def test_issuer_index_maps_broker_codes(self):
+        # Revolut ledgers hold Grifols as OZTA and Acciona as AJ3
+        positions = pd.DataFrame({"symbol": ["OZTA", "AJ3"], "is_open": [True, True], "Currency": ["EUR", "EUR"]})
+        resolver = SymbolResolver(overrides_path=None, probe=None)
+        index = build_issuer_index(positions, resolver=resolver)
+        self.assertEqual(index["GRIFOLS"], ["OZTA"])
+        self.assertEqual(index["ACCIONA"], ["AJ3"])
+
+
+if __name__ == '__main__':
+    unittest.main()
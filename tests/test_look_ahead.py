@@ -0,0 +1,157 @@
+import unittest
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.validation.auditor import AuditorAgent
+from src.validation.look_ahead import DataAvailabilityIndex, explode_inputs, to_ns
+from src.validation.refutation import StubRefutationBackend
+
+CALM = {"vix": 12.0, "regime": "Low Volatility"}
+
+
+def build_index():
+    index = DataAvailabilityIndex()
+    # Daily bars become available at the close of the same day
+    for day in pd.date_range("2026-03-02", "2026-03-13", freq="B"):
+        index.add("NVDA.close", day, day + pd.Timedelta(hours=21))
+    # Quarterly report for Q4 published six weeks after period end
+    index.add("NVDA.eps", "2025-12-31", "2026-02-11 21:00")
+    return index
+
+
+class TestDataAvailabilityIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = build_index()
+
+    def test_check_reports_lead_in_seconds(self):
+        series = np.array(["NVDA.close", "NVDA.close", "NVDA.eps", "UNKNOWN"], dtype=object)
+        observed = to_ns(["2026-03-10", "2026-03-11", "2025-12-31", "2026-03-10"])
+        as_of = to_ns(["2026-03-10 22:00"] * 4)
+        lead = self.index.check(series, observed, as_of)
+        self.assertLess(lead[0], 0)
+        self.assertEqual(lead[1], 23 * 3600)
+        self.assertLess(lead[2], 0)
+        self.assertTrue(np.isnan(lead[3]))
+
+    def test_unpublished_observation_is_infinite_lead(self):
+        lead = self.index.check(np.array(["NVDA.eps"], dtype=object),
+                                to_ns(["2026-03-31"]), to_ns(["2026-04-01"]))
+        self.assertEqual(lead[0], np.inf)
+
+    def test_late_revision_counts_from_first_publication(self):
+        self.index.add("NVDA.eps", "2025-09-30", "2026-03-01")  # restated figure
+        self.index.add("NVDA.eps", "2025-09-30", "2025-11-19 21:00")  # original release
+        lead = self.index.check(np.array(["NVDA.eps"], dtype=object),
+                                to_ns(["2025-09-30"]), to_ns(["2026-02-20"]))
+        self.assertLess(lead[0], 0)
+
+    def test_late_filing_is_not_available_before_publication(self):
+        index = DataAvailabilityIndex()
+        index.add("X", "2024-01-01", "2024-01-10")  # filed late
+        index.add("X", "2024-01-02", "2024-01-03")
+        index.add("X", "2024-01-04", "2024-01-04")
+        lead = index.check(np.array(["X", "X", "X"], dtype=object),
+                           to_ns(["2024-01-01", "2024-01-02", "2024-01-03"]), to_ns(["2024-01-05"] * 3))
+        self.assertEqual(lead[0], 5 * 86400)
+        self.assertLess(lead[1], 0)
+        self.assertEqual(lead[2], np.inf)  # between two indexed observations, never published
+
+    def test_explode_inputs_accepts_dicts_and_pairs(self):
+        predictions = pd.DataFrame([
+            {"as_of": "2026-03-10", "inputs": [{"series": "A", "observed_at": "2026-03-09"}]},
+            {"as_of": "2026-03-10", "inputs": [("B", "2026-03-08"), ("C", "2026-03-07")]},
+        ])
+        rows, series, observed, as_of = explode_inputs(predictions)
+        self.assertEqual(rows.tolist(), [0, 1, 1])
+        self.assertEqual(series.tolist(), ["A", "B", "C"])
+        self.assertEqual(len(observed), 3)
+
+
+class TestAuditorLookAhead(unittest.TestCase):
+    def setUp(self):
+        self.auditor = AuditorAgent(backend=StubRefutationBackend(), rate_limit=1000,
+                                    availability_index=build_index())
+
+    def test_offending_inputs_reported_in_scores(self):
+        prediction = {"id": "P1", "asset": "NVDA", "forecast": "UP", "confidence": 0.6,
+                      "as_of": "2026-03-10 22:00",
+                      "inputs": [("NVDA.close", "2026-03-10"), ("NVDA.close", "2026-03-11")]}
+        result = self.auditor.validate_prediction(prediction, CALM)
+        self.assertFalse(result.approved)
+        self.assertEqual(result.scores["look_ahead"], 1.0)
+        self.assertEqual(result.scores["look_ahead:NVDA.close"], 23 * 3600)
+
+    def test_batch_flags_only_leaking_rows(self):
+        predictions = pd.DataFrame([
+            {"id": "P1", "asset": "NVDA", "forecast": "UP", "confidence": 0.6,
+             "as_of": "2026-03-10 22:00", "inputs": [("NVDA.close", "2026-03-10")]},
+            {"id": "P2", "asset": "NVDA", "forecast": "DOWN", "confidence": 0.6,
+             "as_of": "2026-02-01", "inputs": [("NVDA.eps", "2025-12-31")]},
+        ])
+        results = self.auditor.validate_batch(predictions, CALM)
+        self.assertTrue(results[0].approved)
+        self.assertFalse(results[1].approved)
+        self.assertIn("NVDA.eps", results[1].reason)
+
+    def test_missing_times_are_rejected_without_a_lead(self):
+        base = {"asset": "NVDA", "forecast": "UP", "confidence": 0.6}
+        predictions = pd.DataFrame([
+            {**base, "id": "P1", "as_of": None, "inputs": [("NVDA.close", "2026-03-10")]},
+            {**base, "id": "P2", "as_of": "2026-03-10 22:00", "inputs": [("NVDA.close", None)]},
+            {**base, "id": "P3", "as_of": "2026-03-10 22:00", "inputs": [("NVDA.close", "2026-03-10")]},
+        ])
+        results = self.auditor.validate_batch(predictions, CALM)
+        for result in results[:2]:
+            self.assertFalse(result.approved)
+            self.assertIn("Missing as-of time", result.reason)
+            self.assertEqual(result.scores, {"missing_as_of": 1.0})
+        self.assertTrue(results[2].approved)
+
+        single = self.auditor.validate_prediction(predictions.iloc[0].to_dict(), CALM)
+        self.assertEqual(single.scores, {"missing_as_of": 1.0})
+
+        no_as_of = predictions.drop(columns=["as_of"])
+        self.assertFalse(any(r.approved for r in self.auditor.validate_batch(no_as_of, CALM)))
+        single = self.auditor.validate_prediction(no_as_of.iloc[2].to_dict(), CALM)
+        self.assertEqual(single.scores, {"missing_as_of": 1.0})
+
+    def test_out_of_order_filing_is_look_ahead(self):
+        index = DataAvailabilityIndex()
+        index.add("X", "2024-01-01", "2024-01-10")
+        index.add("X", "2024-01-02", "2024-01-03")
+        auditor = AuditorAgent(backend=StubRefutationBackend(), rate_limit=1000, availability_index=index)
+        predictions = pd.DataFrame([
+            {"id": "P1", "asset": "X", "forecast": "UP", "confidence": 0.6,
+             "as_of": "2024-01-05", "inputs": [("X", "2024-01-01")]},
+            {"id": "P2", "asset": "X", "forecast": "UP", "confidence": 0.6,
+             "as_of": "2024-01-05", "inputs": [("X", "2024-01-02")]},
+        ])
+        results = auditor.validate_batch(predictions, CALM)
+        self.assertFalse(results[0].approved)
+        self.assertEqual(results[0].scores["look_ahead:X"], 5 * 86400)
+        self.assertTrue(results[1].approved)
+
+    def test_unindexed_and_future_inputs_fail_closed(self):
+        base = {"asset": "NVDA", "forecast": "UP", "confidence": 0.6, "as_of": "2026-03-10 22:00"}
+        predictions = pd.DataFrame([
+            {**base, "id": "P1", "inputs": [("UNKNOWN", "2026-03-09")]},
+            {**base, "id": "P2", "inputs": [("UNKNOWN", "2026-03-12")]},
+        ])
+        results = self.auditor.validate_batch(predictions, CALM)
+        self.assertIn("not in the availability index (UNKNOWN)", results[0].reason)
+        self.assertEqual(results[1].scores["look_ahead:UNKNOWN"], 26 * 3600)
+
+        # Without an index, an observation after the as-of time is still look-ahead
+        plain = AuditorAgent(backend=StubRefutationBackend(), rate_limit=1000)
+        results = plain.validate_batch(predictions, CALM)
+        self.assertTrue(results[0].approved)
+        self.assertFalse(results[1].approved)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+import sys
+import os
+import json
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ingestion.market_search import (INDEX_PATH, MarketSearchIndex, build_compact_index, decode_ids,
+                                         encode_ids, linear_search)
+
+ENTRIES = [
+    {"ticker": "BME:SAN", "market": "BME", "symbol": "SAN", "name": "Santander", "tags": ["BME", "IBEX35"]},
+    {"ticker": "BME:TEF", "market": "BME", "symbol": "TEF", "name": "Telefónica", "tags": ["BME", "IBEX35"]},
+    {"ticker": "NASDAQ:AAPL", "market": "NASDAQ", "symbol": "AAPL", "name": "Apple Inc.", "tags": ["NASDAQ", "SP500"]},
+    {"ticker": "NASDAQ:SANM", "market": "NASDAQ", "symbol": "SANM", "name": "Sanmina Corporation", "tags": ["NASDAQ"]},
+    {"ticker": "NYSE:APLE", "market": "NYSE", "symbol": "APLE", "name": "Apple Hospitality REIT", "tags": ["NYSE"]},
+    {"ticker": "NYSE:SAN", "market": "NYSE", "symbol": "SAN", "name": "Banco Santander, S.A.", "tags": ["NYSE"]},
+]
+
+
+class TestCompactIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = MarketSearchIndex(json.loads(json.dumps(build_compact_index(ENTRIES))))
+
+    def test_id_encoding_round_trip(self):
+        ids = [0, 1, 5, 130, 20000, 20001]
+        self.assertEqual(decode_ids(encode_ids(ids)), ids)
+
+    def test_ranking(self):
+        tickers = [r["ticker"] for r in self.index.search("san")]
+        self.assertEqual(tickers, ["BME:SAN", "NYSE:SAN", "NASDAQ:SANM"])
+        self.assertEqual(self.index.search("BME:san")[0]["ticker"], "BME:SAN")
+        self.assertEqual(self.index.search("telefonica")[0]["ticker"], "BME:TEF")
+        self.assertEqual(self.index.search("sp500")[0]["score"], 1200)
+
+    def test_market_filter(self):
+        self.assertEqual([r["ticker"] for r in self.index.search("apple", market="NYSE")], ["NYSE:APLE"])
+        self.assertEqual(self.index.search("apple", market="LSE"), [])
+
+    def test_matches_linear_scan(self):
+        for query in ["s", "sa", "san", "apple", "corp", "hosp", "ibex", "nyse", "q", "NASDAQ:a", "é"]:
+            self.assertEqual(self.index.search(query), linear_search(ENTRIES, query), query)
+
+
+class TestShippedIndex(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.index = MarketSearchIndex.load()
+        with open(INDEX_PATH, encoding="utf-8") as f:
+            cls.entries = json.load(f)["entries"]
+
+    def test_compact_index_covers_full_index(self):
+        self.assertEqual(len(self.index), len(self.entries))
+
+    def test_matches_linear_scan(self):
+        for query in ["AAPL", "apple", "BME:SAN", "bank", "inc", "nv", "SP500"]:
+            self.assertEqual(self.index.search(query), linear_search(self.entries, query), query)
+
+
+if __name__ == '__main__':
+    unittest.main()
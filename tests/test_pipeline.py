@@ -0,0 +1,126 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pipeline.executor import PipelineExecutor, Stage, fingerprint
+from src.analysis.metrics import build_positions
+
+
+class CallLog:
+    def __init__(self):
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def record(self, name):
+        with self.lock:
+            self.calls.append(name)
+
+
+def make_stages(log, delay=0.0):
+    def source(raw):
+        log.record("source")
+        return {"a": raw * 2}
+
+    def left(a):
+        log.record("left")
+        time.sleep(delay)
+        return {"b": a + 1}
+
+    def right(a):
+        log.record("right")
+        time.sleep(delay)
+        return {"c": a + 2}
+
+    def join(b, c):
+        log.record("join")
+        return {"d": pd.Series([b, c])}
+
+    return [
+        Stage("join", join, inputs=("b", "c"), outputs=("d",)),
+        Stage("left", left, inputs=("a",), outputs=("b",)),
+        Stage("right", right, inputs=("a",), outputs=("c",)),
+        Stage("source", source, inputs=("raw",), outputs=("a",)),
+    ]
+
+
+class TestPipelineExecutor(unittest.TestCase):
+    def test_runs_in_dependency_order(self):
+        log = CallLog()
+        run = PipelineExecutor(make_stages(log)).run({"raw": 1})
+        self.assertEqual(run.artifacts["d"].tolist(), [3, 4])
+        self.assertEqual(log.calls[0], "source")
+        self.assertEqual(log.calls[-1], "join")
+
+    def test_independent_stages_run_in_parallel(self):
+        start = time.perf_counter()
+        PipelineExecutor(make_stages(CallLog(), delay=0.3), max_workers=2).run({"raw": 1})
+        self.assertLess(time.perf_counter() - start, 0.55)
+
+    def test_unchanged_inputs_skip_recomputation(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            log = CallLog()
+            PipelineExecutor(make_stages(log), checkpoint_dir=tmp).run({"raw": 1})
+            log.calls.clear()
+            run = PipelineExecutor(make_stages(log), checkpoint_dir=tmp).run({"raw": 1})
+            self.assertEqual(log.calls, [])
+            self.assertEqual(sorted(run.skipped), ["join", "left", "right", "source"])
+            self.assertEqual(run.artifacts["d"].tolist(), [3, 4])
+
+            run = PipelineExecutor(make_stages(log), checkpoint_dir=tmp).run({"raw": 2})
+            self.assertEqual(sorted(log.calls), ["join", "left", "right", "source"])
+
+    def test_identical_outputs_stop_invalidation(self):
+        def source(raw):
+            return {"a": raw % 2}
+
+        def sink(a):
+            log.record("sink")
+            return {"b": a}
+
+        log = CallLog()
+        stages = [Stage("source", source, inputs=("raw",), outputs=("a",)),
+                  Stage("sink", sink, inputs=("a",), outputs=("b",))]
+        with tempfile.TemporaryDirectory() as tmp:
+            PipelineExecutor(stages, checkpoint_dir=tmp).run({"raw": 1})
+            run = PipelineExecutor(stages, checkpoint_dir=tmp).run({"raw": 3})
+            self.assertEqual(run.executed, ["source"])
+            self.assertEqual(log.calls, ["sink"])
+
+    def test_rejects_cycles_and_missing_inputs(self):
+        noop = lambda **kwargs: {}
+        with self.assertRaises(ValueError):
+            PipelineExecutor([Stage("x", noop, inputs=("b",), outputs=("a",)),
+                              Stage("y", noop, inputs=("a",), outputs=("b",))])
+        with self.assertRaises(ValueError):
+            PipelineExecutor([Stage("x", noop, inputs=("missing",))]).run()
+
+    def test_fingerprint_is_content_based(self):
+        df = pd.DataFrame({"x": [1, 2]})
+        self.assertEqual(fingerprint({"df": df}), fingerprint({"df": df.copy()}))
+        self.assertNotEqual(fingerprint(df), fingerprint(df.assign(x=[1, 3])))
+
+
+class TestBuildPositions(unittest.TestCase):
+    def test_aggregates_buys_and_sells(self):
+        trades = pd.DataFrame({
+            "Ticker": ["AAPL", "AAPL", "SAN.MC", "AAPL"],
+            "Type": ["BUY - MARKET", "SELL - MARKET", "BUY", "DIVIDEND"],
+            "Quantity": [10, 4, 100, 0],
+            "Total Amount": [1000.0, 500.0, 400.0, 12.0],
+            "Currency": ["USD", "USD", "EUR", "USD"],
+        })
+        positions = build_positions(trades).set_index("symbol")
+        self.assertEqual(positions.loc["AAPL", "qty_total"], 6)
+        self.assertEqual(positions.loc["AAPL", "cost_net"], 500.0)
+        self.assertTrue(positions.loc["SAN.MC", "is_open"])
+
+
+if __name__ == '__main__':
+    unittest.main()
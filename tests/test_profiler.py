@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.instrumentation.profiler import Profiler
+
+
+class TestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.profiler = Profiler()
+
+    def tearDown(self):
+        self.profiler.disable()
+
+    def test_disabled_records_nothing(self):
+        work = self.profiler.timed("work")(lambda: 42)
+        self.assertEqual(work(), 42)
+        self.profiler.count("yfinance.calls")
+        self.assertEqual(self.profiler.report(), {"timings": {}, "counters": {}, "caches": {}})
+
+    def test_nested_phases_record_time_and_peak_memory(self):
+        self.profiler.enable()
+        with self.profiler.phase("outer"):
+            with self.profiler.phase("inner"):
+                blob = bytearray(2_000_000)
+            del blob
+        timings = self.profiler.report()["timings"]
+        self.assertEqual(timings["inner"]["calls"], 1)
+        self.assertGreaterEqual(timings["inner"]["peak_bytes"], 2_000_000)
+        self.assertGreaterEqual(timings["outer"]["peak_bytes"], timings["inner"]["peak_bytes"])
+
+    def test_concurrent_span_does_not_erase_running_peak(self):
+        self.profiler.enable()
+        allocated, sibling_done = threading.Event(), threading.Event()
+
+        def worker():
+            with self.profiler.phase("worker"):
+                blob = bytearray(3_000_000)
+                del blob
+                allocated.set()
+                sibling_done.wait(5)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        allocated.wait(5)
+        with self.profiler.phase("sibling"):
+            pass
+        sibling_done.set()
+        thread.join(5)
+        timings = self.profiler.report()["timings"]
+        self.assertGreaterEqual(timings["worker"]["peak_bytes"], 3_000_000)
+
+    def test_cache_hits_derived_from_calls_and_misses(self):
+        self.profiler.enable(trace_memory=False)
+        memo = {}
+
+        @self.profiler.track_cache("prices")
+        def lookup(key):
+            if key not in memo:
+                self.profiler.cache_miss("prices")
+                memo[key] = key * 2
+            return memo[key]
+
+        for key in (1, 1, 2, 1):
+            lookup(key)
+        self.assertEqual(self.profiler.report()["caches"]["prices"], {"calls": 4, "misses": 2, "hits": 2})
+
+    def test_write_json_and_prometheus(self):
+        self.profiler.enable(trace_memory=False)
+        with self.profiler.phase('stage.analyze "portfolio"'):
+            self.profiler.count("yfinance.calls", 3)
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = self.profiler.write(tmp, run_id="run1")
+            payload = json.loads(paths["json"].read_text())
+            prom = paths["prometheus"].read_text()
+        self.assertEqual(payload["counters"]["yfinance.calls"], 3)
+        self.assertIn('portfolio_events_total{name="yfinance.calls"} 3', prom)
+        self.assertIn('span="stage.analyze \\"portfolio\\""', prom)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from ai_portfolio_system.orchestrator import AIOrchestrator
+from ai_portfolio_system.scheduler import (LOW, NORMAL, URGENT, AgentScheduler, ExecutionPolicy,
+                                           StubAgentBackend, load_test, policy_for)
+
+
+class RecordingBackend(StubAgentBackend):
+    def __init__(self, latency=0.0):
+        super().__init__(latency=latency)
+        self.order = []
+        self.active = 0
+        self.max_active = 0
+
+    def run_batch(self, agent, tasks):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            self.order.extend(task.payload for task in tasks)
+        try:
+            return super().run_batch(agent, tasks)
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class TestExecutionPolicies(unittest.TestCase):
+    def test_policies_follow_execution_modes(self):
+        orchestrator = AIOrchestrator()
+        self.assertGreater(policy_for(orchestrator.audit).batch_window, 0)
+        self.assertEqual(policy_for(orchestrator.macro).workers, 1)
+        self.assertIsNotNone(policy_for(orchestrator.ops).rate)
+        self.assertEqual(policy_for(orchestrator.core).max_batch, 1)
+
+
+class TestAgentScheduler(unittest.TestCase):
+    def test_delayed_validation_coalesces_audits(self):
+        backend = StubAgentBackend()
+        policies = {"Delayed validation": ExecutionPolicy(workers=2, batch_window=0.2, max_batch=32)}
+        with AgentScheduler(backend=backend, policies=policies) as scheduler:
+            futures = [scheduler.submit("audit", "audit_prediction", i) for i in range(10)]
+            results = [future.result(timeout=5) for future in futures]
+        self.assertEqual([r["payload"] for r in results], list(range(10)))
+        self.assertEqual(backend.batches, [("Audit_Logic_AI", 10)])
+
+    def test_priority_order_within_a_lane(self):
+        backend = RecordingBackend(latency=0.05)
+        with AgentScheduler(backend=backend, policies={"On demand": ExecutionPolicy(workers=1)}) as scheduler:
+            first = scheduler.submit("macro", "cycle", "first")
+            time.sleep(0.01)  # the single worker is now busy with "first"
+            futures = [scheduler.submit("macro", "cycle", name, priority)
+                       for name, priority in [("low", LOW), ("urgent", URGENT), ("normal", NORMAL)]]
+            for future in [first, *futures]:
+                future.result(timeout=5)
+        self.assertEqual(backend.order, ["first", "urgent", "normal", "low"])
+
+    def test_routing_by_responsibility_and_failures(self):
+        backend = StubAgentBackend(fail_kinds={"Compliance Checks"})
+        with AgentScheduler(backend=backend) as scheduler:
+            self.assertEqual(scheduler.route(None, "Data Quality"), "Data_Engineering_AI")
+            future = scheduler.submit(None, "Compliance Checks", priority=URGENT)
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+            with self.assertRaises(KeyError):
+                scheduler.submit(None, "Unknown Work")
+        self.assertEqual(scheduler.metrics()["Audit_Logic_AI"]["failed"], 1)
+
+    def test_global_concurrency_and_rate_limits(self):
+        backend = RecordingBackend(latency=0.01)
+        with AgentScheduler(backend=backend, max_total_concurrency=1) as scheduler:
+            futures = [scheduler.submit("core", "plan", i) for i in range(6)]
+            futures += [scheduler.submit("data_eng", "ingest", i, URGENT) for i in range(6)]
+            for future in futures:
+                future.result(timeout=5)
+        self.assertEqual(backend.max_active, 1)
+
+        policies = {"Reactive": ExecutionPolicy(workers=4, rate=20.0, burst=1)}
+        with AgentScheduler(policies=policies) as scheduler:
+            start = time.monotonic()
+            for future in [scheduler.submit("ops", "webhook", i) for i in range(5)]:
+                future.result(timeout=5)
+            self.assertGreaterEqual(time.monotonic() - start, 0.15)
+
+    def test_cancelled_tasks_drain_the_queue(self):
+        backend = RecordingBackend(latency=0.05)
+        with AgentScheduler(backend=backend, policies={"On demand": ExecutionPolicy(workers=1)}) as scheduler:
+            first = scheduler.submit("macro", "cycle", "first")
+            time.sleep(0.01)  # the single worker is now busy with "first"
+            dropped = scheduler.submit("macro", "cycle", "dropped")
+            kept = scheduler.submit("macro", "cycle", "kept")
+            self.assertTrue(dropped.cancel())
+            first.result(timeout=5)
+            kept.result(timeout=5)
+        metrics = scheduler.metrics()["Macro_Strategy_AI"]
+        self.assertEqual(backend.order, ["first", "kept"])
+        self.assertEqual((metrics["completed"], metrics["cancelled"], metrics["queued"]), (2, 1, 0))
+
+    def test_load_test_reports_metrics_per_agent(self):
+        metrics = load_test(tasks=300, latency=0.0)
+        self.assertEqual(sum(m["completed"] for m in metrics.values()), 300)
+        for m in metrics.values():
+            self.assertEqual(m["queued"], 0)
+            self.assertGreaterEqual(m["latency_p95_s"], m["latency_p50_s"])
+
+
+if __name__ == '__main__':
+    unittest.main()
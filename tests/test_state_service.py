@@ -0,0 +1,172 @@
+import unittest
+import sys
+import os
+import http.client
+import json
+import socket
+import tempfile
+import threading
+import types
+from unittest import mock
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.analysis.metrics import build_positions, calculate_position_metrics, convert_currency
+from src.service.state_service import PortfolioState, initial_state, make_server
+
+TRADES = pd.DataFrame({
+    "Ticker": ["AAPL", "SAN.MC", "AAPL", "MSFT", "MSFT"],
+    "Type": ["BUY", "BUY", "SELL", "BUY", "SELL"],
+    "Quantity": [10, 100, 4, 5, 5],
+    "Total Amount": [1500.0, 400.0, 700.0, 2000.0, 2100.0],
+    "Currency": ["USD", "EUR", "USD", "USD", "USD"],
+})
+BARS = [("2026-01-01", "AAPL", 150.0), ("2026-01-01", "SAN.MC", 4.0),
+        ("2026-01-02", "AAPL", 160.0), ("2026-01-02", "SAN.MC", 4.2)]
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path):
+        super().__init__("localhost")
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.unix_path)
+
+
+class TestPortfolioState(unittest.TestCase):
+    def test_incremental_trades_match_full_rebuild(self):
+        state = PortfolioState()
+        state.apply_trades(TRADES.iloc[:2])
+        state.apply_trades(TRADES.iloc[2:])
+        expected = build_positions(TRADES)
+        pd.testing.assert_frame_equal(state.positions_frame(), expected, check_dtype=False)
+
+    def test_bars_update_prices_and_views(self):
+        state = PortfolioState(fx_rate=1.0)
+        state.apply_trades(TRADES)
+        before = state.view("snapshot").etag
+        state.apply_bars(BARS)
+        state.apply_bars([{"date": "2026-01-03", "ticker": "AAPL", "close": 170.0},
+                          {"date": "2026-01-02", "ticker": "SAN.MC", "close": 4.4}])
+        snapshot = json.loads(state.view("snapshot").body)
+        self.assertNotEqual(state.view("snapshot").etag, before)
+        self.assertEqual(snapshot["open_positions"], 2)
+        aapl = next(p for p in snapshot["positions"] if p["symbol"] == "AAPL")
+        self.assertEqual(aapl["last_price"], 170.0)
+        self.assertAlmostEqual(snapshot["value_base"], 6 * 170.0 + 100 * 4.4)
+        self.assertEqual(snapshot["last_bar"], "2026-01-03T00:00:00")
+        self.assertTrue(snapshot["performance"]["metrics"])
+
+    def test_incremental_rows_match_full_recompute(self):
+        state = PortfolioState(fx_rate=1.0)
+        state.apply_bars(BARS[:2])
+        state.apply_trades(TRADES.iloc[:3])
+        state.apply_bars(BARS[2:] + [("2026-01-02", "MSFT", 410.0)])
+        state.apply_trades(TRADES.iloc[3:])
+        state.set_fx_rate(0.9)
+        last_prices = {"AAPL": 160.0, "SAN.MC": 4.2, "MSFT": 410.0}
+        expected = convert_currency(calculate_position_metrics(state.positions_frame(), last_prices, {}), 0.9)
+        expected = expected.drop(columns=["name", "logo"])
+        published = pd.DataFrame(json.loads(state.view("positions").body)["positions"])
+        pd.testing.assert_frame_equal(published, expected, check_dtype=False)
+
+    def test_views_are_strict_json(self):
+        def reject(constant):
+            raise ValueError(f"non-standard JSON constant {constant}")
+
+        state = PortfolioState(fx_rate=1.0)
+        state.apply_trades(TRADES.iloc[:1])
+        state.apply_bars(BARS[::2])  # one held ticker, two bars: volatility is NaN
+        for name in ("snapshot", "performance"):
+            payload = json.loads(state.view(name).body, parse_constant=reject)
+        self.assertIsNone(payload["metrics"]["annual_volatility"])
+
+    def test_bars_for_other_tickers_keep_performance(self):
+        state = PortfolioState(fx_rate=1.0)
+        state.apply_trades(TRADES.iloc[:1])
+        dates = pd.bdate_range("2026-01-01", periods=8)
+        state.apply_bars([(day, "AAPL", 150.0 + i) for i, day in enumerate(dates[:7])])
+        before = json.loads(state.view("performance").body)
+        state.apply_bars([(dates[7], "MSFT", 400.0)])
+        state.apply_bars([(dates[2], "NVDA", 120.0)])
+        after = json.loads(state.view("performance").body)
+        self.assertTrue(after["metrics"])
+        self.assertEqual(after["cumulative_returns"], before["cumulative_returns"])
+        self.assertEqual(len(after["cumulative_returns"]), 6)
+
+
+class TestInitialState(unittest.TestCase):
+    def test_fetched_history_is_keyed_by_broker_symbol(self):
+        trades = pd.DataFrame({"Ticker": ["OZTA"], "Type": ["BUY"], "Quantity": [10],
+                               "Total Amount": [100.0], "Currency": ["EUR"]})
+        history = pd.DataFrame({"GRF.MC": [9.5, 10.5]}, index=pd.to_datetime(["2026-01-01", "2026-01-02"]))
+        loader = types.SimpleNamespace(get_historical_prices=mock.Mock(return_value=history),
+                                       get_usd_eur_rate=lambda: 0.9)
+        with mock.patch.dict(sys.modules, {"src.ingestion.loader": loader}), \
+                mock.patch("src.main.ingest_trades", return_value={"trades": trades}):
+            state = initial_state(fetch_prices=True)
+        self.assertEqual(loader.get_historical_prices.call_args.kwargs["currencies"], {"OZTA": "EUR"})
+        position = json.loads(state.view("positions").body)["positions"][0]
+        self.assertEqual((position["symbol"], position["last_price"], position["value_base"]), ("OZTA", 10.5, 105.0))
+
+
+class TestStateServer(unittest.TestCase):
+    def serve(self, **kwargs):
+        state = PortfolioState()
+        state.apply_trades(TRADES)
+        server = make_server(state, port=0, **kwargs)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def test_etags_and_incremental_posts(self):
+        server = self.serve()
+        conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+        conn.request("GET", "/positions")
+        response = conn.getresponse()
+        body = json.loads(response.read())
+        etag = response.getheader("ETag")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(len(body["positions"]), 3)
+
+        conn.request("GET", "/positions", headers={"If-None-Match": etag})
+        response = conn.getresponse()
+        response.read()
+        self.assertEqual(response.status, 304)
+
+        conn.request("POST", "/bars", body=json.dumps([list(bar) for bar in BARS]))
+        response = conn.getresponse()
+        self.assertEqual(json.loads(response.read())["version"], server.RequestHandlerClass.state.version)
+
+        conn.request("GET", "/positions", headers={"If-None-Match": etag})
+        response = conn.getresponse()
+        response.read()
+        self.assertEqual(response.status, 200)
+        self.assertNotEqual(response.getheader("ETag"), etag)
+
+        conn.request("POST", "/trades", body=json.dumps([{"Ticker": "AAPL", "Type": "BUY"}]))
+        response = conn.getresponse()
+        response.read()
+        self.assertEqual(response.status, 400)
+        conn.close()
+
+    @unittest.skipUnless(hasattr(socket, "AF_UNIX"), "Unix sockets not available")
+    def test_unix_socket(self):
+        path = os.path.join(tempfile.mkdtemp(), "state.sock")
+        self.serve(unix_socket=path)
+        conn = UnixHTTPConnection(path)
+        conn.request("GET", "/health")
+        response = conn.getresponse()
+        self.assertEqual(response.status, 200)
+        self.assertEqual(json.loads(response.read())["status"], "ok")
+        conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
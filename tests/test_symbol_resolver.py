@@ -0,0 +1,69 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ingestion.symbol_resolver import SEED_OVERRIDES, SymbolResolver
+
+
+class FakeProbe:
+    def __init__(self, known):
+        self.known = known
+        self.calls = []
+
+    def __call__(self, symbol):
+        self.calls.append(symbol)
+        return self.known.get(symbol)
+
+
+class TestSymbolResolver(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.overrides_path = Path(self.tmp.name) / "overrides.json"
+        self.probe = FakeProbe({"XYZW": "XYZW.DE"})
+        self.resolver = SymbolResolver(overrides_path=self.overrides_path, probe=self.probe)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_portfolio_resolves_offline(self):
+        resolved = self.resolver.resolve_many(["AAPL", "CAD", "GRF", "SAN.MC", "BME:ITX", "USD CASH"])
+        self.assertEqual(resolved, {"AAPL": "AAPL", "CAD": "CIE.MC", "GRF": "GRF.MC",
+                                    "SAN.MC": "SAN.MC", "BME:ITX": "ITX.MC"})
+        self.assertEqual(self.probe.calls, [])
+        self.assertFalse(self.overrides_path.exists())
+
+    def test_currency_picks_listing(self):
+        self.assertEqual(self.resolver.resolve("SAN"), "SAN")
+        self.assertEqual(self.resolver.resolve("SAN", "EUR"), "SAN.MC")
+
+    def test_unknown_symbols_are_probed_once_and_persisted(self):
+        resolved = self.resolver.resolve_many(["AAPL", "XYZW", "NOPE1"])
+        self.assertEqual(resolved["XYZW"], "XYZW.DE")
+        self.assertEqual(resolved["NOPE1"], "NOPE1")
+        self.assertEqual(self.probe.calls, ["XYZW", "NOPE1"])
+
+        stored = json.loads(self.overrides_path.read_text(encoding="utf-8"))
+        self.assertEqual(stored["XYZW"], "XYZW.DE")
+        self.assertEqual(stored["CAD"], SEED_OVERRIDES["CAD"])
+
+        fresh = SymbolResolver(overrides_path=self.overrides_path, probe=self.probe)
+        self.assertEqual(fresh.resolve("XYZW"), "XYZW.DE")
+        self.assertEqual(self.probe.calls, ["XYZW", "NOPE1"])
+
+    def test_seed_codes_apply_over_an_older_stored_table(self):
+        # Table saved before "CAD" was seeded, with a manual correction for "ENL"
+        self.overrides_path.write_text(json.dumps({"XYZW": "XYZW.DE", "ENL": "ENEL.DE"}), encoding="utf-8")
+        resolver = SymbolResolver(overrides_path=self.overrides_path, probe=self.probe)
+        self.assertEqual(resolver.resolve("CAD"), SEED_OVERRIDES["CAD"])
+        self.assertEqual(resolver.resolve("ENL"), "ENEL.DE")
+        self.assertEqual(resolver.resolve("XYZW"), "XYZW.DE")
+        self.assertEqual(self.probe.calls, [])
+
+
+if __name__ == '__main__':
+    unittest.main()